@@ -4,6 +4,7 @@ from config import Config
 import os
 from app.extensions import db, migrate, login_manager, cors
 from app.auth import init_oauth
+from app.utils.json_provider import FastJSONProvider
 
 def register_extensions(app):
     """Register Flask extensions."""
@@ -12,6 +13,24 @@ def register_extensions(app):
     login_manager.init_app(app)
     init_oauth(app)
     
+    from app.utils.identity_cache import init_identity_cache
+    init_identity_cache(app)
+    
+    from app.utils.db_routing import init_db_routing
+    init_db_routing(app)
+    
+    from app.utils.sql_instrumentation import init_sql_instrumentation
+    init_sql_instrumentation(app)
+
+    from app.utils.compression import init_compression
+    init_compression(app)
+    
+    from app.utils.partitioning import init_partitioning
+    init_partitioning(app)
+    
+    from app.utils.admission import init_admission_control
+    init_admission_control(app)
+    
     # Configure CORS
     cors.init_app(app, resources={
         r"/api/*": {
@@ -41,8 +60,8 @@ def configure_login_manager(app):
     
     @login_manager.user_loader
     def load_user(user_id):
-        from app.models import User
-        return User.query.get(int(user_id))
+        from app.utils.identity_cache import load_user as load_cached_user
+        return load_cached_user(int(user_id))
 
 def create_app(config_class=Config):
     """Application factory function."""
@@ -50,6 +69,7 @@ def create_app(config_class=Config):
     
     # Configure the app
     app.config.from_object(config_class)
+    app.json = FastJSONProvider(app)
     
     # Print debug information
     print(f"Flask Debug Mode: {app.debug}")
@@ -64,6 +84,10 @@ def create_app(config_class=Config):
     # Initialize extensions and register blueprints
     register_extensions(app)
     register_blueprints(app)
+
+    from app.cli import register_commands
+    register_commands(app)
+
     configure_login_manager(app)
     
     # Set up error handlers
@@ -1,71 +1,67 @@
-from authlib.integrations.flask_client import OAuth
-from authlib.jose import jwk
-from flask import current_app
-import boto3
-import requests
-from botocore.exceptions import NoCredentialsError
+import os
+from authlib.integrations.flask_client import OAuth, FlaskOAuth2App
+from app.auth.metadata_cache import configure as configure_metadata_cache, get_document
 
-oauth = OAuth()
 
-def fetch_jwks(jwks_uri):
-    """Fetch and parse JWKS from the provided URI"""
-    try:
-        response = requests.get(jwks_uri)
-        response.raise_for_status()
-        return response.json()
-    except Exception as e:
-        print(f"Error fetching JWKS: {e}")
-        return None
+class CachedMetadataOAuth2App(FlaskOAuth2App):
+    """OAuth client whose OIDC metadata and JWKS come from the on-disk cache.
+
+    Nothing is fetched at registration; the documents are loaded the first
+    time a login needs them and refreshed in the background afterwards.
+    """
+
+    def load_server_metadata(self):
+        if self._server_metadata_url:
+            metadata = get_document(self._server_metadata_url)
+            self.server_metadata.update({k: v for k, v in metadata.items() if k != 'jwks'})
+        return self.server_metadata
+
+    def fetch_jwk_set(self, force=False):
+        # force is used by Authlib when a token is signed with an unknown key,
+        # i.e. after Cognito rotates its keys
+        uri = self.load_server_metadata().get('jwks_uri')
+        if not uri:
+            raise RuntimeError('Missing "jwks_uri" in metadata')
+        return get_document(uri, force=force)
+
+
+class CachedMetadataOAuth(OAuth):
+    oauth2_client_cls = CachedMetadataOAuth2App
+
+
+oauth = CachedMetadataOAuth()
 
 def init_oauth(app):
+    """Register the Cognito client. Makes no network requests."""
     oauth.init_app(app)
 
-    try:
-        # Construct base URLs
-        region = app.config['AWS_COGNITO_REGION']
-        user_pool_id = app.config['AWS_COGNITO_USER_POOL_ID']
-        cognito_domain = app.config['COGNITO_DOMAIN']
-        
-        # Construct all required URIs
-        base_url = f"https://{cognito_domain}"
-        jwks_uri = f"https://cognito-idp.{region}.amazonaws.com/{user_pool_id}/.well-known/jwks.json"
-        
-        # Fetch JWKS
-        jwks = fetch_jwks(jwks_uri)
-        if not jwks:
-            raise Exception("Failed to fetch JWKS")
+    configure_metadata_cache(
+        cache_dir=os.path.join(app.instance_path, 'oidc_cache'),
+        ttl=app.config.get('OIDC_METADATA_TTL', 86400)
+    )
 
-        print(f"Initializing OAuth with:")
-        print(f"Base URL: {base_url}")
-        print(f"JWKS URI: {jwks_uri}")
+    # Construct base URLs
+    region = app.config['AWS_COGNITO_REGION']
+    user_pool_id = app.config['AWS_COGNITO_USER_POOL_ID']
+    cognito_domain = app.config['COGNITO_DOMAIN']
+    base_url = f"https://{cognito_domain}"
 
-        oauth.register(
-            name='cognito',
-            client_id=app.config['AWS_COGNITO_CLIENT_ID'],
-            client_secret=app.config['AWS_COGNITO_CLIENT_SECRET'],
-            access_token_url=f"{base_url}/oauth2/token",
-            access_token_params=None,
-            authorize_url=f"{base_url}/oauth2/authorize",
-            authorize_params=None,
-            api_base_url=base_url,
-            client_kwargs={
-                'scope': 'email openid profile',
-                'token_endpoint_auth_method': 'client_secret_post',
-            },
-            jwks=jwks,
-            # Add server metadata URL for OpenID configuration
-            server_metadata_url=f"https://cognito-idp.{region}.amazonaws.com/{user_pool_id}/.well-known/openid-configuration"
-        )
-        
-        print("OAuth client registered successfully")
-        print(f"JWKS configured with {len(jwks.get('keys', [])) if jwks else 0} keys")
-        
-    except NoCredentialsError:
-        print("AWS credentials not found. Please check your configuration.")
-        raise
-    except Exception as e:
-        print(f"Error during OAuth initialization: {str(e)}")
-        raise
+    oauth.register(
+        name='cognito',
+        client_id=app.config['AWS_COGNITO_CLIENT_ID'],
+        client_secret=app.config['AWS_COGNITO_CLIENT_SECRET'],
+        access_token_url=f"{base_url}/oauth2/token",
+        access_token_params=None,
+        authorize_url=f"{base_url}/oauth2/authorize",
+        authorize_params=None,
+        api_base_url=base_url,
+        client_kwargs={
+            'scope': 'email openid profile',
+            'token_endpoint_auth_method': 'client_secret_post',
+        },
+        # OpenID configuration, including jwks_uri, is loaded lazily from here
+        server_metadata_url=f"https://cognito-idp.{region}.amazonaws.com/{user_pool_id}/.well-known/openid-configuration"
+    )
 
     return oauth
 
@@ -74,4 +70,4 @@ def get_jwks():
     cognito = oauth.create_client('cognito')
     if not cognito:
         raise Exception("Cognito client not initialized")
-    return cognito.jwks
\ No newline at end of file
+    return cognito.fetch_jwk_set()
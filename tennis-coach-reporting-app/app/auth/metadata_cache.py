@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import requests
+
+# Cache settings, set by configure() from the app config in init_oauth
+_settings = {'cache_dir': None, 'ttl': 86400, 'timeout': 5}
+_documents = {}
+_registry_lock = threading.Lock()
+
+
+def configure(cache_dir, ttl, timeout=5):
+    _settings.update(cache_dir=cache_dir, ttl=ttl, timeout=timeout)
+
+
+class CachedDocument:
+    """A JSON document fetched over HTTP, cached in memory and on disk.
+
+    The first use loads it from disk if a copy exists, otherwise fetches it.
+    Once older than the TTL the cached copy is still returned while a
+    background thread refreshes it, so requests never wait on the network
+    except for the very first fetch or a forced refresh.
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self._document = None
+        self._fetched_at = 0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    @property
+    def _path(self):
+        if not _settings['cache_dir']:
+            return None
+        name = hashlib.sha1(self.url.encode('utf-8')).hexdigest()
+        return os.path.join(_settings['cache_dir'], f'{name}.json')
+
+    def _load_from_disk(self):
+        path = self._path
+        if not path or not os.path.exists(path):
+            return
+        try:
+            with open(path) as f:
+                cached = json.load(f)
+            self._document = cached['document']
+            self._fetched_at = cached['fetched_at']
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring unreadable OIDC cache file {path}: {e}")
+
+    def _save_to_disk(self):
+        path = self._path
+        if not path:
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump({'url': self.url, 'fetched_at': self._fetched_at, 'document': self._document}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Could not write OIDC cache file {path}: {e}")
+
+    def _fetch(self):
+        response = requests.get(self.url, timeout=_settings['timeout'])
+        response.raise_for_status()
+        document = response.json()
+        with self._lock:
+            self._document = document
+            self._fetched_at = time.time()
+            self._save_to_disk()
+        return document
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def refresh():
+            try:
+                self._fetch()
+            except Exception as e:
+                print(f"Background refresh of {self.url} failed, keeping cached copy: {e}")
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=refresh, name='oidc-cache-refresh', daemon=True).start()
+
+    def get(self, force=False):
+        with self._lock:
+            if self._document is None:
+                self._load_from_disk()
+            document, fetched_at = self._document, self._fetched_at
+
+        if document is None or force:
+            try:
+                return self._fetch()
+            except Exception:
+                if document is None:
+                    raise
+                print(f"Refreshing {self.url} failed, using cached copy")
+                return document
+
+        if time.time() - fetched_at > _settings['ttl']:
+            self._refresh_in_background()
+        return document
+
+
+def get_document(url, force=False):
+    with _registry_lock:
+        document = _documents.get(url)
+        if document is None:
+            document = _documents[url] = CachedDocument(url)
+    return document.get(force=force)
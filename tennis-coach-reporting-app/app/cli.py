@@ -0,0 +1,251 @@
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+import click
+
+# Dependencies that should only be imported by the code paths that use them
+HEAVY_MODULES = ['pandas', 'numpy', 'openpyxl', 'reportlab', 'PyPDF2', 'boto3', 'botocore.session', 'pyarrow']
+
+# Run in a fresh interpreter so nothing is already imported. Prints a JSON
+# summary on stdout; -X importtime writes the per-module timings to stderr.
+PROFILE_SCRIPT = """
+import json, resource, sys, time, tracemalloc
+tracemalloc.start()
+started = time.perf_counter()
+from app import create_app
+create_app()
+elapsed = time.perf_counter() - started
+snapshot = tracemalloc.take_snapshot()
+by_file = {}
+for stat in snapshot.statistics('filename'):
+    by_file[stat.traceback[0].filename] = stat.size
+print(json.dumps({
+    'elapsed': elapsed,
+    'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'traced_bytes': tracemalloc.get_traced_memory()[0],
+    'by_file': by_file,
+    'loaded_heavy': [m for m in %r if m in sys.modules],
+}))
+"""
+
+
+def _package_for(filename):
+    """Group a source file under its top-level package, or the app itself"""
+    app_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if filename.startswith(app_root) and 'site-packages' not in filename:
+        return 'app (this project)'
+    parts = filename.split(os.sep)
+    for marker in ('site-packages', 'dist-packages'):
+        if marker in parts:
+            index = parts.index(marker)
+            if index + 1 < len(parts):
+                return parts[index + 1].split('.')[0]
+    return 'stdlib/other'
+
+
+def _parse_importtime(stderr):
+    """Import time in microseconds per top-level package.
+
+    Sums each module's own (self) time under its root package, so the
+    totals add up without counting nested imports twice.
+    """
+    totals = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        own, _, name = line[len('import time:'):].split('|')
+        totals[name.strip().split('.')[0]] += int(own)
+    return totals
+
+
+def register_commands(app):
+    """Register the app's maintenance commands with the flask CLI"""
+
+    @app.cli.command('profile-startup')
+    @click.option('--top', default=15, show_default=True, help='Rows to show per table')
+    def profile_startup(top):
+        """Show where app start-up time and memory go."""
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', PROFILE_SCRIPT % (HEAVY_MODULES,)],
+            capture_output=True, text=True, cwd=os.path.dirname(app.root_path), env=os.environ.copy()
+        )
+        summary_line = next((line for line in reversed(result.stdout.splitlines()) if line.startswith('{')), None)
+        if result.returncode != 0 or summary_line is None:
+            click.echo(result.stderr[-4000:], err=True)
+            raise click.ClickException('Start-up profile failed; see the error above')
+
+        summary = json.loads(summary_line)
+        import_times = _parse_importtime(result.stderr)
+
+        click.echo(f"create_app() took {summary['elapsed'] * 1000:.0f} ms, "
+                   f"peak RSS {summary['max_rss_kb'] / 1024:.1f} MB, "
+                   f"{summary['traced_bytes'] / 1024 / 1024:.1f} MB allocated by Python\n")
+
+        click.echo('Import time by package:')
+        for name, micros in sorted(import_times.items(), key=lambda item: -item[1])[:top]:
+            click.echo(f'  {micros / 1000:9.1f} ms  {name}')
+
+        memory = defaultdict(int)
+        for filename, size in summary['by_file'].items():
+            memory[_package_for(filename)] += size
+        click.echo('\nMemory allocated during start-up, by package:')
+        for name, size in sorted(memory.items(), key=lambda item: -item[1])[:top]:
+            click.echo(f'  {size / 1024 / 1024:9.2f} MB  {name}')
+
+        if summary['loaded_heavy']:
+            click.echo(f"\nWarning: heavy modules imported at start-up: {', '.join(summary['loaded_heavy'])}")
+        else:
+            click.echo('\nNo heavy modules imported at start-up.')
+
+    @app.cli.command('send-accreditation-reminders')
+    @click.option('--club-id', type=int, help='Only this club (default: all clubs)')
+    @click.option('--dry-run', is_flag=True, help='List the reminders that are due without sending them')
+    def send_accreditation_reminders(club_id, dry_run):
+        """Send due 90/30/0 day accreditation expiry reminders."""
+        from app.services.accreditation_reminders import run_locked, send_due_reminders
+
+        if dry_run:
+            result = send_due_reminders(club_id=club_id, dry_run=True)
+            for coach in result['would_send']:
+                items = ', '.join(f'{label} ({days} days)' for label, days in coach['expiring'])
+                click.echo(f"{coach['email']}: {items}")
+            click.echo(f"{len(result['would_send'])} reminder emails due")
+            return
+
+        result = run_locked(club_id=club_id, max_workers=app.config.get('ACCREDITATION_REMINDER_CONCURRENCY', 4))
+        if result is None:
+            raise click.ClickException('Reminders are already being sent by another process')
+        for error in result['errors']:
+            click.echo(error, err=True)
+        click.echo(f"{result['reminders_sent']} reminder emails sent, {len(result['errors'])} failed")
+
+    @app.cli.command('drop-orphaned-partitions')
+    def drop_orphaned_partitions():
+        """Drop partitions left behind by deleted teaching periods."""
+        from app.extensions import db
+        from app.utils.partitioning import drop_period_partitions, orphaned_period_partitions
+
+        with db.engine.begin() as connection:
+            period_ids = orphaned_period_partitions(connection)
+            for period_id in period_ids:
+                drop_period_partitions(connection, period_id)
+        click.echo(f'Dropped the partitions of {len(period_ids)} deleted teaching periods')
+
+    @app.cli.command('archive-periods')
+    @click.option('--older-than-days', type=int, help='Default: ARCHIVE_PERIODS_OLDER_THAN_DAYS')
+    @click.option('--dry-run', is_flag=True, help='List the periods that would be archived')
+    def archive_periods(older_than_days, dry_run):
+        """Move old teaching periods' players and reports to the archive."""
+        from app.extensions import db
+        from app.services.period_archive import archivable_periods, archive_period
+
+        if older_than_days is None:
+            older_than_days = app.config['ARCHIVE_PERIODS_OLDER_THAN_DAYS']
+        periods = archivable_periods(older_than_days)
+        for period in periods:
+            if dry_run:
+                click.echo(f'Would archive period {period.id} ({period.name}, club {period.tennis_club_id})')
+                continue
+            try:
+                archive = archive_period(period)
+                db.session.commit()
+                click.echo(f'Archived period {period.id} ({period.name}): '
+                           f'{archive.programme_player_count} players, {archive.report_count} reports, '
+                           f'{len(archive.payload) / 1024:.0f} KB compressed')
+            except Exception as e:
+                db.session.rollback()
+                click.echo(f'Failed to archive period {period.id}: {str(e)}', err=True)
+        if not periods:
+            click.echo('No periods to archive')
+
+    @app.cli.command('restore-period')
+    @click.argument('period_id', type=int)
+    def restore_period_command(period_id):
+        """Move an archived teaching period back into the live tables."""
+        from app.extensions import db
+        from app.services.period_archive import restore_period
+
+        archive = restore_period(period_id)
+        if archive is None:
+            raise click.ClickException(f'Period {period_id} is not archived')
+        db.session.commit()
+        click.echo(f'Restored period {period_id}: {archive.programme_player_count} players, '
+                   f'{archive.report_count} reports')
+
+    @app.cli.command('convert-report-content')
+    @click.option('--expand', is_flag=True, help='Convert back to name-keyed content')
+    @click.option('--batch-size', default=500, show_default=True)
+    @click.option('--pause', default=0.0, show_default=True, help='Seconds to sleep between batches')
+    def convert_report_content(expand, batch_size, pause):
+        """Rewrite stored report content in the compact (or name-keyed) format."""
+        import time
+        from app.extensions import db
+        from app.utils.report_content import convert_batch
+
+        after_id = 0
+        converted = before = after = 0
+        while True:
+            last_id, count, size_before, size_after = convert_batch(after_id, batch_size, to_compact=not expand)
+            if last_id is None:
+                break
+            db.session.commit()
+            after_id = last_id
+            converted += count
+            before += size_before
+            after += size_after
+            click.echo(f'Up to report {last_id}: {converted} reports converted')
+            if pause:
+                time.sleep(pause)
+
+        click.echo(f'{converted} reports converted')
+        if before:
+            click.echo(f'Content size {before / 1024:.0f} KB -> {after / 1024:.0f} KB '
+                       f'({(before - after) * 100 / before:.1f}% saved)')
+
+    @app.cli.command('export-reports')
+    @click.argument('period_id', type=int)
+    @click.option('--format', 'export_format', type=click.Choice(['ndjson', 'csv', 'parquet']), default='ndjson')
+    @click.option('--output', '-o', type=click.Path(dir_okay=False, writable=True), required=True)
+    def export_reports(period_id, export_format, output):
+        """Export a teaching period's reports to a file."""
+        from app.models import TeachingPeriod
+        from app.services.report_export import (
+            csv_chunks, export_columns, iter_report_rows, ndjson_chunks, write_parquet
+        )
+
+        period = TeachingPeriod.query.get(period_id)
+        if period is None:
+            raise click.ClickException(f'No teaching period {period_id}')
+        club_id = period.tennis_club_id
+        rows = iter_report_rows(club_id, period_id)
+
+        if export_format == 'parquet':
+            try:
+                count = write_parquet(export_columns(club_id, period_id), rows, output)
+            except ImportError:
+                raise click.ClickException('Parquet export needs pyarrow (pip install pyarrow)')
+            click.echo(f'Wrote {count} reports to {output}')
+            return
+
+        if export_format == 'csv':
+            chunks = csv_chunks(export_columns(club_id, period_id), rows)
+        else:
+            chunks = ndjson_chunks(rows, app.json.dumps)
+        with open(output, 'w', newline='', encoding='utf-8') as f:
+            for chunk in chunks:
+                f.write(chunk)
+        click.echo(f'Wrote {output}')
+
+    @app.cli.command('worker')
+    @click.option('--kind', 'kinds', multiple=True, help='Only run jobs of this kind (repeatable)')
+    @click.option('--burst', is_flag=True, help='Exit once no jobs are due')
+    def worker(kinds, burst):
+        """Run background jobs from the queue."""
+        from app.services.accreditation_reminders import start_reminder_scheduler
+        from app.services.job_queue import run_worker
+
+        if not burst:
+            start_reminder_scheduler(app)
+        run_worker(app, kinds=kinds or None, burst=burst)
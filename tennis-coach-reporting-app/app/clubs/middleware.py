@@ -6,8 +6,8 @@ def get_club_from_request():
     """Extract club from subdomain"""
     if 'localhost' in request.host:
         # For local testing, return first club or specific test club
-        from app.models import TennisClub
-        return TennisClub.query.first().subdomain
+        from app.utils.identity_cache import get_default_club_subdomain
+        return get_default_club_subdomain()
     host = request.host.split(':')[0]
     return host.split('.')[0]
 
@@ -20,7 +20,8 @@ def verify_club_access():
             if not subdomain:
                 return f(*args, **kwargs)
                 
-            if not current_user.tennis_club.subdomain == subdomain:
+            from app.utils.identity_cache import get_club_id_for_subdomain
+            if not current_user.tennis_club_id == get_club_id_for_subdomain(subdomain):
                 return "Unauthorized", 403
                 
             return f(*args, **kwargs)
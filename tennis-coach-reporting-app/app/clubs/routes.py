@@ -5,15 +5,20 @@ from app.models import TennisClub, User, TennisGroup, TeachingPeriod, UserRole,
 from datetime import datetime, timedelta
 from flask_login import login_required, current_user, login_user
 import traceback
-import pandas as pd 
 from werkzeug.utils import secure_filename 
 from datetime import datetime 
+from app.utils.admission import admission_controlled
 from app.utils.auth import admin_required
+from app.utils.db_routing import use_primary
+from app.utils.etags import conditional_get
+from app.utils.serializers import coach_row, group_row, teaching_period_row
 from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime, timezone
 import pytz
 import json
 from app.utils.email import send_coach_invitation
+from app.utils.template_cache import bump_template_versions
+from app.services.period_rollover import rollover_period
 import secrets  # Add this import
 
 # Get UK timezone
@@ -51,6 +56,7 @@ def setup_initial_teaching_period(club_id):
        end_date=start_date + timedelta(weeks=12)
    ))
 @club_management.route('/onboard', methods=['GET', 'POST'])
+@use_primary
 def onboard_club():
     # Check if we have temporary user info
     temp_user_info = session.get('temp_user_info')
@@ -213,6 +219,7 @@ def manage_teaching_periods(club_id):
                          teaching_periods=teaching_periods)
 
 @club_management.route('/onboard-coach', methods=['GET', 'POST'])
+@use_primary
 def onboard_coach():
     temp_user_info = session.get('temp_user_info')
    
@@ -384,6 +391,8 @@ def manage_groups(club_id):
                     try:
                         group.name = group_name
                         group.description = group_description
+                        # Group names are embedded in compiled templates
+                        bump_template_versions([assoc.template_id for assoc in group.template_associations])
                         db.session.commit()
                         flash('Group updated successfully', 'success')
                     except SQLAlchemyError as e:
@@ -404,6 +413,7 @@ def manage_groups(club_id):
                     flash('Cannot delete group with players assigned to it', 'error')
                 else:
                     try:
+                        bump_template_versions([assoc.template_id for assoc in group.template_associations])
                         db.session.delete(group)
                         db.session.commit()
                         flash('Group deleted successfully', 'success')
@@ -518,6 +528,28 @@ def days_until_expiry(expiry_date):
         else:
             return 'valid', days
 
+def _status_badge(item):
+    """Colour and message for one accreditation on the manage coaches page"""
+    days = item['days_remaining']
+    if item['status'] == 'not_set':
+        color_class = 'bg-gray-50 border-gray-200 text-gray-500'
+        message = 'Not Set'
+    elif item['status'] == 'expired':
+        color_class = 'bg-red-50 border-red-200 text-red-700'
+        message = f'Expired {abs(days)} days ago'
+    elif item['status'] == 'warning':
+        color_class = 'bg-yellow-50 border-yellow-200 text-yellow-700'
+        message = f'Expires in {days} days'
+    else:
+        color_class = 'bg-green-50 border-green-200 text-green-700'
+        message = f'Valid until {item["expiry"].astimezone(uk_timezone).strftime("%d %b %Y")}'
+
+    return {
+        'color_class': color_class,
+        'message': message,
+        'label': item['label']
+    }
+
 @club_management.route('/manage/<int:club_id>/coaches', methods=['GET'])
 @login_required
 @admin_required
@@ -541,64 +573,12 @@ def manage_coaches(club_id):
     # Create a dictionary for easy lookup
     coach_details_map = {details.user_id: details for details in coach_details}
 
-    def get_status_data(details, status_type):
-        """Helper function to get status data for template"""
-        status_map = {
-            'accreditation': {
-                'field': 'accreditation_expiry',
-                'label': 'Accreditation'
-            },
-            'dbs': {
-                'field': 'dbs_expiry',
-                'label': 'DBS Check'
-            },
-            'first_aid': {
-                'field': 'first_aid_expiry',
-                'label': 'First Aid'
-            },
-            'safeguarding': {
-                'field': 'safeguarding_expiry',
-                'label': 'Safeguarding'
-            }
-        }
-        
-        if not details:
-            return {
-                'color_class': 'bg-gray-50 border-gray-200 text-gray-500',
-                'message': 'Not Set',
-                'label': status_map[status_type]['label']
-            }
-        
-        status_info = status_map[status_type]
-        expiry_date = getattr(details, status_info['field'])
-        
-        if not expiry_date:
-            return {
-                'color_class': 'bg-gray-50 border-gray-200 text-gray-500',
-                'message': 'Not Set',
-                'label': status_info['label']
-            }
-        
-        current_time = datetime.now(uk_timezone)
-        if expiry_date.tzinfo != uk_timezone:
-            expiry_date = expiry_date.astimezone(uk_timezone)
-            
-        days_until_expiry = (expiry_date - current_time).days
-        
-        if days_until_expiry < 0:
-            color_class = 'bg-red-50 border-red-200 text-red-700'
-            message = f'Expired {abs(days_until_expiry)} days ago'
-        elif days_until_expiry <= 90:
-            color_class = 'bg-yellow-50 border-yellow-200 text-yellow-700'
-            message = f'Expires in {days_until_expiry} days'
-        else:
-            color_class = 'bg-green-50 border-green-200 text-green-700'
-            message = f'Valid until {expiry_date.strftime("%d %b %Y")}'
-            
-        return {
-            'color_class': color_class,
-            'message': message,
-            'label': status_info['label']
+    # Expiry statuses come from one query; only the badge text is built here
+    from app.services.coach_compliance import coach_accreditations
+    status_map = {}
+    for coach in coach_accreditations(club.id):
+        status_map[coach['id']] = {
+            key: _status_badge(item) for key, item in coach['accreditations'].items()
         }
 
     return render_template(
@@ -606,7 +586,7 @@ def manage_coaches(club_id):
         club=club,
         coaches=coaches,
         coach_details_map=coach_details_map,
-        get_status_data=get_status_data,
+        status_map=status_map,
         CoachQualification=CoachQualification,
         CoachRole=CoachRole
     )
@@ -717,6 +697,7 @@ def invite_coach(club_id):
     return redirect(url_for('club_management.manage_coaches', club_id=club_id))
 
 @club_management.route('/accept-invitation/<token>')
+@use_primary
 def accept_invitation(token):
     """Handle coach accepting an invitation"""
     try:
@@ -814,6 +795,7 @@ def manage_players(club_id):
 @club_management.route('/api/players/bulk-upload', methods=['POST'])
 @login_required
 @admin_required
+@admission_controlled('upload')
 def bulk_upload_players():
     """API endpoint for bulk uploading players via CSV"""
     try:
@@ -833,6 +815,10 @@ def bulk_upload_players():
         # Get current club
         club = TennisClub.query.get_or_404(current_user.tennis_club_id)
 
+        # pandas is only needed here, so it is not loaded at startup
+        import pandas as pd
+        from app.services import roster_copy, roster_import
+
         # Read and validate CSV
         try:
             df = pd.read_csv(file, encoding='utf-8')
@@ -843,109 +829,27 @@ def bulk_upload_players():
             return jsonify({'error': f'Error reading CSV file: {str(e)}'}), 400
         
         # Verify required columns
-        required_columns = [
-            'student_name', 'date_of_birth', 'contact_email', 
-            'coach_email', 'group_name', 'day_of_week',
-            'start_time', 'end_time'
-        ]
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        if missing_columns:
-            return jsonify({'error': f'Missing columns: {", ".join(missing_columns)}'}), 400
-        
-        # Get all coaches and groups for the club
-        coaches = {coach.email.lower(): coach for coach in 
-                 User.query.filter_by(tennis_club_id=club.id).all()}
-        groups = {group.name.lower(): group for group in 
-                 TennisGroup.query.filter_by(tennis_club_id=club.id).all()}
+        missing = roster_import.missing_columns(df)
+        if missing:
+            return jsonify({'error': f'Missing columns: {", ".join(missing)}'}), 400
 
         # Verify teaching period
         teaching_period = TeachingPeriod.query.get(teaching_period_id)
         if not teaching_period or teaching_period.tennis_club_id != club.id:
             return jsonify({'error': 'Invalid teaching period selected'}), 400
-        
-        students_created = 0
-        players_created = 0
-        errors = []
-        
-        # Start a new transaction
-        db.session.begin_nested()
-        
-        try:
-            # Process each row in the CSV
-            for index, row in df.iterrows():
-                try:
-                    # Validate coach
-                    coach_email = row['coach_email'].lower()
-                    if coach_email not in coaches:
-                        errors.append(f"Row {index + 2}: Coach with email {coach_email} not found")
-                        continue
-
-                    # Validate group
-                    group_name = row['group_name'].lower()
-                    if group_name not in groups:
-                        errors.append(f"Row {index + 2}: Group {row['group_name']} not found")
-                        continue
-
-                    # Parse time values
-                    try:
-                        start_time = datetime.strptime(row['start_time'], '%H:%M').time()
-                        end_time = datetime.strptime(row['end_time'], '%H:%M').time()
-                    except ValueError:
-                        errors.append(f"Row {index + 2}: Invalid time format. Use HH:MM")
-                        continue
-
-                    # Find or create group time slot
-                    try:
-                        day_of_week = DayOfWeek[row['day_of_week'].upper()]
-                    except KeyError:
-                        errors.append(f"Row {index + 2}: Invalid day of week")
-                        continue
-
-                    group_time = TennisGroupTimes.query.filter_by(
-                        group_id=groups[group_name].id,
-                        day_of_week=day_of_week,
-                        start_time=start_time,
-                        end_time=end_time,
-                        tennis_club_id=club.id
-                    ).first()
 
-                    if not group_time:
-                        errors.append(f"Row {index + 2}: Group time slot not found")
-                        continue
+        if request.form.get('mode') == 'copy':
+            # Opt-in fast path: COPY into a staging table and resolve in SQL
+            result = roster_copy.copy_import([df], club.id, teaching_period.id)
+            return jsonify(result), 400 if 'error' in result else 200
 
-                    # Get or create student with explicit flush
-                    student = Student.query.filter_by(
-                        name=row['student_name'],
-                        tennis_club_id=club.id
-                    ).first()
-
-                    if not student:
-                        student = Student(
-                            name=row['student_name'],
-                            date_of_birth=parse_date(row['date_of_birth']),
-                            contact_email=row['contact_email'],
-                            tennis_club_id=club.id
-                        )
-                        db.session.add(student)
-                        db.session.flush()  # Explicitly flush to get student.id
-                        students_created += 1
-
-                    # Create programme player
-                    player = ProgrammePlayers(
-                        student_id=student.id,
-                        coach_id=coaches[coach_email].id,
-                        group_id=groups[group_name].id,
-                        group_time_id=group_time.id,
-                        teaching_period_id=teaching_period.id,
-                        tennis_club_id=club.id
-                    )
-                    db.session.add(player)
-                    players_created += 1
-
-                except Exception as e:
-                    current_app.logger.error(f"Error processing row {index + 2}: {str(e)}")
-                    errors.append(f"Row {index + 2}: {str(e)}")
-                    raise  # Re-raise to trigger rollback
+        try:
+            # Coaches, groups and time slots are loaded once and every row is
+            # validated against them column-wise rather than queried per row
+            lookups = roster_import.RosterLookups(club.id)
+            valid, errors = roster_import.validate_rows(df, lookups)
+            students, date_errors = roster_import.new_students(valid, club.id)
+            errors.extend(date_errors)
 
             if errors:
                 db.session.rollback()
@@ -954,7 +858,9 @@ def bulk_upload_players():
                     'details': errors
                 }), 400
 
-            # If we get here, everything worked
+            students_created, players_created = roster_import.insert_rows(
+                valid, students, club.id, teaching_period.id
+            )
             db.session.commit()
             
             return jsonify({
@@ -973,6 +879,65 @@ def bulk_upload_players():
         current_app.logger.error(f"Bulk upload error: {str(e)}")
         return jsonify({'error': str(e)}), 400
 
+@club_management.route('/api/players/import', methods=['POST'])
+@login_required
+@admin_required
+@admission_controlled('upload')
+def start_player_import():
+    """Start a background import of a large CSV or Excel roster"""
+    from app.services import roster_import
+
+    try:
+        if 'file' not in request.files:
+            return jsonify({'error': 'No file uploaded'}), 400
+
+        file = request.files['file']
+        if file.filename == '':
+            return jsonify({'error': 'No selected file'}), 400
+
+        if roster_import.file_extension(file.filename) not in roster_import.SUPPORTED_EXTENSIONS:
+            return jsonify({'error': 'File must be a CSV or Excel (.xlsx) file'}), 400
+
+        teaching_period_id = request.form.get('teaching_period_id', type=int)
+        if not teaching_period_id:
+            return jsonify({'error': 'Teaching period is required'}), 400
+
+        teaching_period = TeachingPeriod.query.get(teaching_period_id)
+        if not teaching_period or teaching_period.tennis_club_id != current_user.tennis_club_id:
+            return jsonify({'error': 'Invalid teaching period selected'}), 400
+
+        job_id = roster_import.start_import_job(
+            file, current_user.tennis_club_id, teaching_period.id, current_user.id,
+            mode=request.form.get('mode')
+        )
+        return jsonify({'job_id': job_id, 'status': 'queued'}), 202
+
+    except Exception as e:
+        current_app.logger.error(f"Error starting player import: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@club_management.route('/api/players/import/<int:job_id>', methods=['GET'])
+@login_required
+@admin_required
+@use_primary
+def player_import_status(job_id):
+    """Progress and, once finished, the result of a background roster import"""
+    from app.services import roster_import
+
+    job = roster_import.get_import_job(job_id)
+    if not job or job['club_id'] != current_user.tennis_club_id:
+        return jsonify({'error': 'Import not found'}), 404
+
+    return jsonify({
+        'job_id': job['id'],
+        'status': job['status'],
+        'phase': job['phase'],
+        'rows_processed': job['rows_processed'],
+        'rows_total': job['rows_total'],
+        'result': job['result']
+    })
+
 @club_management.route('/api/template/download')
 @login_required
 @admin_required
@@ -1220,6 +1185,7 @@ def create_player():
 @club_management.route('/api/coaches')
 @login_required
 @admin_required
+@conditional_get('coaches')
 def get_coaches():
     """API endpoint for getting all coaches in the club"""
     current_app.logger.info("Accessing coaches API")
@@ -1237,11 +1203,7 @@ def get_coaches():
     for coach in coaches:
         current_app.logger.info(f"Coach: id={coach.id}, name={coach.name}, role={coach.role}")
     
-    response_data = [{
-        'id': coach.id,
-        'name': coach.name,
-        'email': coach.email
-    } for coach in coaches]
+    response_data = [coach_row(coach) for coach in coaches]
     
     current_app.logger.info(f"Returning coaches: {response_data}")
     return jsonify(response_data)
@@ -1249,17 +1211,14 @@ def get_coaches():
 @club_management.route('/api/groups')
 @login_required
 @admin_required
+@conditional_get('groups')
 def get_groups():
     """API endpoint for getting all groups in the club"""
     groups = TennisGroup.query.filter_by(
         tennis_club_id=current_user.tennis_club_id
     ).order_by(TennisGroup.name).all()
     
-    return jsonify([{
-        'id': group.id,
-        'name': group.name,
-        'description': group.description
-    } for group in groups])
+    return jsonify([group_row(group) for group in groups])
 
 @club_management.route('/api/groups/<int:group_id>/times')
 @login_required
@@ -1311,18 +1270,51 @@ def get_group_times(group_id):
         current_app.logger.error(traceback.format_exc())
         return jsonify({'error': str(e)}), 500
 
+@club_management.route('/api/teaching-periods/<int:period_id>/rollover', methods=['POST'])
+@login_required
+@admin_required
+def rollover_teaching_period(period_id):
+    """Create next-period players from a period's players, applying recommended groups"""
+    try:
+        data = request.get_json() or {}
+        club_id = current_user.tennis_club_id
+
+        from_period = TeachingPeriod.query.get(period_id)
+        if not from_period or from_period.tennis_club_id != club_id:
+            return jsonify({'error': 'Teaching period not found'}), 404
+
+        to_period = TeachingPeriod.query.get(data.get('to_period_id'))
+        if not to_period or to_period.tennis_club_id != club_id:
+            return jsonify({'error': 'Invalid target teaching period'}), 400
+
+        if to_period.id == from_period.id:
+            return jsonify({'error': 'Target teaching period must be different'}), 400
+
+        result = rollover_period(
+            club_id,
+            from_period.id,
+            to_period.id,
+            default_coach_id=current_user.id,
+            keep_coach=bool(data.get('keep_coach', True)),
+            keep_time_slot=bool(data.get('keep_time_slot', True)),
+            dry_run=bool(data.get('dry_run', False))
+        )
+        return jsonify(result)
+
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error rolling over teaching period: {str(e)}")
+        current_app.logger.error(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+
 @club_management.route('/api/teaching-periods')
 @login_required
 @admin_required
+@conditional_get('teaching_periods')
 def get_teaching_periods():
     """API endpoint for getting all teaching periods in the club"""
     periods = TeachingPeriod.query.filter_by(
         tennis_club_id=current_user.tennis_club_id
     ).order_by(TeachingPeriod.start_date.desc()).all()
     
-    return jsonify([{
-        'id': period.id,
-        'name': period.name,
-        'start_date': period.start_date.strftime('%Y-%m-%d'),
-        'end_date': period.end_date.strftime('%Y-%m-%d')
-    } for period in periods])
\ No newline at end of file
+    return jsonify([teaching_period_row(period) for period in periods])
\ No newline at end of file
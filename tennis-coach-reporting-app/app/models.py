@@ -3,7 +3,7 @@ from app import db
 from datetime import datetime, timezone, timedelta
 from enum import Enum
 from sqlalchemy import Index, text
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.types import Enum as PGEnum
 import pytz
 import secrets
@@ -167,7 +167,8 @@ class TeachingPeriod(db.Model):
 
     # Relationships
     tennis_club = db.relationship('TennisClub', back_populates='teaching_periods')
-    reports = db.relationship('Report', back_populates='teaching_period', lazy='dynamic')
+    reports = db.relationship('Report', back_populates='teaching_period', lazy='dynamic',
+                              overlaps='programme_player,reports')
     programme_players = db.relationship('ProgrammePlayers', back_populates='teaching_period', lazy='dynamic')
 
 class Student(db.Model):
@@ -187,17 +188,25 @@ class Student(db.Model):
 
 class ProgrammePlayers(db.Model):
     __tablename__ = 'programme_players'
+    __table_args__ = (
+        Index('idx_programme_players_period_student', 'teaching_period_id', 'student_id'),
+    )
 
-    id = db.Column(db.Integer, primary_key=True)
+    # Partitioned by teaching period, so the period is part of the primary key
+    id = db.Column(db.Integer, db.Sequence('programme_players_id_seq'), primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('student.id'), nullable=False)
     coach_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     group_id = db.Column(db.Integer, db.ForeignKey('tennis_group.id'), nullable=False)
     group_time_id = db.Column(db.Integer, db.ForeignKey('tennis_group_times.id'), nullable=True)
-    teaching_period_id = db.Column(db.Integer, db.ForeignKey('teaching_period.id'), nullable=False)
+    teaching_period_id = db.Column(db.Integer, db.ForeignKey('teaching_period.id'), primary_key=True)
     tennis_club_id = db.Column(db.Integer, db.ForeignKey('tennis_club.id'), nullable=False)
     report_submitted = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime(timezone=True), server_default=text('CURRENT_TIMESTAMP'))
 
+    # ids come from one sequence across every partition, so the ORM can keep
+    # identifying rows by id alone
+    __mapper_args__ = {'primary_key': [id]}
+
     # Relationships
     student = db.relationship('Student', back_populates='programme_players')
     coach = db.relationship('User', back_populates='programme_players')
@@ -205,18 +214,30 @@ class ProgrammePlayers(db.Model):
     group_time = db.relationship('TennisGroupTimes', backref='programme_players')
     teaching_period = db.relationship('TeachingPeriod', back_populates='programme_players')
     tennis_club = db.relationship('TennisClub', back_populates='programme_players')
-    reports = db.relationship('Report', back_populates='programme_player', lazy='dynamic')
+    # A report's period is always its player's, so both relationships set it
+    reports = db.relationship('Report', back_populates='programme_player', lazy='dynamic',
+                              overlaps='reports,teaching_period')
 
 class Report(db.Model):
     __tablename__ = 'report'
+    __table_args__ = (
+        Index('idx_report_period_group', 'teaching_period_id', 'group_id'),
+        Index('idx_report_programme_player', 'programme_player_id'),
+        # programme_players is partitioned too, so references into it carry the period
+        db.ForeignKeyConstraint(
+            ['programme_player_id', 'teaching_period_id'],
+            ['programme_players.id', 'programme_players.teaching_period_id']
+        ),
+    )
 
-    id = db.Column(db.Integer, primary_key=True)
+    # Partitioned by teaching period, so the period is part of the primary key
+    id = db.Column(db.Integer, db.Sequence('report_id_seq'), primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('student.id'), nullable=False)
     coach_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     group_id = db.Column(db.Integer, db.ForeignKey('tennis_group.id'), nullable=False)
     recommended_group_id = db.Column(db.Integer, db.ForeignKey('tennis_group.id'), nullable=True)
-    teaching_period_id = db.Column(db.Integer, db.ForeignKey('teaching_period.id'), nullable=False)
-    programme_player_id = db.Column(db.Integer, db.ForeignKey('programme_players.id'), nullable=False)
+    teaching_period_id = db.Column(db.Integer, db.ForeignKey('teaching_period.id'), primary_key=True)
+    programme_player_id = db.Column(db.Integer, nullable=False)
     template_id = db.Column(db.Integer, db.ForeignKey('report_template.id'), nullable=False)
     content = db.Column(JSONB, nullable=False)  # Structured report data
     date = db.Column(db.DateTime(timezone=True), server_default=text('CURRENT_TIMESTAMP'))
@@ -228,16 +249,25 @@ class Report(db.Model):
     last_email_status = db.Column(db.String(50))
     email_attempts = db.Column(db.Integer, default=0)
 
+    # As on ProgrammePlayers, the id alone identifies a row
+    __mapper_args__ = {'primary_key': [id]}
+
     # Relationships
     student = db.relationship('Student', back_populates='reports')
     coach = db.relationship('User', back_populates='reports')
     tennis_group = db.relationship('TennisGroup', 
                                  foreign_keys=[group_id],
                                  back_populates='reports')
-    teaching_period = db.relationship('TeachingPeriod', back_populates='reports')
-    programme_player = db.relationship('ProgrammePlayers', back_populates='reports')
+    teaching_period = db.relationship('TeachingPeriod', back_populates='reports', overlaps='programme_player,reports')
+    programme_player = db.relationship('ProgrammePlayers', back_populates='reports', overlaps='reports,teaching_period')
     template = db.relationship('ReportTemplate', back_populates='reports')
 
+    @property
+    def expanded_content(self):
+        """content keyed by section and field name, whichever format it is stored in"""
+        from app.utils.report_content import expand
+        return expand(self.content, self.template_id)
+
     def mark_as_sent(self, status='Success'):
         self.email_sent = True
         self.email_sent_at = datetime.now(timezone.utc)
@@ -262,6 +292,15 @@ class Report(db.Model):
 
 class CoachDetails(db.Model):
     __tablename__ = 'coach_details'
+    # Expiry lookups (e.g. "what expires in the next 30 days") are range
+    # scans per club on one of these columns
+    __table_args__ = (
+        Index('idx_coach_details_club_accreditation_expiry', 'tennis_club_id', 'accreditation_expiry'),
+        Index('idx_coach_details_club_dbs_expiry', 'tennis_club_id', 'dbs_expiry'),
+        Index('idx_coach_details_club_first_aid_expiry', 'tennis_club_id', 'first_aid_expiry'),
+        Index('idx_coach_details_club_pediatric_first_aid_expiry', 'tennis_club_id', 'pediatric_first_aid_expiry'),
+        Index('idx_coach_details_club_safeguarding_expiry', 'tennis_club_id', 'safeguarding_expiry'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, unique=True)
@@ -377,6 +416,7 @@ class ReportTemplate(db.Model):
     description = db.Column(db.Text)
     tennis_club_id = db.Column(db.Integer, db.ForeignKey('tennis_club.id'), nullable=False)
     is_active = db.Column(db.Boolean, default=True)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default=text('1'))  # Bumped on every change, keys the compiled template cache
     created_at = db.Column(db.DateTime(timezone=True), server_default=text('CURRENT_TIMESTAMP'))
     created_by_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     
@@ -420,6 +460,15 @@ class TemplateField(db.Model):
     # Relationships
     section = db.relationship('TemplateSection', back_populates='fields')
 
+class TemplateVersion(db.Model):
+    """Field names of one version of a template, used to expand compact report content"""
+    __tablename__ = 'template_version'
+
+    template_id = db.Column(db.Integer, db.ForeignKey('report_template.id'), primary_key=True, autoincrement=False)
+    version = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    fields = db.Column(JSONB, nullable=False)  # {field id: [section name, field name, field type, section order, field order]}
+    created_at = db.Column(db.DateTime(timezone=True), server_default=text('CURRENT_TIMESTAMP'))
+
 class GroupTemplate(db.Model):
     __tablename__ = 'group_template'
 
@@ -435,4 +484,85 @@ class GroupTemplate(db.Model):
                           overlaps="templates,groups")
     template = db.relationship('ReportTemplate', 
                              back_populates='group_associations',
-                             overlaps="templates,groups")
\ No newline at end of file
+                             overlaps="templates,groups")
+class ResourceVersion(db.Model):
+    __tablename__ = 'resource_version'
+
+    # club_id 0 is used for changes that cannot be tied to a single club
+    club_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    resource = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=1, server_default=text('1'))
+
+class AccreditationReminder(db.Model):
+    """One reminder email sent for one certificate reaching one threshold.
+
+    The expiry date is part of the key, so renewing a certificate starts its
+    reminders again from the 90 day threshold.
+    """
+    __tablename__ = 'accreditation_reminder'
+    __table_args__ = (
+        db.UniqueConstraint('coach_details_id', 'accreditation_type', 'expiry_date', 'threshold_days',
+                            name='uq_accreditation_reminder'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    coach_details_id = db.Column(db.Integer, db.ForeignKey('coach_details.id', ondelete='CASCADE'), nullable=False)
+    tennis_club_id = db.Column(db.Integer, db.ForeignKey('tennis_club.id'), nullable=False, index=True)
+    accreditation_type = db.Column(db.String(30), nullable=False)
+    expiry_date = db.Column(db.DateTime(timezone=True), nullable=False)
+    threshold_days = db.Column(db.Integer, nullable=False)
+    sent_at = db.Column(db.DateTime(timezone=True), server_default=text('CURRENT_TIMESTAMP'))
+
+class ArchivedPeriod(db.Model):
+    """A teaching period whose programme players and reports were moved out
+    of the hot tables into one compressed JSON document."""
+    __tablename__ = 'archived_period'
+    __table_args__ = (
+        Index('idx_archived_period_report_ids', 'report_ids', postgresql_using='gin'),
+    )
+
+    teaching_period_id = db.Column(db.Integer, db.ForeignKey('teaching_period.id'), primary_key=True, autoincrement=False)
+    tennis_club_id = db.Column(db.Integer, db.ForeignKey('tennis_club.id'), nullable=False, index=True)
+    # Lets a single report be found without decompressing every archive
+    report_ids = db.Column(ARRAY(db.Integer), nullable=False, default=list)
+    programme_player_count = db.Column(db.Integer, nullable=False, default=0)
+    report_count = db.Column(db.Integer, nullable=False, default=0)
+    # gzip of {"programme_players": [...], "reports": [...]}, rows as to_jsonb() produced them
+    payload = db.Column(db.LargeBinary, nullable=False)
+    archived_at = db.Column(db.DateTime(timezone=True), server_default=text('CURRENT_TIMESTAMP'))
+
+    teaching_period = db.relationship('TeachingPeriod', backref=db.backref('archive', uselist=False))
+
+class BackgroundJob(db.Model):
+    """A unit of work run outside the request cycle by `flask worker`"""
+    __tablename__ = 'background_job'
+    __table_args__ = (
+        # Workers claim the highest priority queued job that is due
+        Index('idx_background_job_claim', text('priority DESC'), 'run_after', 'id',
+              postgresql_where=text("status = 'queued'")),
+        Index('idx_background_job_club', 'tennis_club_id', 'created_at'),
+        # At most one queued or running job per dedupe key (see job_queue.enqueue)
+        Index('uq_background_job_active_dedupe', 'dedupe_key', unique=True,
+              postgresql_where=text("status IN ('queued', 'running')")),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(JSONB, nullable=False, default=dict)
+    dedupe_key = db.Column(db.String(200))
+    status = db.Column(db.String(20), nullable=False, default='queued', server_default='queued')  # queued, running, succeeded, failed
+    priority = db.Column(db.Integer, nullable=False, default=0, server_default=text('0'))  # Higher runs first
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default=text('0'))
+    max_attempts = db.Column(db.Integer, nullable=False, default=3, server_default=text('3'))
+    run_after = db.Column(db.DateTime(timezone=True), nullable=False, server_default=text('CURRENT_TIMESTAMP'))
+    locked_by = db.Column(db.String(100))
+    locked_at = db.Column(db.DateTime(timezone=True))
+    progress = db.Column(JSONB, nullable=False, default=dict, server_default=text("'{}'"))
+    result = db.Column(JSONB)
+    error = db.Column(db.Text)
+    tennis_club_id = db.Column(db.Integer, db.ForeignKey('tennis_club.id'))
+    created_by_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    created_at = db.Column(db.DateTime(timezone=True), server_default=text('CURRENT_TIMESTAMP'))
+    started_at = db.Column(db.DateTime(timezone=True))
+    finished_at = db.Column(db.DateTime(timezone=True))
+    updated_at = db.Column(db.DateTime(timezone=True), server_default=text('CURRENT_TIMESTAMP'))
@@ -1,36 +1,41 @@
 import os
 import traceback
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, current_app, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, current_app, jsonify, abort
 from flask_login import login_user, login_required, logout_user, current_user
 from werkzeug.security import check_password_hash, generate_password_hash
 from app.models import (
     User, TennisGroup, TeachingPeriod, Student, Report, UserRole, 
     TennisClub, ProgrammePlayers, CoachInvitation, CoachDetails,
-    GroupTemplate, ReportTemplate, TemplateSection, TemplateField, FieldType, TennisGroupTimes
+    GroupTemplate, ReportTemplate, TemplateSection, TemplateField, FieldType, TennisGroupTimes,
+    BackgroundJob
 )
 from app import db
 from app.auth import oauth
 from app.clubs.routes import club_management
-import pandas as pd
-from sqlalchemy.orm import joinedload
-from datetime import datetime, timezone, timedelta
+from sqlalchemy.orm import joinedload, contains_eager
+from datetime import datetime, timedelta
 from werkzeug.utils import secure_filename
 from flask import session, url_for
 from sqlalchemy.exc import SQLAlchemyError
-from botocore.exceptions import ClientError
-import boto3
 import secrets
 from authlib.integrations.base_client.errors import MismatchingStateError
-from app.utils.report_generator import create_single_report_pdf
+from app.utils.admission import admission_controlled
 from app.utils.auth import admin_required, club_access_required
+from app.utils.db_routing import use_primary
+from app.utils.etags import conditional_get
+from app.utils.serializers import group_row, programme_player_row, report_row, time_slot_row
+from app.utils.sql_instrumentation import recent_request_stats
 from app.clubs.middleware import verify_club_access
-from flask import send_file, make_response
+from flask import send_file, make_response, Response, stream_with_context
 from io import BytesIO
-import zipfile
 from app.config.clubs import get_club_from_email, TENNIS_CLUBS
 from flask_cors import CORS, cross_origin
-from sqlalchemy import func, distinct, and_, or_
-from app.services.email_service import EmailService
+from sqlalchemy import func, distinct, and_
+from app.services.report_analytics import skill_distribution
+from app.utils.template_cache import (
+    get_compiled_template, template_payload, bump_template_versions, validate_report_content
+)
+from app.utils.report_content import content_for_storage
 
 main = Blueprint('main', __name__)
 
@@ -109,6 +114,7 @@ def login():
         return f"Login error: {str(e)}", 500
 
 @main.route('/auth/callback')
+@use_primary
 def auth_callback():
     print("Callback reached")
     try:
@@ -547,24 +553,21 @@ def programme_players():
             ProgrammePlayers.coach_id
         ).all()
         
-        return jsonify([{
-            'id': player.id,
-            'student_name': player.student_name,
-            'group_name': player.group_name,
-            'group_id': player.group_id,
-            'group_time_id': player.group_time_id,
-            'time_slot': {
-                'day_of_week': player.day_of_week.value if player.day_of_week else None,
-                'start_time': player.start_time.strftime('%H:%M') if player.start_time else None,
-                'end_time': player.end_time.strftime('%H:%M') if player.end_time else None
-            } if player.day_of_week else None,
-            'report_submitted': player.report_id is not None,
-            'report_id': player.report_id,
-            'can_edit': current_user.is_admin or current_user.is_super_admin or 
-                       player.coach_id == current_user.id or 
-                       player.assigned_coach_id == current_user.id,
-            'has_template': player.template_count > 0  # Add this
-        } for player in players])
+        # Resolve the current user once rather than through the proxy per row
+        user_id = current_user.id
+        can_edit_all = current_user.is_admin or current_user.is_super_admin
+
+        def serialize(player):
+            data = programme_player_row(player)
+            data['time_slot'] = time_slot_row(player) if player.day_of_week else None
+            data['report_submitted'] = player.report_id is not None
+            data['can_edit'] = (can_edit_all or
+                                player.coach_id == user_id or
+                                player.assigned_coach_id == user_id)
+            data['has_template'] = player.template_count > 0
+            return data
+
+        return jsonify([serialize(player) for player in players])
         
     except Exception as e:
         print(f"Error fetching programme players: {str(e)}")
@@ -597,6 +600,8 @@ def upload():
             
         if file and allowed_file(file.filename):
             try:
+                import pandas as pd
+
                 df = pd.read_csv(file)
                 
                 # Simplified expected columns
@@ -713,17 +718,45 @@ def debug_reports():
         } for r in reports]
     }
 
+@main.route('/debug/sql')
+@login_required
+@admin_required
+def debug_sql():
+    """Query counts, DB time and repeated statements for recent requests in this process"""
+    # The requests come from every club, so only super admins may see them
+    if not current_user.is_super_admin:
+        abort(403)
+    limit = request.args.get('limit', 50, type=int)
+    endpoint = request.args.get('endpoint')
+    stats = recent_request_stats(limit=200)
+    if endpoint:
+        stats = [s for s in stats if s['endpoint'] == endpoint]
+    return jsonify({
+        'threshold': current_app.config.get('SQL_N_PLUS_ONE_THRESHOLD'),
+        'requests': stats[:limit]
+    })
+
+def _archived_report_or_404(report_id):
+    """The archived row of a report from the user's club, for reports no longer in the report table"""
+    from app.services.period_archive import find_archived_report
+
+    report = find_archived_report(report_id, current_user.tennis_club_id)
+    if report is None:
+        abort(404)
+    return report
+
 @main.route('/reports/<int:report_id>')
 @login_required
 @verify_club_access()
 def view_report(report_id):
     """Render the view report page"""
     print(f"Accessing report {report_id}")
-    report = Report.query.get_or_404(report_id)
+    report = db.session.get(Report, report_id) or _archived_report_or_404(report_id)
     print(f"Report found: {report is not None}")
     
     # Check permissions
-    if not (current_user.is_admin or current_user.is_super_admin) and report.coach_id != current_user.id:
+    coach_id = report['coach_id'] if isinstance(report, dict) else report.coach_id
+    if not (current_user.is_admin or current_user.is_super_admin) and coach_id != current_user.id:
         flash('You do not have permission to view this report', 'error')
         return redirect(url_for('main.dashboard'))
         
@@ -734,7 +767,11 @@ def view_report(report_id):
 @verify_club_access()
 def edit_report_page(report_id):
     """Render the edit report page"""
-    report = Report.query.get_or_404(report_id)
+    report = db.session.get(Report, report_id)
+    if report is None:
+        _archived_report_or_404(report_id)
+        flash('This report is in an archived teaching period and cannot be edited', 'info')
+        return redirect(url_for('main.view_report', report_id=report_id))
     
     # Check permissions
     if not current_user.is_admin and report.coach_id != current_user.id:
@@ -747,7 +784,17 @@ def edit_report_page(report_id):
 @login_required
 @verify_club_access()
 def report_operations(report_id):
-    report = Report.query.get_or_404(report_id)
+    report = db.session.get(Report, report_id)
+    if report is None:
+        # Reports of archived periods are served read-only from the archive
+        from app.services.period_archive import archived_report_data
+
+        archived = _archived_report_or_404(report_id)
+        if not current_user.is_admin and archived['coach_id'] != current_user.id:
+            return jsonify({'error': 'Permission denied'}), 403
+        if request.method == 'PUT':
+            return jsonify({'error': 'This report is in an archived teaching period and cannot be edited'}), 409
+        return jsonify(archived_report_data(archived))
     
     # Check permissions
     if not current_user.is_admin and report.coach_id != current_user.id:
@@ -757,45 +804,16 @@ def report_operations(report_id):
         print(f"Report content: {report.content}")  # Debug log
         print(f"Report recommended_group_id: {report.recommended_group_id}")  # Debug log
         
-        # Get the template associated with this report
-        template = report.template
-
         # Normalize the report content if needed
-        report_content = report.content
-        if isinstance(report_content, dict) and 'content' in report_content:
-            report_content = report_content['content']
+        report_content = report.expanded_content
 
         # Serialize the report data
-        report_data = {
-            'id': report.id,
-            'studentName': report.student.name,
-            'groupName': report.tennis_group.name,
-            'content': report_content,
-            'recommendedGroupId': report.recommended_group_id,
-            'submissionDate': report.date.isoformat() if report.date else None,
-            'canEdit': current_user.is_admin or report.coach_id == current_user.id
-        }
+        report_data = report_row(report)
+        report_data['content'] = report_content
+        report_data['canEdit'] = current_user.is_admin or report.coach_id == current_user.id
 
         # Serialize the template data
-        template_data = {
-            'id': template.id,
-            'name': template.name,
-            'description': template.description,
-            'sections': [{
-                'id': s.id,
-                'name': s.name,
-                'order': s.order,
-                'fields': [{
-                    'id': field.id,
-                    'name': field.name,
-                    'description': field.description,
-                    'fieldType': field.field_type.value,
-                    'isRequired': field.is_required,
-                    'order': field.order,
-                    'options': field.options
-                } for field in sorted(s.fields, key=lambda x: x.order)]
-            } for s in sorted(template.sections, key=lambda x: x.order)]
-        }
+        template_data = template_payload(get_compiled_template(report.template_id, report.template.version))
 
         return jsonify({
             'report': report_data,
@@ -808,8 +826,14 @@ def report_operations(report_id):
             if not data:
                 return jsonify({'error': 'No data provided'}), 400
 
+            content = data.get('content', {})
+            compiled = get_compiled_template(report.template_id, report.template.version)
+            validation_errors = validate_report_content(compiled, content)
+            if validation_errors:
+                return jsonify({'error': 'Invalid report content', 'details': validation_errors}), 400
+
             # Update report content - should just be the section data
-            report.content = data.get('content', {})
+            report.content = content_for_storage(content, compiled)
             
             # Update recommended group
             report.recommended_group_id = data.get('recommendedGroupId')
@@ -829,124 +853,182 @@ def report_operations(report_id):
             print(f"Error updating report: {str(e)}")
             return jsonify({'error': str(e)}), 500
 
-@main.route('/api/reports/download-all/<int:period_id>', methods=['GET'])
+@main.route('/api/analytics/skills')
+@login_required
+@admin_required
+def skill_analytics():
+    """Distribution of answers per group, section and field for a teaching period"""
+    period_id = request.args.get('period', type=int)
+    group_id = request.args.get('group', type=int)
+    if not period_id:
+        return jsonify({'error': 'Teaching period is required'}), 400
+
+    period = TeachingPeriod.query.filter_by(
+        id=period_id,
+        tennis_club_id=current_user.tennis_club_id
+    ).first_or_404()
+
+    try:
+        return jsonify({
+            'period': {'id': period.id, 'name': period.name},
+            'groups': skill_distribution(current_user.tennis_club_id, period.id, group_id)
+        })
+    except Exception as e:
+        print(f"Error in skill analytics: {str(e)}")
+        print(traceback.format_exc())
+        return jsonify({'error': f"Server error: {str(e)}"}), 500
+
+@main.route('/api/reports/export/<int:period_id>')
+@login_required
+@admin_required
+@admission_controlled('export')
+def export_reports(period_id):
+    """Stream a period's reports as NDJSON or CSV, or download them as Parquet"""
+    from app.services.report_export import (
+        EXPORT_FORMATS, csv_chunks, export_columns, iter_report_rows, ndjson_chunks, write_parquet
+    )
+
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f"format must be one of {', '.join(EXPORT_FORMATS)}"}), 400
+
+    period = TeachingPeriod.query.filter_by(
+        id=period_id,
+        tennis_club_id=current_user.tennis_club_id
+    ).first_or_404()
+    club_id = current_user.tennis_club_id
+    filename = f"reports-{period.name.replace(' ', '_').lower()}.{export_format}"
+
+    if export_format == 'parquet':
+        # Parquet writes its footer last, so the file is built before sending
+        import tempfile
+        try:
+            output = tempfile.TemporaryFile()
+            write_parquet(export_columns(club_id, period_id), iter_report_rows(club_id, period_id), output)
+        except ImportError:
+            return jsonify({'error': 'Parquet export needs pyarrow installed on the server'}), 501
+        output.seek(0)
+        return send_file(output, mimetype='application/vnd.apache.parquet',
+                         as_attachment=True, download_name=filename)
+
+    if export_format == 'csv':
+        body = csv_chunks(export_columns(club_id, period_id), iter_report_rows(club_id, period_id))
+        mimetype = 'text/csv'
+    else:
+        body = ndjson_chunks(iter_report_rows(club_id, period_id), current_app.json.dumps)
+        mimetype = 'application/x-ndjson'
+
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+@main.route('/api/reports/download-all/<int:period_id>', methods=['POST'])
 @login_required
 @admin_required
 def download_all_reports(period_id):
-    """Download all reports for a teaching period"""
-    current_app.logger.info(f"Starting download_all_reports for period_id: {period_id}")
-    
+    """Queue generation of a zip of all reports for a teaching period, or
+    join the generation already running for it.
+
+    Follow /api/jobs/<job_id>/events and fetch the zip from /api/jobs/<job_id>/download
+    once it has succeeded.
+    """
+    from app.services.job_queue import enqueue
+
     try:
         # Verify period belongs to user's club
         period = TeachingPeriod.query.filter_by(
             id=period_id,
             tennis_club_id=current_user.tennis_club_id
         ).first_or_404()
-        current_app.logger.info(f"Found period: {period.name}")
-        
-        # Get the club name and set up directories
-        club_name = current_user.tennis_club.name
-        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        instance_dir = os.path.join(base_dir, 'app', 'instance', 'reports')
-        
-        # Create period-specific directory path
-        period_name = period.name.replace(' ', '_').lower()
-        period_dir = os.path.join(instance_dir, f'reports-{period_name}')
-        
-        # Clear existing reports directory if it exists
-        if os.path.exists(period_dir):
-            current_app.logger.info(f"Clearing existing reports directory: {period_dir}")
-            import shutil
-            shutil.rmtree(period_dir)
-        
-        # Create fresh directory
-        os.makedirs(instance_dir, exist_ok=True)
-        current_app.logger.info(f"Created fresh instance directory")
-        
-        # Choose generator based on club name
-        if 'wilton' in club_name.lower():
-            current_app.logger.info("Using Wilton generator")
-            from app.utils.wilton_report_generator import EnhancedWiltonReportGenerator
-            
-            config_path = os.path.join(base_dir, 'app', 'utils', 'wilton_group_config.json')
-            generator = EnhancedWiltonReportGenerator(config_path)
-            result = generator.batch_generate_reports(period_id)
-            
-            # Get the period-specific directory (generated by the report generator)
-            reports_dir = period_dir
-        else:
-            from app.utils.report_generator import batch_generate_reports
-            result = batch_generate_reports(period_id)
-            reports_dir = result.get('output_directory')
-            
-        current_app.logger.info(f"Reports directory: {reports_dir}")
-            
-        if result.get('success', 0) == 0:
-            current_app.logger.error(f"No reports generated. Details: {result.get('error_details', [])}")
-            return jsonify({
-                'error': 'No reports were generated',
-                'details': result.get('error_details', [])
-            }), 400
-            
-        # Verify the reports directory exists
-        if not os.path.exists(reports_dir):
-            current_app.logger.error(f"Reports directory not found at: {reports_dir}")
-            return jsonify({'error': f'No reports were found after generation'}), 500
-            
-        # Create a ZIP file containing all generated reports
-        memory_file = BytesIO()
-        with zipfile.ZipFile(memory_file, 'w') as zf:
-            pdf_count = 0
-            current_app.logger.info(f"Walking directory: {reports_dir}")
-            
-            for root, dirs, files in os.walk(reports_dir):
-                current_app.logger.info(f"Scanning directory: {root}")
-                current_app.logger.info(f"Found directories: {dirs}")
-                current_app.logger.info(f"Found files: {files}")
-                
-                for file in files:
-                    if file.endswith('.pdf'):
-                        file_path = os.path.join(root, file)
-                        # Preserve directory structure relative to reports_dir
-                        rel_path = os.path.relpath(file_path, reports_dir)
-                        try:
-                            zf.write(file_path, rel_path)
-                            pdf_count += 1
-                            current_app.logger.info(f"Added file to ZIP: {rel_path}")
-                        except Exception as e:
-                            current_app.logger.error(f"Error adding file to ZIP {file_path}: {str(e)}")
-                            
-            if pdf_count == 0:
-                current_app.logger.error("No PDF files were found to add to ZIP")
-                return jsonify({'error': 'No PDF files were generated'}), 400
-                
-        memory_file.seek(0)
-        
-        # Format filename
-        formatted_club_name = club_name.lower().replace(' ', '_')
-        formatted_term = period.name.lower().replace(' ', '_')
-        filename = f"reports_{formatted_club_name}_{formatted_term}.zip"
-        
-        current_app.logger.info(f"Sending ZIP file with {pdf_count} PDFs: {filename}")
-        
-        response = send_file(
-            memory_file,
-            mimetype='application/zip',
-            as_attachment=True,
-            download_name=filename
-        )
-        
-        response.headers['Access-Control-Allow-Origin'] = '*'
-        current_app.logger.info("Successfully prepared response")
-        return response
-        
+
+        # Requests for a period whose zip is already being built share that job
+        job = enqueue('report_pdfs', {
+            'period_id': period.id,
+            'club_id': current_user.tennis_club_id
+        }, club_id=current_user.tennis_club_id, user_id=current_user.id, priority=5,
+            dedupe_key=f'report_pdfs:{current_user.tennis_club_id}:{period.id}')
+        db.session.commit()
+        current_app.logger.info(f"Report zip job {job.id} for period {period.name}")
+        return jsonify({'job_id': job.id, 'status': job.status}), 202
+
     except Exception as e:
-        current_app.logger.error(f"Error generating reports: {str(e)}")
+        db.session.rollback()
+        current_app.logger.error(f"Error queueing report generation: {str(e)}")
         current_app.logger.error(traceback.format_exc())
         return jsonify({'error': str(e)}), 500
 
+@main.route('/api/jobs/<int:job_id>')
+@login_required
+@use_primary
+def background_job_status(job_id):
+    """Status, progress and, once finished, the result of a background job"""
+    from app.services.job_queue import job_status
+
+    job = db.session.get(BackgroundJob, job_id)
+    if not job or job.tennis_club_id != current_user.tennis_club_id:
+        return jsonify({'error': 'Job not found'}), 404
+
+    return jsonify(job_status(job))
+
+@main.route('/api/jobs/<int:job_id>/events')
+@login_required
+@use_primary
+@admission_controlled('stream')
+def background_job_events(job_id):
+    """Stream a background job's progress as Server-Sent Events"""
+    from app.services.job_queue import job_events
+
+    job = db.session.get(BackgroundJob, job_id)
+    if not job or job.tennis_club_id != current_user.tennis_club_id:
+        return jsonify({'error': 'Job not found'}), 404
+    # Give the connection back to the pool; the stream reads on its own
+    db.session.close()
+
+    config = current_app.config
+    events = job_events(
+        job_id, current_app.json.dumps,
+        poll_interval=config.get('JOB_EVENTS_POLL_INTERVAL', 1),
+        keepalive_seconds=config.get('JOB_EVENTS_KEEPALIVE_SECONDS', 15),
+        max_seconds=config.get('JOB_EVENTS_MAX_SECONDS', 25),
+        last_event_id=request.headers.get('Last-Event-ID')
+    )
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@main.route('/api/jobs/<int:job_id>/download')
+@login_required
+@admin_required
+@use_primary
+@admission_controlled('download')
+def download_job_output(job_id):
+    """Download the file a finished job produced"""
+    job = db.session.get(BackgroundJob, job_id)
+    if not job or job.tennis_club_id != current_user.tennis_club_id:
+        return jsonify({'error': 'Job not found'}), 404
+    if job.status != 'succeeded':
+        return jsonify({'error': 'Job has not finished', 'status': job.status}), 409
+
+    path = (job.result or {}).get('path')
+    if not path or not os.path.exists(path):
+        return jsonify({'error': 'The generated file is no longer available'}), 410
+
+    response = send_file(
+        path,
+        mimetype='application/zip',
+        as_attachment=True,
+        download_name=job.result.get('filename') or os.path.basename(path)
+    )
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    return response
+
 @main.route('/download_single_report/<int:report_id>')
 @login_required
+@admission_controlled('pdf')
 def download_single_report(report_id):
     """Download a single report as PDF"""
     report = Report.query.get_or_404(report_id)
@@ -955,6 +1037,9 @@ def download_single_report(report_id):
         flash('You do not have permission to download this report')
         return redirect(url_for('main.dashboard'))
     
+    # reportlab is only loaded by the code paths that render PDFs
+    from app.utils.report_generator import create_single_report_pdf
+
     # Create PDF in memory
     pdf_buffer = BytesIO()
     create_single_report_pdf(report, pdf_buffer)
@@ -1047,44 +1132,20 @@ def send_reports(period_id):
                         'error': 'Email subject and message are required'
                     }), 400
 
-                # Get reports for this period using proper joins
-                reports = (Report.query
-                    .join(Student)
-                    .join(ProgrammePlayers)
-                    .filter(
-                        Report.teaching_period_id == period_id,
-                        ProgrammePlayers.tennis_club_id == current_user.tennis_club_id,
-                        Student.contact_email.isnot(None)  # Only get reports where student has email
-                    ).all())
-                
-                print(f"Found {len(reports)} reports to process")
-                
-                if not reports:
-                    return jsonify({
-                        'error': 'No reports found with valid email addresses'
-                    }), 404
-                
-                # Use the EmailService with proper error handling
-                try:
-                    email_service = EmailService()
-                    success_count, error_count, errors = email_service.send_reports_batch(
-                        reports=reports,
-                        subject=email_subject,
-                        message=email_message
-                    )
-                    
-                    return jsonify({
-                        'success_count': success_count,
-                        'error_count': error_count,
-                        'errors': errors if errors else None
-                    })
-                    
-                except Exception as email_error:
-                    print(f"Email service error: {str(email_error)}")
-                    return jsonify({
-                        'error': f'Error sending emails: {str(email_error)}'
-                    }), 500
-                    
+                from app.services.job_queue import enqueue
+
+                job = enqueue('send_reports', {
+                    'period_id': period.id,
+                    'club_id': current_user.tennis_club_id,
+                    'subject': email_subject,
+                    'message': email_message
+                }, club_id=current_user.tennis_club_id, user_id=current_user.id, priority=5,
+                    dedupe_key=f'send_reports:{current_user.tennis_club_id}:{period.id}')
+                db.session.commit()
+                print(f"Queued send_reports job {job.id}")
+
+                return jsonify({'job_id': job.id, 'status': job.status}), 202
+
             except Exception as e:
                 print(f"Error processing POST request: {str(e)}")
                 print(traceback.format_exc())
@@ -1099,7 +1160,9 @@ def send_reports(period_id):
             .filter(
                 Report.teaching_period_id == period_id,
                 ProgrammePlayers.tennis_club_id == current_user.tennis_club_id
-            ).all())
+            )
+            .options(contains_eager(Report.student))
+            .all())
         
         return jsonify({
             'total_reports': len(reports),
@@ -1198,102 +1261,60 @@ def lta_accreditation():
 @login_required
 @admin_required
 def get_coach_accreditations():
-    club_id = current_user.tennis_club_id
-    coaches = User.query.filter(
-        and_(
-            User.tennis_club_id == club_id,
-            or_(
-                User.role == UserRole.COACH,
-                User.role == UserRole.ADMIN,
-                User.role == UserRole.SUPER_ADMIN
-            )
-        )
-    ).all()
-    
-    def get_accreditation_status(expiry_date):
-        if not expiry_date:
-            return {'status': 'expired', 'days_remaining': None}
-            
-        current_time = datetime.now(timezone.utc)
-        if expiry_date.tzinfo != timezone.utc:
-            expiry_date = expiry_date.astimezone(timezone.utc)
-            
-        days_remaining = (expiry_date - current_time).days
-        
-        if days_remaining < 0:
-            return {'status': 'expired', 'days_remaining': days_remaining}
-        elif days_remaining <= 90:
-            return {'status': 'warning', 'days_remaining': days_remaining}
-        else:
-            return {'status': 'valid', 'days_remaining': days_remaining}
-    
+    from app.services.coach_compliance import coach_accreditations
+
+    coaches = coach_accreditations(
+        current_user.tennis_club_id,
+        roles=[UserRole.COACH, UserRole.ADMIN, UserRole.SUPER_ADMIN]
+    )
+
     coach_data = []
     for coach in coaches:
-        details = coach.coach_details
-        if details:
-            accreditations = {
-                'dbs': get_accreditation_status(details.dbs_expiry),
-                'first_aid': get_accreditation_status(details.first_aid_expiry),
-                'safeguarding': get_accreditation_status(details.safeguarding_expiry),
-                'pediatric_first_aid': get_accreditation_status(details.pediatric_first_aid_expiry),
-                'accreditation': get_accreditation_status(details.accreditation_expiry)
+        if not coach['has_details']:
+            continue
+        coach_data.append({
+            'id': coach['id'],
+            'name': coach['name'],
+            'email': coach['email'],
+            # A missing expiry date is reported to the dashboard as expired
+            'accreditations': {
+                key: {
+                    'status': 'expired' if item['status'] == 'not_set' else item['status'],
+                    'days_remaining': item['days_remaining']
+                }
+                for key, item in coach['accreditations'].items()
             }
-            
-            coach_data.append({
-                'id': coach.id,
-                'name': coach.name,
-                'email': coach.email,
-                'accreditations': accreditations
-            })
-    
+        })
+
     return jsonify(coach_data)
 
 @main.route('/api/coaches/send-reminders', methods=['POST'])
 @login_required
 @admin_required
 def send_accreditation_reminders():
-    club_id = current_user.tennis_club_id
-    coaches = User.query.filter_by(tennis_club_id=club_id, role=UserRole.COACH).all()
-    
-    email_service = EmailService()
-    sent_count = 0
-    errors = []
-    
-    for coach in coaches:
-        if not coach.coach_details:
-            continue
-            
-        expiring_accreditations = []
-        details = coach.coach_details
-        
-        # Check each accreditation
-        if details.dbs_expiry:
-            days = (details.dbs_expiry - datetime.now(timezone.utc)).days
-            if days <= 90:
-                expiring_accreditations.append(('DBS Check', days))
-                
-        # Add similar checks for other accreditations...
-        
-        if expiring_accreditations:
-            try:
-                email_service.send_accreditation_reminder(
-                    coach.email,
-                    coach.name,
-                    expiring_accreditations
-                )
-                sent_count += 1
-            except Exception as e:
-                errors.append(f"Failed to send reminder to {coach.email}: {str(e)}")
-    
+    from app.services.accreditation_reminders import send_due_reminders
+
+    try:
+        result = send_due_reminders(
+            club_id=current_user.tennis_club_id,
+            max_workers=current_app.config.get('ACCREDITATION_REMINDER_CONCURRENCY', 4)
+        )
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error sending accreditation reminders: {str(e)}")
+        current_app.logger.error(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+
     return jsonify({
         'success': True,
-        'reminders_sent': sent_count,
-        'errors': errors
+        'reminders_sent': result['reminders_sent'],
+        'errors': result['errors']
     })
 
 @main.route('/api/report-templates', methods=['GET', 'POST'])
 @login_required
 @admin_required
+@conditional_get('templates')
 def manage_templates():
     if request.method == 'POST':
         data = request.get_json()
@@ -1354,33 +1375,12 @@ def manage_templates():
         is_active=True
     ).all()
     
-    return jsonify([{
-        'id': t.id,
-        'name': t.name,
-        'description': t.description,
-        'assignedGroups': [{
-            'id': assoc.group.id,
-            'name': assoc.group.name
-        } for assoc in t.group_associations if assoc.is_active],
-        'sections': [{
-            'id': s.id,
-            'name': s.name,
-            'order': s.order,
-            'fields': [{
-                'id': f.id,
-                'name': f.name,
-                'description': f.description,
-                'fieldType': f.field_type.value,
-                'isRequired': f.is_required,
-                'order': f.order,
-                'options': f.options
-            } for f in s.fields]
-        } for s in t.sections]
-    } for t in templates])
+    return jsonify([get_compiled_template(t.id, t.version) for t in templates])
 
 @main.route('/api/report-templates/<int:template_id>', methods=['GET', 'PUT', 'DELETE'])
 @login_required
 @admin_required
+@conditional_get('templates')
 def manage_template(template_id):
     template = ReportTemplate.query.filter_by(
         id=template_id,
@@ -1439,6 +1439,7 @@ def manage_template(template_id):
                         )
                         db.session.add(new_assoc)
             
+            bump_template_versions([template.id])
             db.session.commit()
             return jsonify({'message': 'Template updated successfully'})
             
@@ -1449,37 +1450,17 @@ def manage_template(template_id):
     
     elif request.method == 'DELETE':
         template.is_active = False
+        bump_template_versions([template.id])
         db.session.commit()
         return jsonify({'message': 'Template deactivated successfully'})
     
     # GET - Return single template with group assignments
-    return jsonify({
-        'id': template.id,
-        'name': template.name,
-        'description': template.description,
-        'assignedGroups': [{
-            'id': assoc.group.id,
-            'name': assoc.group.name
-        } for assoc in template.group_associations if assoc.is_active],
-        'sections': [{
-            'id': s.id,
-            'name': s.name,
-            'order': s.order,
-            'fields': [{
-                'id': f.id,
-                'name': f.name,
-                'description': f.description,
-                'fieldType': f.field_type.value,
-                'isRequired': f.is_required,
-                'order': f.order,
-                'options': f.options
-            } for f in s.fields]
-        } for s in template.sections]
-    })
+    return jsonify(get_compiled_template(template.id, template.version))
 
 @main.route('/api/groups')
 @login_required
 @verify_club_access()
+@conditional_get('groups', 'templates')
 def get_groups():
     """Get all tennis groups for the current user's tennis club"""
     try:
@@ -1488,9 +1469,7 @@ def get_groups():
         ).order_by(TennisGroup.name).all()
         
         return jsonify([{
-            'id': group.id,
-            'name': group.name,
-            'description': group.description,
+            **group_row(group),
             'currentTemplate': {
                 'id': assoc.template.id,
                 'name': assoc.template.name
@@ -1516,6 +1495,7 @@ def manage_report_templates(club_id):
 @main.route('/api/templates/group-assignments', methods=['GET', 'POST'])
 @login_required
 @verify_club_access()
+@conditional_get('templates', 'groups')
 def manage_group_templates():
     if request.method == 'POST':
         try:
@@ -1544,6 +1524,7 @@ def manage_group_templates():
             
             if existing_assoc:
                 # Update existing association
+                bump_template_versions([existing_assoc.template_id, template_id])
                 existing_assoc.template_id = template_id
                 existing_assoc.is_active = True
             else:
@@ -1554,6 +1535,7 @@ def manage_group_templates():
                     is_active=True
                 )
                 db.session.add(new_assoc)
+                bump_template_versions([template_id])
             
             db.session.commit()
             
@@ -1652,6 +1634,13 @@ def submit_report(player_id):
         if not recommended_group:
             return jsonify({'error': 'Invalid recommended group'}), 400
 
+        compiled = get_compiled_template(data['template_id'])
+        if not compiled:
+            return jsonify({'error': 'Invalid template'}), 400
+        validation_errors = validate_report_content(compiled, data['content'])
+        if validation_errors:
+            return jsonify({'error': 'Invalid report content', 'details': validation_errors}), 400
+
         # Create report with simplified content structure
         report = Report(
             student_id=player.student_id,
@@ -1660,7 +1649,7 @@ def submit_report(player_id):
             teaching_period_id=player.teaching_period_id,
             programme_player_id=player.id,
             template_id=data['template_id'],
-            content=data['content'],  # Just the section data
+            content=content_for_storage(data['content'], compiled),  # Just the section data
             recommended_group_id=recommended_group_id,
             date=datetime.utcnow()
         )
@@ -1724,25 +1713,7 @@ def get_report_template(player_id):
     age = calculate_age(player.student.date_of_birth)
 
     return jsonify({
-        'template': {
-            'id': template.id,
-            'name': template.name,
-            'description': template.description,
-            'sections': [{
-                'id': s.id,
-                'name': s.name,
-                'order': s.order,
-                'fields': [{
-                    'id': f.id,
-                    'name': f.name,
-                    'description': f.description,
-                    'fieldType': f.field_type.value,
-                    'isRequired': f.is_required,
-                    'order': f.order,
-                    'options': f.options
-                } for f in s.fields]
-            } for s in template.sections]
-        },
+        'template': template_payload(get_compiled_template(template.id, template.version)),
         'player': {
             'id': player.id,
             'studentName': player.student.name,
@@ -0,0 +1,221 @@
+import threading
+import time
+import traceback
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import bindparam, text
+from app.extensions import db
+from app.services.coach_compliance import ACCREDITATION_TYPES
+
+# Reminders go out when a certificate has this many days or fewer left. Only
+# the tightest threshold crossed is sent, so a certificate first entered with
+# ten days left gets the 30 day reminder and not the 90 day one as well.
+THRESHOLDS = (90, 30, 0)
+
+# Certificates that expired longer ago than this are not reminded about, so
+# turning the engine on does not mail everyone about years-old certificates
+EXPIRED_GRACE_DAYS = 30
+
+# Key for pg_try_advisory_lock, so only one process runs the reminders at once
+ADVISORY_LOCK_KEY = 4204201
+
+# One SELECT per certificate type, so each can use its (club, expiry) index
+_CERTIFICATE_SELECT = """SELECT cd.id AS coach_details_id,
+               cd.tennis_club_id,
+               u.name,
+               u.email,
+               '{key}' AS accreditation_type,
+               cd.{column} AS expiry_date
+        FROM coach_details cd
+        JOIN "user" u ON u.id = cd.user_id
+        WHERE cd.{column} >= now() - make_interval(days => :grace_days)
+          AND cd.{column} < now() + make_interval(days => :max_threshold + 1)
+          AND (CAST(:club_id AS integer) IS NULL OR cd.tennis_club_id = :club_id)
+          AND u.is_active
+          AND u.email <> ''"""
+
+_CERTIFICATES = '\n        UNION ALL\n        '.join(
+    _CERTIFICATE_SELECT.format(key=key, column=column) for key, (column, _) in ACCREDITATION_TYPES.items()
+)
+
+DUE_CTE = f"""
+    WITH certificate AS (
+        {_CERTIFICATES}
+    ),
+    crossed AS (
+        SELECT c.*,
+               CAST(floor(extract(epoch FROM c.expiry_date - now()) / 86400) AS integer) AS days_remaining
+        FROM certificate c
+    ),
+    due AS (
+        SELECT cr.*,
+               (SELECT min(t) FROM unnest(CAST(:thresholds AS integer[])) AS t
+                WHERE cr.days_remaining <= t) AS threshold_days
+        FROM crossed cr
+    ),
+    unsent AS (
+        SELECT d.*
+        FROM due d
+        WHERE NOT EXISTS (
+            SELECT 1 FROM accreditation_reminder r
+            WHERE r.coach_details_id = d.coach_details_id
+              AND r.accreditation_type = d.accreditation_type
+              AND r.expiry_date = d.expiry_date
+              AND r.threshold_days <= d.threshold_days
+        )
+    )
+"""
+
+# Writing the log rows before sending is what stops two runs sending the same
+# reminder: the unique constraint lets only one of them claim each row
+CLAIM_SQL = DUE_CTE + """,
+    claimed AS (
+        INSERT INTO accreditation_reminder
+            (coach_details_id, tennis_club_id, accreditation_type, expiry_date, threshold_days)
+        SELECT coach_details_id, tennis_club_id, accreditation_type, expiry_date, threshold_days
+        FROM unsent
+        ON CONFLICT ON CONSTRAINT uq_accreditation_reminder DO NOTHING
+        RETURNING id, coach_details_id, accreditation_type, expiry_date, threshold_days
+    )
+    SELECT c.id, d.tennis_club_id, d.name, d.email, d.accreditation_type, d.days_remaining, d.threshold_days
+    FROM claimed c
+    JOIN unsent d ON d.coach_details_id = c.coach_details_id
+                 AND d.accreditation_type = c.accreditation_type
+                 AND d.expiry_date = c.expiry_date
+    ORDER BY d.email, d.days_remaining
+"""
+
+PREVIEW_SQL = DUE_CTE + """
+    SELECT NULL AS id, tennis_club_id, name, email, accreditation_type, days_remaining, threshold_days
+    FROM unsent
+    ORDER BY email, days_remaining
+"""
+
+
+def _params(club_id):
+    return {
+        'club_id': club_id,
+        'thresholds': list(THRESHOLDS),
+        'max_threshold': max(THRESHOLDS),
+        'grace_days': EXPIRED_GRACE_DAYS,
+    }
+
+
+def _group_by_coach(rows):
+    """{email: {'name', 'expiring': [(label, days)], 'ids': [log ids]}}"""
+    coaches = defaultdict(lambda: {'name': None, 'expiring': [], 'ids': []})
+    for row in rows:
+        coach = coaches[row['email']]
+        coach['name'] = row['name']
+        coach['expiring'].append((ACCREDITATION_TYPES[row['accreditation_type']][1], row['days_remaining']))
+        coach['ids'].append(row['id'])
+    return coaches
+
+
+def send_due_reminders(club_id=None, dry_run=False, max_workers=4):
+    """Send every accreditation reminder that is due and not yet sent.
+
+    Due certificates are found and logged in one statement, then each coach
+    gets a single email listing all of their expiring certificates. Sends
+    run concurrently on one SES client; the log rows of any that fail are
+    removed so the next run retries them. With dry_run nothing is logged or
+    sent and the reminders that would go out are returned.
+    """
+    if dry_run:
+        rows = db.session.execute(text(PREVIEW_SQL), _params(club_id)).mappings().all()
+        coaches = _group_by_coach(rows)
+        return {
+            'reminders_sent': 0,
+            'errors': [],
+            'would_send': [
+                {'email': email, 'name': coach['name'], 'expiring': coach['expiring']}
+                for email, coach in coaches.items()
+            ]
+        }
+
+    rows = db.session.execute(text(CLAIM_SQL), _params(club_id)).mappings().all()
+    db.session.commit()
+    coaches = _group_by_coach(rows)
+    if not coaches:
+        return {'reminders_sent': 0, 'errors': []}
+
+    from app.services.email_service import EmailService
+    email_service = EmailService()
+
+    def send(email, coach):
+        email_service.send_accreditation_reminder(email, coach['name'], coach['expiring'])
+
+    failed_ids = []
+    errors = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {email: executor.submit(send, email, coach) for email, coach in coaches.items()}
+        for email, future in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                errors.append(f"Failed to send reminder to {email}: {str(e)}")
+                failed_ids.extend(coaches[email]['ids'])
+
+    if failed_ids:
+        db.session.execute(
+            text('DELETE FROM accreditation_reminder WHERE id IN :ids').bindparams(
+                bindparam('ids', expanding=True)
+            ),
+            {'ids': failed_ids}
+        )
+        db.session.commit()
+
+    return {'reminders_sent': len(coaches) - len(errors), 'errors': errors}
+
+
+def run_locked(club_id=None, max_workers=4):
+    """send_due_reminders, skipped if another process is already running it.
+
+    Returns None when the lock was held elsewhere.
+    """
+    with db.engine.connect() as connection:
+        locked = connection.execute(
+            text('SELECT pg_try_advisory_lock(:key)'), {'key': ADVISORY_LOCK_KEY}
+        ).scalar()
+        if not locked:
+            return None
+        try:
+            return send_due_reminders(club_id=club_id, max_workers=max_workers)
+        finally:
+            connection.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': ADVISORY_LOCK_KEY})
+
+
+def start_reminder_scheduler(app):
+    """Run the reminders every ACCREDITATION_REMINDER_INTERVAL seconds.
+
+    Started by `flask worker`, never by the web processes. Several workers
+    may run it; the advisory lock means only one of them sends at a time and
+    the reminder log stops repeats.
+    """
+    interval = app.config.get('ACCREDITATION_REMINDER_INTERVAL', 0)
+    if not interval:
+        return None
+
+    def loop():
+        # Let the worker finish starting up first
+        time.sleep(app.config.get('ACCREDITATION_REMINDER_START_DELAY', 60))
+        while True:
+            with app.app_context():
+                try:
+                    result = run_locked(max_workers=app.config.get('ACCREDITATION_REMINDER_CONCURRENCY', 4))
+                    if result and (result['reminders_sent'] or result['errors']):
+                        print(f"Accreditation reminders sent: {result['reminders_sent']}, "
+                              f"errors: {len(result['errors'])}")
+                        for error in result['errors']:
+                            print(error)
+                except Exception as e:
+                    print(f"Accreditation reminder run failed: {str(e)}")
+                    print(traceback.format_exc())
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+            time.sleep(interval)
+
+    thread = threading.Thread(target=loop, name='accreditation-reminders', daemon=True)
+    thread.start()
+    return thread
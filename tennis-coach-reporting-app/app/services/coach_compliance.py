@@ -0,0 +1,82 @@
+from sqlalchemy import bindparam, text
+from app.extensions import db
+
+# Accreditation key -> (coach_details column, display label)
+ACCREDITATION_TYPES = {
+    'accreditation': ('accreditation_expiry', 'Accreditation'),
+    'dbs': ('dbs_expiry', 'DBS Check'),
+    'first_aid': ('first_aid_expiry', 'First Aid'),
+    'safeguarding': ('safeguarding_expiry', 'Safeguarding'),
+    'pediatric_first_aid': ('pediatric_first_aid_expiry', 'Pediatric First Aid'),
+}
+
+# An accreditation within this many days of expiry is shown as a warning
+WARNING_DAYS = 90
+
+
+def _status_columns(key, column):
+    # days_remaining matches Python's timedelta.days, i.e. rounded down, so an
+    # accreditation that expired an hour ago is -1 days and 'expired'
+    return f"""cd.{column} AS {key}_expiry,
+           CAST(floor(extract(epoch FROM cd.{column} - now()) / 86400) AS integer) AS {key}_days,
+           CASE WHEN cd.{column} IS NULL THEN 'not_set'
+                WHEN cd.{column} < now() THEN 'expired'
+                WHEN cd.{column} - now() < make_interval(days => :warning_days + 1) THEN 'warning'
+                ELSE 'valid'
+           END AS {key}_status"""
+
+
+_STATUS_COLUMNS = ',\n           '.join(
+    _status_columns(key, column) for key, (column, _) in ACCREDITATION_TYPES.items()
+)
+
+COMPLIANCE_SQL = f"""
+    SELECT u.id,
+           u.name,
+           u.email,
+           cd.id IS NOT NULL AS has_details,
+           {_STATUS_COLUMNS}
+    FROM "user" u
+    LEFT JOIN coach_details cd ON cd.user_id = u.id
+    WHERE u.tennis_club_id = :club_id
+      AND (CAST(:any_role AS boolean) OR CAST(u.role AS text) IN :roles)
+    ORDER BY u.name
+"""
+
+
+def coach_accreditations(club_id, roles=None):
+    """Expiry status of every accreditation for the users of a club.
+
+    Statuses and days remaining are worked out by the database in a single
+    query. Returns one dict per user, ordered by name, with 'has_details'
+    false for users without a coach_details row. Each accreditation is
+    {'status', 'days_remaining', 'expiry', 'label'} where status is one of
+    'valid', 'warning', 'expired' or 'not_set'.
+    """
+    query = text(COMPLIANCE_SQL).bindparams(bindparam('roles', expanding=True))
+    rows = db.session.execute(query, {
+        'club_id': club_id,
+        'any_role': roles is None,
+        # An expanding IN needs at least one value even when it is unused
+        'roles': [role.name for role in roles] if roles else [''],
+        'warning_days': WARNING_DAYS,
+    }).mappings()
+
+    coaches = []
+    for row in rows:
+        coaches.append({
+            'id': row['id'],
+            'name': row['name'],
+            'email': row['email'],
+            'has_details': row['has_details'],
+            'accreditations': {
+                key: {
+                    'status': row[f'{key}_status'],
+                    'days_remaining': row[f'{key}_days'],
+                    'expiry': row[f'{key}_expiry'],
+                    'label': label,
+                }
+                for key, (_, label) in ACCREDITATION_TYPES.items()
+            },
+        })
+    return coaches
@@ -1,4 +1,3 @@
-import boto3
 from botocore.exceptions import ClientError
 from flask import current_app
 import logging
@@ -6,13 +5,15 @@ from datetime import datetime, timezone
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.application import MIMEApplication
-from app.utils.report_generator import create_single_report_pdf
 from io import BytesIO
 import traceback
 from jinja2 import Template
 
 class EmailService:
     def __init__(self):
+        # boto3 takes a noticeable time to import, so only senders pay for it
+        import boto3
+
         self.region = current_app.config['AWS_SES_REGION']
         self.ses_client = boto3.client(
             'ses',
@@ -72,7 +73,7 @@ Best regards,
             'coach_name': report.coach.name,
             'tennis_club': report.programme_player.tennis_club.name,
             'date': report.date.strftime('%B %d, %Y'),
-            'content': report.content  # The structured JSON content
+            'content': report.expanded_content  # The structured JSON content
         }
 
         # Render subject and body
@@ -81,8 +82,13 @@ Best regards,
 
         return subject, body
 
-    def send_reports_batch(self, reports, subject=None, message=None):
-        """Send batch of reports with PDF attachments"""
+    def send_reports_batch(self, reports, subject=None, message=None, progress=None):
+        """Send batch of reports with PDF attachments.
+
+        progress, if given, is called as progress(sent, failed) after each report.
+        """
+        from app.utils.report_generator import create_single_report_pdf
+
         success_count = 0
         error_count = 0
         errors = []
@@ -145,4 +151,42 @@ Best regards,
                 if hasattr(report, 'email_sent'):
                     report.mark_as_sent(f'Error: {str(e)}')
 
-        return success_count, error_count, errors
\ No newline at end of file
+            if progress:
+                progress(success_count, error_count)
+
+        return success_count, error_count, errors
+
+    def send_accreditation_reminder(self, recipient, coach_name, expiring):
+        """Email a coach about certificates that are expiring or have expired.
+
+        expiring is a list of (certificate label, days remaining) pairs.
+        """
+        lines = []
+        for label, days in expiring:
+            if days < 0:
+                lines.append(f"- {label}: expired {abs(days)} days ago")
+            elif days == 0:
+                lines.append(f"- {label}: expires today")
+            else:
+                lines.append(f"- {label}: expires in {days} days")
+
+        subject = "Your coaching accreditations need renewing"
+        body = f"""Dear {coach_name or 'Coach'},
+
+The following accreditations on your coaching record are due to expire or have expired:
+
+{chr(10).join(lines)}
+
+Please renew them and send the updated details to your club so your record can be updated.
+
+Coaches with expired accreditations cannot run sessions until they are renewed.
+"""
+
+        self.ses_client.send_email(
+            Source=self.sender,
+            Destination={'ToAddresses': [recipient]},
+            Message={
+                'Subject': {'Data': subject},
+                'Body': {'Text': {'Data': body}}
+            }
+        )
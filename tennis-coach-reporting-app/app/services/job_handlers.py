@@ -0,0 +1,112 @@
+"""Handlers for the background job kinds. Imported by `flask worker`."""
+import os
+from flask import current_app
+from app.extensions import db
+from app.services.job_queue import PermanentJobError, job_handler
+
+# Reports loaded, emailed and committed together by send_reports
+SEND_BATCH_SIZE = 25
+
+
+def job_output_dir():
+    return os.path.join(current_app.instance_path, 'job_output')
+
+
+@job_handler('roster_import')
+def roster_import_job(ctx, payload):
+    from app.services.roster_import import import_roster_file
+
+    path = payload['path']
+    try:
+        result = import_roster_file(
+            path, payload['club_id'], payload['teaching_period_id'],
+            current_app.config.get('ROSTER_IMPORT_CHUNK_SIZE', 2000),
+            progress=lambda **fields: ctx.progress(
+                done=fields.get('rows_processed'), total=fields.get('rows_total'), **fields
+            ),
+            mode=payload.get('mode')
+        )
+    except Exception:
+        # Keep the spooled file while there are retries left
+        if ctx.is_last_attempt:
+            _remove(path)
+        raise
+
+    _remove(path)
+    if 'error' in result:
+        raise PermanentJobError(result['error'], result)
+    return result
+
+
+@job_handler('report_pdfs')
+def report_pdfs_job(ctx, payload):
+    from app.services.report_batches import build_reports_zip, zip_download_name
+
+    output_path = os.path.join(job_output_dir(), f'job-{ctx.job_id}.zip')
+    pdf_count = build_reports_zip(payload['period_id'], payload['club_id'], output_path, ctx.progress)
+    return {
+        'pdf_count': pdf_count,
+        'path': output_path,
+        'filename': zip_download_name(payload['period_id'], payload['club_id'])
+    }
+
+
+@job_handler('send_reports')
+def send_reports_job(ctx, payload):
+    from app.models import ProgrammePlayers, Report, Student
+    from app.services.email_service import EmailService
+    from app.utils.eager_loading import report_batch_options
+
+    query = (Report.query
+        .join(Student)
+        .join(ProgrammePlayers)
+        .filter(
+            Report.teaching_period_id == payload['period_id'],
+            ProgrammePlayers.tennis_club_id == payload['club_id'],
+            Student.contact_email.isnot(None),
+            # Never email a parent twice, whether this is a retry or a
+            # second send for the period
+            Report.email_sent.isnot(True)
+        ))
+    report_ids = [report_id for (report_id,) in query.with_entities(Report.id).order_by(Report.id)]
+    if not report_ids:
+        raise PermanentJobError('No unsent reports found with valid email addresses')
+
+    email_service = EmailService()
+    success_count, error_count, errors = 0, 0, []
+    for start in range(0, len(report_ids), SEND_BATCH_SIZE):
+        batch = (Report.query
+            .filter(Report.id.in_(report_ids[start:start + SEND_BATCH_SIZE]))
+            .options(*report_batch_options())
+            .order_by(Report.id)
+            .all())
+        sent, failed, batch_errors = email_service.send_reports_batch(
+            reports=batch,
+            subject=payload['subject'],
+            message=payload['message'],
+            progress=lambda s, f: ctx.progress(
+                sent=success_count + s, failed=error_count + f,
+                done=success_count + error_count + s + f, total=len(report_ids)
+            )
+        )
+        # Record the sends batch by batch, so a retry after a crash does not
+        # email the same parents again
+        db.session.commit()
+        success_count += sent
+        error_count += failed
+        errors.extend(batch_errors)
+        ctx.progress(force=True, sent=success_count, failed=error_count,
+                     done=success_count + error_count, total=len(report_ids))
+
+    return {
+        'success_count': success_count,
+        'error_count': error_count,
+        'errors': errors if errors else None
+    }
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,422 @@
+import json
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects.postgresql import insert
+from app.extensions import db
+from app.models import BackgroundJob
+
+# kind -> handler(ctx, payload) returning a JSON-able result, see job_handler
+JOB_HANDLERS = {}
+
+# Statuses a job passes through; only queued jobs are claimed
+QUEUED, RUNNING, SUCCEEDED, FAILED = 'queued', 'running', 'succeeded', 'failed'
+
+CLAIM_SQL = """
+    UPDATE background_job
+    SET status = 'running',
+        attempts = attempts + 1,
+        locked_by = :worker_id,
+        locked_at = now(),
+        progress = '{}'::jsonb,
+        started_at = COALESCE(started_at, now()),
+        updated_at = now()
+    WHERE id = (
+        SELECT id FROM background_job queued
+        WHERE status = 'queued'
+          AND run_after <= now()
+          AND (CAST(:any_kind AS boolean) OR kind IN :kinds)
+          -- One club's batches may not take every worker
+          AND (queued.tennis_club_id IS NULL OR (
+              SELECT count(*) FROM background_job running
+              WHERE running.status = 'running' AND running.tennis_club_id = queued.tennis_club_id
+          ) < :club_limit)
+        ORDER BY priority DESC, run_after, id
+        FOR UPDATE SKIP LOCKED
+        LIMIT 1
+    )
+    RETURNING id, kind, payload, attempts, max_attempts
+"""
+
+# Running jobs whose worker stopped updating them (killed, OOM, deploy)
+REQUEUE_STALE_SQL = """
+    UPDATE background_job
+    SET status = CASE WHEN attempts < max_attempts THEN 'queued' ELSE 'failed' END,
+        error = 'Worker stopped while running the job',
+        locked_by = NULL,
+        finished_at = CASE WHEN attempts < max_attempts THEN NULL ELSE now() END,
+        updated_at = now()
+    WHERE status = 'running'
+      AND updated_at < now() - make_interval(secs => :stale_seconds)
+    RETURNING id
+"""
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler for a failure that retrying cannot fix.
+
+    result, if given, is stored on the job for the client to show.
+    """
+
+    def __init__(self, message, result=None):
+        super().__init__(message)
+        self.result = result
+
+
+def job_handler(kind):
+    """Register a function as the handler for a job kind"""
+    def decorator(f):
+        JOB_HANDLERS[kind] = f
+        return f
+    return decorator
+
+
+def enqueue(kind, payload=None, club_id=None, user_id=None, priority=0, max_attempts=3, delay=0,
+            dedupe_key=None):
+    """Add a job to the queue. The caller commits; workers see it from then on.
+
+    With a dedupe_key, a job with the same key that is still queued or
+    running is returned instead of adding another, so callers asking for the
+    same work at the same time share one run. A partial unique index makes
+    this hold across processes; the insert that loses the race waits for the
+    winner's transaction and then attaches to its job.
+    """
+    values = dict(
+        kind=kind,
+        payload=payload or {},
+        priority=priority,
+        max_attempts=max_attempts,
+        tennis_club_id=club_id,
+        created_by_id=user_id,
+        dedupe_key=dedupe_key
+    )
+    if delay:
+        values['run_after'] = datetime.now(timezone.utc) + timedelta(seconds=delay)
+
+    if dedupe_key is None:
+        job = BackgroundJob(**values)
+        db.session.add(job)
+        db.session.flush()
+        return job
+
+    # The active job may finish between the conflict and the lookup; then
+    # the next insert goes through
+    for _ in range(3):
+        job_id = db.session.execute(
+            insert(BackgroundJob)
+            .values(**values)
+            .on_conflict_do_nothing(
+                index_elements=['dedupe_key'],
+                # Literal, so Postgres can match it to the partial index
+                index_where=text("status IN ('queued', 'running')")
+            )
+            .returning(BackgroundJob.id)
+        ).scalar()
+        if job_id is None:
+            job_id = db.session.query(BackgroundJob.id).filter(
+                BackgroundJob.dedupe_key == dedupe_key,
+                BackgroundJob.status.in_([QUEUED, RUNNING])
+            ).scalar()
+        if job_id is not None:
+            return db.session.get(BackgroundJob, job_id)
+    raise RuntimeError(f'Could not enqueue or find an active job for {dedupe_key!r}')
+
+
+class JobContext:
+    """What a running handler gets besides its payload"""
+
+    def __init__(self, job_id, attempt, max_attempts, progress_interval=0.5):
+        self.job_id = job_id
+        self.attempt = attempt
+        self.max_attempts = max_attempts
+        self._progress_interval = progress_interval
+        self._last_progress = 0
+
+    @property
+    def is_last_attempt(self):
+        return self.attempt >= self.max_attempts
+
+    def progress(self, force=False, **fields):
+        """Merge fields into the job's progress.
+
+        Written on its own connection and committed straight away, so clients
+        see it while the handler's own transaction is still open. Updates
+        closer together than the progress interval are skipped unless forced;
+        each one also shows the worker is still alive.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_progress < self._progress_interval:
+            return
+        self._last_progress = now
+        with db.engine.begin() as connection:
+            connection.execute(
+                text("""
+                    UPDATE background_job
+                    SET progress = progress || CAST(:fields AS jsonb), updated_at = now()
+                    WHERE id = :id
+                """),
+                {'id': self.job_id, 'fields': json.dumps(fields, default=str)}
+            )
+
+
+def claim_job(worker_id, kinds=None, club_limit=2):
+    """Lock the next due job for this worker, or return None.
+
+    Jobs of a club that already has club_limit jobs running wait, so other
+    clubs' jobs go first.
+    """
+    statement = text(CLAIM_SQL).bindparams(bindparam('kinds', expanding=True))
+    row = db.session.execute(statement, {
+        'worker_id': worker_id,
+        'any_kind': not kinds,
+        'club_limit': club_limit,
+        'kinds': list(kinds) if kinds else [''],
+    }).mappings().first()
+    db.session.commit()
+    return row
+
+
+def _finish(job_id, **fields):
+    fields['finished_at'] = fields['updated_at'] = datetime.now(timezone.utc)
+    BackgroundJob.query.filter_by(id=job_id).update(fields)
+    db.session.commit()
+
+
+def _start_heartbeat(job_id, interval):
+    """Touch the job's updated_at every interval seconds until the returned event is set.
+
+    Keeps a long step that reports no progress from being taken for a dead
+    worker's job and run a second time.
+    """
+    engine = db.engine
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(interval):
+            try:
+                with engine.begin() as connection:
+                    connection.execute(
+                        text('UPDATE background_job SET updated_at = now() WHERE id = :id'), {'id': job_id}
+                    )
+            except Exception as e:
+                print(f"Heartbeat for job {job_id} failed: {str(e)}")
+
+    threading.Thread(target=beat, name=f'job-heartbeat-{job_id}', daemon=True).start()
+    return stop
+
+
+def run_job(job, retry_base_seconds=30, heartbeat_seconds=60):
+    """Run a claimed job's handler and record the outcome.
+
+    Exceptions are retried with exponential backoff until max_attempts;
+    PermanentJobError fails the job at once.
+    """
+    handler = JOB_HANDLERS.get(job['kind'])
+    if handler is None:
+        _finish(job['id'], status=FAILED, error=f"No handler for job kind {job['kind']!r}")
+        return FAILED
+
+    ctx = JobContext(job['id'], job['attempts'], job['max_attempts'])
+    stop_heartbeat = _start_heartbeat(job['id'], heartbeat_seconds)
+    try:
+        result = handler(ctx, job['payload'])
+    except PermanentJobError as e:
+        db.session.rollback()
+        _finish(job['id'], status=FAILED, error=str(e), result=e.result)
+        return FAILED
+    except Exception as e:
+        db.session.rollback()
+        print(f"Job {job['id']} ({job['kind']}) attempt {job['attempts']} failed: {str(e)}")
+        print(traceback.format_exc())
+        if ctx.is_last_attempt:
+            _finish(job['id'], status=FAILED, error=str(e))
+            return FAILED
+        delay = retry_base_seconds * 2 ** (job['attempts'] - 1)
+        BackgroundJob.query.filter_by(id=job['id']).update({
+            'status': QUEUED,
+            'error': str(e),
+            'locked_by': None,
+            'run_after': datetime.now(timezone.utc) + timedelta(seconds=delay),
+            'updated_at': datetime.now(timezone.utc),
+        })
+        db.session.commit()
+        return QUEUED
+    finally:
+        stop_heartbeat.set()
+
+    _finish(job['id'], status=SUCCEEDED, result=result, error=None)
+    return SUCCEEDED
+
+
+def requeue_stale_jobs(stale_seconds):
+    ids = db.session.execute(text(REQUEUE_STALE_SQL), {'stale_seconds': stale_seconds}).scalars().all()
+    db.session.commit()
+    return ids
+
+
+def prune_finished_jobs(retention_days):
+    """Delete finished jobs older than retention_days, with any files they produced"""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    jobs = BackgroundJob.query.filter(
+        BackgroundJob.status.in_([SUCCEEDED, FAILED]),
+        BackgroundJob.finished_at < cutoff
+    ).all()
+    for job in jobs:
+        path = (job.result or {}).get('path') if isinstance(job.result, dict) else None
+        if path and os.path.exists(path):
+            os.remove(path)
+        db.session.delete(job)
+    db.session.commit()
+    return len(jobs)
+
+
+def public_result(result):
+    """A job's result without the server-side path of any file it produced"""
+    if isinstance(result, dict):
+        return {k: v for k, v in result.items() if k != 'path'}
+    return result
+
+
+def job_status(job):
+    """The API representation of a job"""
+    progress = job.progress or {}
+    return {
+        'job_id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'progress': progress,
+        'eta_seconds': job_eta_seconds(progress, job.locked_at) if job.status == RUNNING else None,
+        'result': public_result(job.result),
+        'error': job.error,
+        'attempts': job.attempts,
+        'created_at': job.created_at,
+        'finished_at': job.finished_at,
+    }
+
+
+def job_eta_seconds(progress, locked_at, now=None):
+    """Seconds left at the rate the current attempt has managed so far,
+    from the progress's done and total counts, or None if unknown"""
+    done, total = progress.get('done'), progress.get('total')
+    if not done or not total or locked_at is None:
+        return None
+    elapsed = ((now or datetime.now(timezone.utc)) - locked_at).total_seconds()
+    return max(round(elapsed / done * (total - done)), 0)
+
+
+def job_events(job_id, dumps, poll_interval=1, keepalive_seconds=15, max_seconds=25, last_event_id=None):
+    """Server-Sent Events for a job: a `progress` event whenever it changes and
+    a final `done` event once it has succeeded or failed.
+
+    Reads the job on a pooled connection each poll_interval rather than
+    holding a session for the life of the stream. Sends a comment line when
+    nothing has changed for keepalive_seconds, so proxies keep the connection
+    open, and ends the stream after max_seconds. Each stream holds a worker
+    thread, so max_seconds is kept short: EventSource reconnects on its own,
+    sending the id of the last event it saw as last_event_id, and an update
+    the client already has is not sent again.
+    """
+    statement = text("""
+        SELECT status, progress, result, error, attempts, locked_at, updated_at
+        FROM background_job WHERE id = :id
+    """).columns(
+        BackgroundJob.status, BackgroundJob.progress, BackgroundJob.result, BackgroundJob.error,
+        BackgroundJob.attempts, BackgroundJob.locked_at, BackgroundJob.updated_at
+    )
+    engine = db.engine
+    started = last_sent = time.monotonic()
+    last_updated = last_event_id
+
+    yield 'retry: 3000\n\n'
+    while time.monotonic() - started < max_seconds:
+        with engine.connect() as connection:
+            job = connection.execute(statement, {'id': job_id}).mappings().first()
+        if job is None:
+            return
+
+        finished = job['status'] in (SUCCEEDED, FAILED)
+        event_id = str(job['updated_at'])
+        if event_id != last_updated or finished:
+            last_updated = event_id
+            progress = job['progress'] or {}
+            data = {
+                'job_id': job_id,
+                'status': job['status'],
+                'progress': progress,
+                'attempts': job['attempts'],
+                'eta_seconds': None if finished else job_eta_seconds(progress, job['locked_at']),
+            }
+            if finished:
+                data.update(result=public_result(job['result']), error=job['error'])
+            yield f"id: {event_id}\nevent: {'done' if finished else 'progress'}\ndata: {dumps(data)}\n\n"
+            last_sent = time.monotonic()
+            if finished:
+                return
+        elif time.monotonic() - last_sent >= keepalive_seconds:
+            yield ': keepalive\n\n'
+            last_sent = time.monotonic()
+
+        time.sleep(poll_interval)
+
+
+def run_worker(app, kinds=None, burst=False):
+    """Claim and run jobs until stopped (or, in burst mode, until none are due).
+
+    Safe to run any number of workers against one database: FOR UPDATE SKIP
+    LOCKED hands each job to exactly one of them. SIGTERM and SIGINT let the
+    current job finish before the worker exits.
+    """
+    # Register the handlers
+    from app.services import job_handlers  # noqa: F401
+
+    worker_id = f'{socket.gethostname()}:{os.getpid()}'
+    poll_interval = app.config.get('JOB_POLL_INTERVAL', 2)
+    stale_seconds = app.config.get('JOB_STALE_SECONDS', 900)
+    retry_base = app.config.get('JOB_RETRY_BASE_SECONDS', 30)
+    retention_days = app.config.get('JOB_RETENTION_DAYS', 7)
+    club_limit = app.config.get('JOB_MAX_RUNNING_PER_CLUB', 2)
+
+    stopping = []
+
+    def stop(signum, frame):
+        print(f"Worker {worker_id} stopping after the current job")
+        stopping.append(signum)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    print(f"Worker {worker_id} started (kinds: {', '.join(kinds) if kinds else 'all'})")
+    last_maintenance = 0
+    with app.app_context():
+        while not stopping:
+            try:
+                if time.monotonic() - last_maintenance > 60:
+                    requeued = requeue_stale_jobs(stale_seconds)
+                    if requeued:
+                        print(f"Requeued stale jobs: {requeued}")
+                    prune_finished_jobs(retention_days)
+                    last_maintenance = time.monotonic()
+
+                job = claim_job(worker_id, kinds, club_limit)
+                if job is None:
+                    if burst:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+
+                print(f"Running job {job['id']} ({job['kind']}), attempt {job['attempts']}")
+                status = run_job(job, retry_base, heartbeat_seconds=max(stale_seconds // 3, 1))
+                print(f"Job {job['id']} {status}")
+            except Exception as e:
+                # Lost the database, etc. Back off rather than spin.
+                print(f"Worker error: {str(e)}")
+                print(traceback.format_exc())
+                db.session.rollback()
+                time.sleep(poll_interval)
+            finally:
+                db.session.remove()
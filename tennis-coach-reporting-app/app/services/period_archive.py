@@ -0,0 +1,141 @@
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from sqlalchemy import text
+from app.extensions import db
+from app.models import ArchivedPeriod, TeachingPeriod
+from app.utils.partitioning import create_period_partitions, drop_period_partitions, partitioned_tables
+
+# Archived tables in dependency order: report references programme_players
+ARCHIVED_TABLES = ('programme_players', 'report')
+
+ROWS_SQL = """
+    SELECT COALESCE(jsonb_agg(to_jsonb(t) ORDER BY t.id), '[]'::jsonb)
+    FROM {table} t
+    WHERE t.teaching_period_id = :period_id
+"""
+
+# Rows go back exactly as they were archived, ids included
+RESTORE_SQL = """
+    INSERT INTO {table}
+    SELECT * FROM jsonb_populate_recordset(NULL::{table}, CAST(:rows AS jsonb))
+"""
+
+
+def archivable_periods(older_than_days):
+    """Teaching periods that ended more than older_than_days ago and are not archived"""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    return (TeachingPeriod.query
+        .outerjoin(ArchivedPeriod, ArchivedPeriod.teaching_period_id == TeachingPeriod.id)
+        .filter(TeachingPeriod.end_date < cutoff, ArchivedPeriod.teaching_period_id.is_(None))
+        .order_by(TeachingPeriod.end_date)
+        .all())
+
+
+def archive_period(period):
+    """Move a period's programme players and reports into an ArchivedPeriod.
+
+    The rows are read with to_jsonb, gzipped into a single row and deleted
+    from the hot tables. If those tables are partitioned the period's
+    partitions are dropped instead, which also returns their space at once.
+    The caller commits. Returns the new ArchivedPeriod.
+    """
+    rows = {
+        table: db.session.execute(text(ROWS_SQL.format(table=table)), {'period_id': period.id}).scalar()
+        for table in ARCHIVED_TABLES
+    }
+    payload = gzip.compress(json.dumps(rows, separators=(',', ':')).encode('utf-8'))
+
+    archive = ArchivedPeriod(
+        teaching_period_id=period.id,
+        tennis_club_id=period.tennis_club_id,
+        report_ids=[report['id'] for report in rows['report']],
+        programme_player_count=len(rows['programme_players']),
+        report_count=len(rows['report']),
+        payload=payload
+    )
+    db.session.add(archive)
+    db.session.flush()
+
+    connection = db.session.connection()
+    partitioned = partitioned_tables(connection)
+    for table in reversed(ARCHIVED_TABLES):
+        if table in partitioned:
+            drop_period_partitions(connection, period.id, [table])
+        else:
+            connection.execute(
+                text(f'DELETE FROM {table} WHERE teaching_period_id = :period_id'),
+                {'period_id': period.id}
+            )
+    return archive
+
+
+def restore_period(period_id):
+    """Put an archived period's rows back into the hot tables. The caller commits."""
+    archive = db.session.get(ArchivedPeriod, period_id)
+    if archive is None:
+        return None
+
+    rows = _decompress(archive.teaching_period_id, archive.archived_at)
+    connection = db.session.connection()
+    partitioned = partitioned_tables(connection)
+    create_period_partitions(connection, period_id, [t for t in ARCHIVED_TABLES if t in partitioned])
+    for table in ARCHIVED_TABLES:
+        if rows[table]:
+            connection.execute(text(RESTORE_SQL.format(table=table)), {'rows': json.dumps(rows[table])})
+
+    db.session.delete(archive)
+    return archive
+
+
+@lru_cache(maxsize=8)
+def _decompress(period_id, archived_at):
+    # archived_at is part of the key so a period that is restored and
+    # archived again is not served from a stale copy
+    payload = db.session.query(ArchivedPeriod.payload).filter_by(teaching_period_id=period_id).scalar()
+    return json.loads(gzip.decompress(payload))
+
+
+def find_archived_report(report_id, club_id):
+    """The archived row of a report as a dict, or None if it is not archived.
+
+    Uses the GIN index on report_ids to find the archive, then reads it from
+    a small in-process cache of decompressed periods.
+    """
+    archive = (db.session.query(ArchivedPeriod.teaching_period_id, ArchivedPeriod.archived_at)
+        .filter(
+            ArchivedPeriod.tennis_club_id == club_id,
+            ArchivedPeriod.report_ids.contains([report_id])
+        )
+        .first())
+    if archive is None:
+        return None
+
+    rows = _decompress(archive.teaching_period_id, archive.archived_at)
+    return next((report for report in rows['report'] if report['id'] == report_id), None)
+
+
+def archived_report_data(report):
+    """The report_operations GET payload for an archived report row"""
+    from app.models import Student, TennisGroup
+    from app.utils.report_content import expand
+    from app.utils.template_cache import get_compiled_template, template_payload
+
+    content = expand(report['content'], report['template_id'])
+    student = db.session.get(Student, report['student_id'])
+    group = db.session.get(TennisGroup, report['group_id'])
+
+    return {
+        'report': {
+            'id': report['id'],
+            'studentName': student.name if student else None,
+            'groupName': group.name if group else None,
+            'recommendedGroupId': report['recommended_group_id'],
+            'submissionDate': report['date'],
+            'content': content,
+            'canEdit': False,
+            'archived': True
+        },
+        'template': template_payload(get_compiled_template(report['template_id']))
+    }
@@ -0,0 +1,128 @@
+from sqlalchemy import text
+from app.extensions import db
+
+# One row per programme player in the source period whose student is not yet
+# in the target period. The new group is the one recommended on the player's
+# latest report, if that group still belongs to the club, otherwise the
+# current group. A time slot belongs to a group, so it is only carried over
+# when the group is unchanged.
+PLANNED_PLAYERS_CTE = """
+    WITH latest_report AS (
+        SELECT programme_player_id, recommended_group_id
+        FROM (
+            SELECT r.programme_player_id, r.recommended_group_id,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY r.programme_player_id ORDER BY r.date DESC, r.id DESC
+                   ) AS recency
+            FROM report r
+            JOIN programme_players pp ON pp.id = r.programme_player_id
+            WHERE pp.teaching_period_id = :from_period_id
+              AND pp.tennis_club_id = :club_id
+        ) ranked
+        WHERE recency = 1
+    ),
+    planned AS (
+        SELECT pp.id AS source_player_id,
+               pp.student_id,
+               pp.group_id AS from_group_id,
+               COALESCE(rg.id, pp.group_id) AS to_group_id,
+               pp.coach_id AS from_coach_id,
+               CASE WHEN :keep_coach THEN pp.coach_id ELSE :default_coach_id END AS to_coach_id,
+               pp.group_time_id AS from_group_time_id,
+               CASE WHEN :keep_time_slot AND COALESCE(rg.id, pp.group_id) = pp.group_id
+                    THEN pp.group_time_id END AS to_group_time_id
+        FROM programme_players pp
+        LEFT JOIN latest_report lr ON lr.programme_player_id = pp.id
+        LEFT JOIN tennis_group rg ON rg.id = lr.recommended_group_id AND rg.tennis_club_id = :club_id
+        WHERE pp.teaching_period_id = :from_period_id
+          AND pp.tennis_club_id = :club_id
+          AND NOT EXISTS (
+              SELECT 1 FROM programme_players existing
+              WHERE existing.student_id = pp.student_id
+                AND existing.teaching_period_id = :to_period_id
+          )
+    )
+"""
+
+INSERT_SQL = PLANNED_PLAYERS_CTE + """
+    INSERT INTO programme_players
+        (student_id, coach_id, group_id, group_time_id, teaching_period_id, tennis_club_id, report_submitted)
+    SELECT student_id, to_coach_id, to_group_id, to_group_time_id, :to_period_id, :club_id, false
+    FROM planned
+    ORDER BY source_player_id
+"""
+
+DRY_RUN_SQL = PLANNED_PLAYERS_CTE + """
+    SELECT p.student_id,
+           s.name AS student_name,
+           p.from_group_id,
+           fg.name AS from_group_name,
+           p.to_group_id,
+           tg.name AS to_group_name,
+           p.from_coach_id,
+           p.to_coach_id,
+           p.from_group_time_id,
+           p.to_group_time_id
+    FROM planned p
+    JOIN student s ON s.id = p.student_id
+    JOIN tennis_group fg ON fg.id = p.from_group_id
+    JOIN tennis_group tg ON tg.id = p.to_group_id
+    ORDER BY tg.name, s.name
+"""
+
+SKIPPED_SQL = """
+    SELECT count(*)
+    FROM programme_players pp
+    WHERE pp.teaching_period_id = :from_period_id
+      AND pp.tennis_club_id = :club_id
+      AND EXISTS (
+          SELECT 1 FROM programme_players existing
+          WHERE existing.student_id = pp.student_id
+            AND existing.teaching_period_id = :to_period_id
+      )
+"""
+
+
+def rollover_period(club_id, from_period_id, to_period_id, default_coach_id,
+                    keep_coach=True, keep_time_slot=True, dry_run=False):
+    """Enrol the players of one teaching period into the next.
+
+    Runs as a single INSERT ... SELECT. Players whose student is already in
+    the target period are skipped, so the rollover can safely be repeated.
+    With dry_run nothing is written and the planned moves are returned.
+    """
+    params = {
+        'club_id': club_id,
+        'from_period_id': from_period_id,
+        'to_period_id': to_period_id,
+        'keep_coach': keep_coach,
+        'keep_time_slot': keep_time_slot,
+        'default_coach_id': default_coach_id
+    }
+    skipped = db.session.execute(text(SKIPPED_SQL), params).scalar()
+
+    if dry_run:
+        rows = db.session.execute(text(DRY_RUN_SQL), params).all()
+        return {
+            'dry_run': True,
+            'players_to_create': len(rows),
+            'players_skipped': skipped,
+            'groups_changed': sum(1 for row in rows if row.to_group_id != row.from_group_id),
+            'players': [{
+                'student_id': row.student_id,
+                'student_name': row.student_name,
+                'from_group': {'id': row.from_group_id, 'name': row.from_group_name},
+                'to_group': {'id': row.to_group_id, 'name': row.to_group_name},
+                'group_changed': row.to_group_id != row.from_group_id,
+                'coach_id': row.to_coach_id,
+                'group_time_id': row.to_group_time_id
+            } for row in rows]
+        }
+
+    created = db.session.execute(text(INSERT_SQL), params).rowcount
+    db.session.commit()
+    return {
+        'dry_run': False,
+        'players_created': created,
+        'players_skipped': skipped
+    }
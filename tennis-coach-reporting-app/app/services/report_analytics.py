@@ -0,0 +1,148 @@
+from sqlalchemy import bindparam, text
+from app.extensions import db
+
+# Only categorical fields produce a meaningful distribution; free-text answers
+# would give one bucket per report.
+CATEGORICAL_FIELD_TYPES = ('PROGRESS', 'SELECT', 'RATING')
+
+# Report.content is {section name: {field name: answer}}, occasionally wrapped
+# in a top-level "content" key by older clients, or the compact
+# {"_v": version, "_f": {field id: answer}, "_x": {section: {field: answer}}}
+# form, whose field ids are turned back into names with the template_version
+# snapshot and whose "_x" answers are already keyed by name.
+#
+# Each answer takes its field type and display order from the report's
+# template as it is now, falling back to the snapshot it was written against
+# and then to the newest snapshot that has a field of that name, so answers
+# to fields renamed or removed since are still counted.
+SKILL_DISTRIBUTION_SQL = """
+    WITH period_report AS (
+        SELECT r.id, r.group_id, r.template_id, r.content
+        FROM report r
+        JOIN programme_players pp ON pp.id = r.programme_player_id
+        WHERE pp.tennis_club_id = :club_id
+          AND r.teaching_period_id = :period_id
+          AND (CAST(:group_id AS integer) IS NULL OR r.group_id = :group_id)
+    ),
+    answer AS (
+        SELECT r.group_id, r.template_id, s.key AS section_name, f.key AS field_name, f.value,
+               NULL AS field_type, CAST(NULL AS integer) AS section_order, CAST(NULL AS integer) AS field_order
+        FROM period_report r
+        CROSS JOIN LATERAL jsonb_each(COALESCE(r.content -> 'content', r.content)) AS s(key, value)
+        CROSS JOIN LATERAL jsonb_each_text(
+            CASE WHEN jsonb_typeof(s.value) = 'object' THEN s.value ELSE '{}'::jsonb END
+        ) AS f(key, value)
+        WHERE NOT r.content ? '_f'
+        UNION ALL
+        SELECT r.group_id, r.template_id, tv.fields -> f.key ->> 0, tv.fields -> f.key ->> 1, f.value,
+               tv.fields -> f.key ->> 2,
+               CAST(tv.fields -> f.key ->> 3 AS integer),
+               CAST(tv.fields -> f.key ->> 4 AS integer)
+        FROM period_report r
+        JOIN template_version tv ON tv.template_id = r.template_id
+                                AND tv.version = CAST(r.content ->> '_v' AS integer)
+        CROSS JOIN LATERAL jsonb_each_text(r.content -> '_f') AS f(key, value)
+        WHERE r.content ? '_f'
+        UNION ALL
+        SELECT r.group_id, r.template_id, s.key, f.key, f.value,
+               NULL, CAST(NULL AS integer), CAST(NULL AS integer)
+        FROM period_report r
+        CROSS JOIN LATERAL jsonb_each(r.content -> '_x') AS s(key, value)
+        CROSS JOIN LATERAL jsonb_each_text(
+            CASE WHEN jsonb_typeof(s.value) = 'object' THEN s.value ELSE '{}'::jsonb END
+        ) AS f(key, value)
+        WHERE r.content ? '_f' AND jsonb_typeof(r.content -> '_x') = 'object'
+    ),
+    snapshot_field AS (
+        SELECT DISTINCT ON (tv.template_id, f.value ->> 0, f.value ->> 1)
+               tv.template_id,
+               f.value ->> 0 AS section_name,
+               f.value ->> 1 AS field_name,
+               f.value ->> 2 AS field_type,
+               CAST(f.value ->> 3 AS integer) AS section_order,
+               CAST(f.value ->> 4 AS integer) AS field_order
+        FROM template_version tv
+        CROSS JOIN LATERAL jsonb_each(tv.fields) AS f(key, value)
+        WHERE tv.template_id IN (SELECT template_id FROM period_report)
+          AND f.value ->> 2 IS NOT NULL
+        ORDER BY tv.template_id, f.value ->> 0, f.value ->> 1, tv.version DESC
+    ),
+    typed_answer AS (
+        SELECT a.group_id,
+               a.section_name,
+               a.field_name,
+               a.value,
+               COALESCE(CAST(tf.field_type AS text), a.field_type, sf.field_type) AS field_type,
+               COALESCE(ts."order", a.section_order, sf.section_order) AS section_order,
+               COALESCE(tf."order", a.field_order, sf.field_order) AS field_order
+        FROM answer a
+        LEFT JOIN template_section ts ON ts.template_id = a.template_id AND ts.name = a.section_name
+        LEFT JOIN template_field tf ON tf.section_id = ts.id AND tf.name = a.field_name
+        LEFT JOIN snapshot_field sf ON sf.template_id = a.template_id
+                                   AND sf.section_name = a.section_name
+                                   AND sf.field_name = a.field_name
+    )
+    SELECT a.group_id,
+           g.name AS group_name,
+           a.section_order,
+           a.section_name,
+           a.field_order,
+           a.field_name,
+           a.value AS answer,
+           count(*) AS answer_count
+    FROM typed_answer a
+    JOIN tennis_group g ON g.id = a.group_id
+    WHERE a.field_type IN :field_types
+      AND a.value <> ''
+    GROUP BY a.group_id, g.name, a.section_order, a.section_name, a.field_order, a.field_name, a.value
+    ORDER BY g.name, a.section_order, a.field_order, a.value
+"""
+
+def skill_distribution(club_id, period_id, group_id=None):
+    """Count answers per group, section and field for a teaching period.
+
+    The aggregation runs entirely in Postgres; only one row per distinct
+    (group, field, answer) comes back, however many reports there are.
+    """
+    statement = text(SKILL_DISTRIBUTION_SQL).bindparams(
+        bindparam('field_types', expanding=True)
+    )
+    rows = db.session.execute(statement, {
+        'club_id': club_id,
+        'period_id': period_id,
+        'group_id': group_id,
+        'field_types': list(CATEGORICAL_FIELD_TYPES)
+    }).all()
+
+    groups = {}
+    for row in rows:
+        group = groups.setdefault(row.group_id, {
+            'id': row.group_id,
+            'name': row.group_name,
+            'sections': {}
+        })
+        section = group['sections'].setdefault(row.section_name, {
+            'name': row.section_name,
+            'order': row.section_order,
+            'distribution': {},
+            'fields': {}
+        })
+        field = section['fields'].setdefault(row.field_name, {
+            'name': row.field_name,
+            'order': row.field_order,
+            'distribution': {},
+            'total': 0
+        })
+        field['distribution'][row.answer] = row.answer_count
+        field['total'] += row.answer_count
+        section['distribution'][row.answer] = section['distribution'].get(row.answer, 0) + row.answer_count
+
+    return [{
+        'id': group['id'],
+        'name': group['name'],
+        'sections': [{
+            'name': section['name'],
+            'distribution': section['distribution'],
+            'fields': sorted(section['fields'].values(), key=lambda f: f['order'])
+        } for section in sorted(group['sections'].values(), key=lambda s: s['order'])]
+    } for group in groups.values()]
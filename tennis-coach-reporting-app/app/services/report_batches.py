@@ -0,0 +1,84 @@
+import os
+import shutil
+import tempfile
+import zipfile
+from flask import current_app
+from app.models import TeachingPeriod, TennisClub
+from app.services.job_queue import PermanentJobError
+
+
+def _generate_pdfs(period, club, output_dir, progress):
+    """Render every report of the period to PDF under output_dir"""
+    # Choose generator based on club name
+    if 'wilton' in club.name.lower():
+        from app.utils.wilton_report_generator import EnhancedWiltonReportGenerator
+
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        config_path = os.path.join(base_dir, 'utils', 'wilton_group_config.json')
+        generator = EnhancedWiltonReportGenerator(config_path)
+        return generator.batch_generate_reports(period.id, progress=progress, output_dir=output_dir)
+
+    from app.utils.report_generator import batch_generate_reports
+    return batch_generate_reports(period.id, output_dir=output_dir, progress=progress)
+
+
+def build_reports_zip(period_id, club_id, output_path, progress=None):
+    """Generate a period's report PDFs and zip them to output_path.
+
+    Raises PermanentJobError if nothing could be generated. Returns the
+    number of PDFs in the archive.
+    """
+    progress = progress or (lambda **kwargs: None)
+    period = TeachingPeriod.query.filter_by(id=period_id, tennis_club_id=club_id).first()
+    club = TennisClub.query.get(club_id)
+    if period is None or club is None:
+        raise PermanentJobError('Teaching period not found')
+
+    progress(phase='rendering', force=True)
+
+    def rendered(rendered, failed, total):
+        done = rendered + failed
+        progress(force=done == total, phase='rendering', rendered=rendered, failed=failed, done=done, total=total)
+
+    # Each run renders into a directory of its own, so concurrent runs for
+    # the same period cannot delete each other's PDFs
+    period_name = period.name.replace(' ', '_').lower()
+    reports_root = os.path.join(current_app.instance_path, 'reports')
+    os.makedirs(reports_root, exist_ok=True)
+    reports_dir = tempfile.mkdtemp(prefix=f'reports-{period_name}-', dir=reports_root)
+    try:
+        result = _generate_pdfs(period, club, reports_dir, rendered)
+
+        if result.get('success', 0) == 0:
+            current_app.logger.error(f"No reports generated. Details: {result.get('error_details', [])}")
+            raise PermanentJobError('No reports were generated', {
+                'error': 'No reports were generated',
+                'details': result.get('error_details', [])
+            })
+
+        pdfs = []
+        for root, dirs, files in os.walk(reports_dir):
+            for file in files:
+                if file.endswith('.pdf'):
+                    pdfs.append(os.path.join(root, file))
+        if not pdfs:
+            raise PermanentJobError('No PDF files were generated')
+
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with zipfile.ZipFile(output_path, 'w') as zf:
+            for count, file_path in enumerate(pdfs, start=1):
+                # Preserve directory structure relative to reports_dir
+                zf.write(file_path, os.path.relpath(file_path, reports_dir))
+                progress(phase='zipping', files_done=count, files_total=len(pdfs))
+    finally:
+        shutil.rmtree(reports_dir, ignore_errors=True)
+
+    return len(pdfs)
+
+
+def zip_download_name(period_id, club_id):
+    period = TeachingPeriod.query.get(period_id)
+    club = TennisClub.query.get(club_id)
+    formatted_club_name = club.name.lower().replace(' ', '_')
+    formatted_term = period.name.lower().replace(' ', '_')
+    return f"reports_{formatted_club_name}_{formatted_term}.zip"
@@ -0,0 +1,185 @@
+import csv
+import io
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+from app.extensions import db
+from app.models import (
+    ProgrammePlayers, Report, Student, TeachingPeriod, TennisGroup, User
+)
+from app.utils.report_content import expand
+from app.utils.template_cache import get_compiled_template
+
+EXPORT_FORMATS = ('ndjson', 'csv', 'parquet')
+
+# Rows fetched per round trip from the server-side cursor
+YIELD_PER = 1000
+
+# Fixed columns, in order, before one column per template field
+BASE_COLUMNS = [
+    'report_id', 'date', 'teaching_period', 'student_name', 'student_date_of_birth',
+    'contact_email', 'group', 'recommended_group', 'coach_name', 'coach_email',
+]
+
+
+def _field_column(section_name, field_name):
+    return f'{section_name}: {field_name}'
+
+
+def _expanded_content(club_id, period_id):
+    """Yield the name-keyed content of every report in a period"""
+    statement = (
+        select(Report.template_id, Report.content)
+        .join(ProgrammePlayers, ProgrammePlayers.id == Report.programme_player_id)
+        .where(Report.teaching_period_id == period_id, ProgrammePlayers.tennis_club_id == club_id)
+        .order_by(Report.id)
+        .execution_options(yield_per=YIELD_PER)
+    )
+    for template_id, content in db.session.execute(statement):
+        yield expand(content, template_id) or {}
+
+
+def export_columns(club_id, period_id):
+    """Column names for a period's export: the fixed columns, then every
+    field of every template used by the period's reports in template order,
+    then any other answered field in the order it first appears.
+
+    The last group comes from a pass over the reports' content, so answers
+    kept under "_x" or written against older field names get a column too.
+    """
+    template_ids = db.session.execute(
+        select(Report.template_id)
+        .join(ProgrammePlayers, ProgrammePlayers.id == Report.programme_player_id)
+        .where(Report.teaching_period_id == period_id, ProgrammePlayers.tennis_club_id == club_id)
+        .distinct()
+        .order_by(Report.template_id)
+    ).scalars().all()
+
+    columns = list(BASE_COLUMNS)
+    seen = set(columns)
+
+    def add(column):
+        if column not in seen:
+            seen.add(column)
+            columns.append(column)
+
+    for template_id in template_ids:
+        compiled = get_compiled_template(template_id)
+        if compiled is None:
+            continue
+        for section in compiled['sections']:
+            for field in section['fields']:
+                add(_field_column(section['name'], field['name']))
+
+    for content in _expanded_content(club_id, period_id):
+        for section_name, answers in content.items():
+            if isinstance(answers, dict):
+                for field_name in answers:
+                    add(_field_column(section_name, field_name))
+    return columns
+
+
+def iter_report_rows(club_id, period_id):
+    """Yield one flat dict per report in a period, in report id order.
+
+    Reads through a server-side cursor YIELD_PER rows at a time, selecting
+    plain columns rather than ORM objects, so memory use does not grow with
+    the number of reports.
+    """
+    recommended_group = aliased(TennisGroup)
+    statement = (
+        select(
+            Report.id, Report.date, Report.template_id, Report.content,
+            TeachingPeriod.name.label('period_name'),
+            Student.name.label('student_name'), Student.date_of_birth, Student.contact_email,
+            TennisGroup.name.label('group_name'),
+            recommended_group.name.label('recommended_group_name'),
+            User.name.label('coach_name'), User.email.label('coach_email'),
+        )
+        .join(ProgrammePlayers, ProgrammePlayers.id == Report.programme_player_id)
+        .join(TeachingPeriod, TeachingPeriod.id == Report.teaching_period_id)
+        .join(Student, Student.id == Report.student_id)
+        .join(TennisGroup, TennisGroup.id == Report.group_id)
+        .outerjoin(recommended_group, recommended_group.id == Report.recommended_group_id)
+        .join(User, User.id == Report.coach_id)
+        .where(Report.teaching_period_id == period_id, ProgrammePlayers.tennis_club_id == club_id)
+        .order_by(Report.id)
+        .execution_options(yield_per=YIELD_PER)
+    )
+
+    for row in db.session.execute(statement):
+        flat = {
+            'report_id': row.id,
+            'date': row.date.isoformat() if row.date else None,
+            'teaching_period': row.period_name,
+            'student_name': row.student_name,
+            'student_date_of_birth': row.date_of_birth.isoformat() if row.date_of_birth else None,
+            'contact_email': row.contact_email,
+            'group': row.group_name,
+            'recommended_group': row.recommended_group_name,
+            'coach_name': row.coach_name,
+            'coach_email': row.coach_email,
+        }
+        content = expand(row.content, row.template_id) or {}
+        for section_name, answers in content.items():
+            if isinstance(answers, dict):
+                for field_name, value in answers.items():
+                    flat[_field_column(section_name, field_name)] = value
+        yield flat
+
+
+def ndjson_chunks(rows, dumps):
+    """One JSON document per line; dumps is the app's JSON encoder"""
+    for row in rows:
+        yield dumps(row) + '\n'
+
+
+def csv_chunks(columns, rows, flush_every=500):
+    """CSV text in chunks of flush_every rows, header first"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore')
+    writer.writeheader()
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if count % flush_every == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def write_parquet(columns, rows, output, batch_size=5000):
+    """Write rows to a Parquet file in row groups of batch_size rows.
+
+    Needs pyarrow, which is an optional dependency: raises ImportError
+    without it. Answers are written as strings, since the same field can
+    hold numbers in one report and text in another.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema(
+        [('report_id', pa.int64())] + [(column, pa.string()) for column in columns[1:]]
+    )
+
+    def to_table(batch):
+        return pa.Table.from_pydict({
+            column: [
+                row.get(column) if column == 'report_id' or row.get(column) is None else str(row[column])
+                for row in batch
+            ]
+            for column in columns
+        }, schema=schema)
+
+    count = 0
+    with pq.ParquetWriter(output, schema, compression='zstd') as writer:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == batch_size:
+                writer.write_table(to_table(batch))
+                count += len(batch)
+                batch = []
+        if batch:
+            writer.write_table(to_table(batch))
+            count += len(batch)
+    return count
@@ -0,0 +1,230 @@
+import io
+import pandas as pd
+from sqlalchemy import text
+from app.extensions import db
+from app.services.roster_import import DAY_NAMES, MAX_REPORTED_ERRORS, _text, missing_columns, parse_dates
+
+# Rows are copied in already trimmed and normalised: emails lower-cased, days
+# upper-cased, times as HH:MM and dates of birth as ISO dates, with NULL where
+# a value is blank or could not be parsed. Everything else is resolved in SQL.
+STAGING_COLUMNS = [
+    'row_number', 'student_name', 'date_of_birth', 'dob_error', 'contact_email',
+    'coach_email', 'group_name', 'day_of_week', 'start_time', 'end_time'
+]
+
+CREATE_STAGING_SQL = """
+    CREATE TEMP TABLE roster_staging (
+        row_number integer PRIMARY KEY,
+        student_name text,
+        date_of_birth date,
+        dob_error text,
+        contact_email text,
+        coach_email text,
+        group_name text,
+        day_of_week text,
+        start_time time,
+        end_time time,
+        coach_id integer,
+        group_id integer,
+        group_time_id integer,
+        student_id integer,
+        error text
+    ) ON COMMIT DROP
+"""
+
+# Rows that would enrol a student in a slot twice: the same student and slot
+# repeated in the file, or a student already in that slot for the period
+DUPLICATE_SQL = [
+    """
+    UPDATE roster_staging AS s SET error = 'Duplicate of row ' || d.first_row
+    FROM (
+        SELECT row_number,
+               min(row_number) OVER (PARTITION BY student_name, group_time_id) AS first_row
+        FROM roster_staging
+        WHERE error IS NULL
+    ) d
+    WHERE s.row_number = d.row_number AND d.first_row <> d.row_number
+    """,
+    """
+    UPDATE roster_staging AS s
+    SET error = 'Student ' || s.student_name || ' is already in this group time slot for the teaching period'
+    FROM programme_players pp
+    WHERE s.error IS NULL
+      AND pp.tennis_club_id = :club_id
+      AND pp.teaching_period_id = :teaching_period_id
+      AND pp.student_id = s.student_id
+      AND pp.group_time_id = s.group_time_id
+    """
+]
+
+# Each statement touches the whole staging table at once. The error CASE
+# keeps the precedence and wording of validate_rows.
+RESOLVE_SQL = [
+    """
+    UPDATE roster_staging s SET coach_id = u.id
+    FROM "user" u
+    WHERE u.tennis_club_id = :club_id AND lower(u.email) = s.coach_email
+    """,
+    """
+    UPDATE roster_staging s SET group_id = g.id
+    FROM tennis_group g
+    WHERE g.tennis_club_id = :club_id AND lower(g.name) = lower(s.group_name)
+    """,
+    """
+    UPDATE roster_staging s SET group_time_id = t.id
+    FROM tennis_group_times t
+    WHERE t.tennis_club_id = :club_id
+      AND t.group_id = s.group_id
+      AND CAST(t.day_of_week AS text) = s.day_of_week
+      AND t.start_time = s.start_time
+      AND t.end_time = s.end_time
+    """,
+    """
+    UPDATE roster_staging s SET student_id = st.id
+    FROM (
+        SELECT DISTINCT ON (name) id, name
+        FROM student
+        WHERE tennis_club_id = :club_id
+        ORDER BY name, id
+    ) st
+    WHERE st.name = s.student_name
+    """,
+    """
+    UPDATE roster_staging SET error = CASE
+        WHEN coach_id IS NULL THEN 'Coach with email ' || coach_email || ' not found'
+        WHEN group_id IS NULL THEN 'Group ' || group_name || ' not found'
+        WHEN start_time IS NULL OR end_time IS NULL THEN 'Invalid time format. Use HH:MM'
+        WHEN day_of_week IS NULL THEN 'Invalid day of week'
+        WHEN group_time_id IS NULL THEN 'Group time slot not found'
+        WHEN student_name IS NULL THEN 'Student name is required'
+    END
+    """,
+    *DUPLICATE_SQL,
+    # Only the row that creates a new student needs a valid date of birth
+    """
+    UPDATE roster_staging s SET error = s.dob_error
+    FROM (
+        SELECT DISTINCT ON (student_name) row_number
+        FROM roster_staging
+        WHERE error IS NULL AND student_id IS NULL
+        ORDER BY student_name, row_number
+    ) f
+    WHERE s.row_number = f.row_number AND s.dob_error IS NOT NULL
+    """
+]
+
+REJECTS_SQL = """
+    SELECT 'Row ' || row_number || ': ' || error AS message, count(*) OVER () AS total
+    FROM roster_staging
+    WHERE error IS NOT NULL
+    ORDER BY row_number
+    LIMIT :limit
+"""
+
+INSERT_STUDENTS_SQL = """
+    WITH new_students AS (
+        INSERT INTO student (name, date_of_birth, contact_email, tennis_club_id)
+        SELECT DISTINCT ON (student_name) student_name, date_of_birth, contact_email, :club_id
+        FROM roster_staging
+        WHERE student_id IS NULL
+        ORDER BY student_name, row_number
+        RETURNING id, name
+    )
+    UPDATE roster_staging s SET student_id = n.id
+    FROM new_students n
+    WHERE s.student_id IS NULL AND s.student_name = n.name
+"""
+
+INSERT_PLAYERS_SQL = """
+    INSERT INTO programme_players
+        (student_id, coach_id, group_id, group_time_id, teaching_period_id, tennis_club_id, report_submitted)
+    SELECT student_id, coach_id, group_id, group_time_id, :teaching_period_id, :club_id, false
+    FROM roster_staging
+    ORDER BY row_number
+"""
+
+
+def _staging_frame(chunk, first_row_number):
+    """Normalise a roster chunk into the staging table's column layout"""
+    start = pd.to_datetime(_text(chunk['start_time']), format='%H:%M', errors='coerce')
+    end = pd.to_datetime(_text(chunk['end_time']), format='%H:%M', errors='coerce')
+    dates, date_errors = parse_dates(chunk['date_of_birth'])
+
+    return pd.DataFrame({
+        'row_number': range(first_row_number, first_row_number + len(chunk)),
+        'student_name': _text(chunk['student_name']).values,
+        'date_of_birth': pd.to_datetime(dates).dt.strftime('%Y-%m-%d').values,
+        'dob_error': date_errors.values,
+        'contact_email': chunk['contact_email'].values,
+        'coach_email': _text(chunk['coach_email']).str.lower().values,
+        'group_name': _text(chunk['group_name']).values,
+        'day_of_week': _text(chunk['day_of_week']).str.upper().map(DAY_NAMES).values,
+        'start_time': start.dt.strftime('%H:%M').values,
+        'end_time': end.dt.strftime('%H:%M').values
+    }, columns=STAGING_COLUMNS)
+
+
+def copy_import(chunks, club_id, teaching_period_id, progress=None):
+    """Import roster chunks through COPY into a temporary staging table.
+
+    Foreign keys, rejects and duplicates are resolved with a handful of
+    set-based statements, then students and programme players are written
+    with INSERT ... SELECT. Any reject rolls the whole import back.
+    Returns the same result shape as import_roster_file.
+    """
+    progress = progress or (lambda **kwargs: None)
+    params = {'club_id': club_id, 'teaching_period_id': teaching_period_id}
+
+    try:
+        connection = db.session.connection()
+        connection.execute(text(CREATE_STAGING_SQL))
+        cursor = connection.connection.cursor()
+
+        rows_total = 0
+        for chunk in chunks:
+            if rows_total == 0:
+                missing = missing_columns(chunk)
+                if missing:
+                    db.session.rollback()
+                    return {'error': f'Missing columns: {", ".join(missing)}'}
+
+            buffer = io.StringIO()
+            _staging_frame(chunk, rows_total + 2).to_csv(buffer, header=False, index=False)
+            buffer.seek(0)
+            cursor.copy_expert(
+                f"COPY roster_staging ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+            rows_total += len(chunk)
+            progress(phase='validating', rows_processed=rows_total)
+        cursor.close()
+
+        for statement in RESOLVE_SQL:
+            connection.execute(text(statement), params)
+
+        rejects = connection.execute(text(REJECTS_SQL), {'limit': MAX_REPORTED_ERRORS}).all()
+        if rejects:
+            errors = [row.message for row in rejects]
+            if rejects[0].total > len(errors):
+                errors.append(f'... and {rejects[0].total - len(errors)} more errors')
+            db.session.rollback()
+            return {'error': 'Upload failed', 'details': errors}
+
+        progress(phase='importing', rows_processed=0, rows_total=rows_total)
+        students_created = connection.execute(text(
+            "SELECT count(DISTINCT student_name) FROM roster_staging WHERE student_id IS NULL"
+        )).scalar()
+        connection.execute(text(INSERT_STUDENTS_SQL), params)
+        players_created = connection.execute(text(INSERT_PLAYERS_SQL), params).rowcount
+        progress(phase='importing', rows_processed=rows_total, rows_total=rows_total)
+
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return {
+        'message': 'Upload successful',
+        'students_created': students_created,
+        'players_created': players_created
+    }
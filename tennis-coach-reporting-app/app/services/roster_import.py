@@ -0,0 +1,363 @@
+import os
+import uuid
+from datetime import date
+from datetime import time as time_of_day
+import numpy as np
+import pandas as pd
+from flask import current_app
+from sqlalchemy import insert
+from app.extensions import db
+from app.models import User, TennisGroup, TennisGroupTimes, Student, ProgrammePlayers, DayOfWeek
+
+REQUIRED_COLUMNS = [
+    'student_name', 'date_of_birth', 'contact_email',
+    'coach_email', 'group_name', 'day_of_week',
+    'start_time', 'end_time'
+]
+
+DAY_NAMES = {day.name: day.name for day in DayOfWeek}
+
+SUPPORTED_EXTENSIONS = {'csv', 'xlsx'}
+
+# Enough for the user to see what is wrong without holding every message
+# for a badly formatted 50k-row file in memory
+MAX_REPORTED_ERRORS = 500
+
+
+class RosterLookups:
+    """Reference data a roster is validated against, loaded once per upload"""
+
+    def __init__(self, club_id):
+        self.club_id = club_id
+        self.coaches = {email.lower(): coach_id for coach_id, email in
+                        db.session.query(User.id, User.email).filter_by(tennis_club_id=club_id)}
+        self.groups = {name.lower(): group_id for group_id, name in
+                       db.session.query(TennisGroup.id, TennisGroup.name).filter_by(tennis_club_id=club_id)}
+        slots = db.session.query(
+            TennisGroupTimes.id,
+            TennisGroupTimes.group_id,
+            TennisGroupTimes.day_of_week,
+            TennisGroupTimes.start_time,
+            TennisGroupTimes.end_time
+        ).filter_by(tennis_club_id=club_id).all()
+        # Float ids so the frame merges cleanly against rows whose group
+        # lookup produced NaN
+        self.slots = pd.DataFrame(
+            [(s.id, s.group_id, s.day_of_week.name, s.start_time.strftime('%H:%M'), s.end_time.strftime('%H:%M'))
+             for s in slots],
+            columns=['group_time_id', 'group_id', 'day_key', 'start_key', 'end_key']
+        ).astype({'group_time_id': float, 'group_id': float}).drop_duplicates(
+            subset=['group_id', 'day_key', 'start_key', 'end_key']
+        )
+
+
+def missing_columns(df):
+    return [col for col in REQUIRED_COLUMNS if col not in df.columns]
+
+
+def _text(series):
+    # Blank cells arrive as NaN or None, which astype(str) would turn into 'nan'
+    return series.fillna('').astype(str).str.strip()
+
+
+def parse_dates(series):
+    """Vectorised parse_date: YYYY-MM-DD or DD-MMM-YYYY, returning dates and an error message per row"""
+    text = series.astype(str).str.strip()
+    parsed = pd.to_datetime(text, format='%Y-%m-%d', errors='coerce')
+    parsed = parsed.fillna(pd.to_datetime(text.str.title(), format='%d-%b-%Y', errors='coerce'))
+
+    errors = pd.Series(None, index=series.index, dtype=object)
+    empty = series.isna() | (text == '')
+    errors[empty] = 'Invalid date input: ' + text[empty]
+    bad_format = parsed.isna() & ~empty
+    errors[bad_format] = ("Invalid date format for '" + text[bad_format] +
+                          "'. Use either YYYY-MM-DD or DD-MMM-YYYY format (e.g., 2024-12-25 or 25-Dec-2024)")
+    return parsed.dt.date, errors
+
+
+def validate_rows(df, lookups, first_row_number=2):
+    """Validate a roster DataFrame column by column.
+
+    Returns the valid rows with resolved coach, group and time slot ids, and
+    a list of per-row error messages in the same wording and order as the
+    row-by-row upload used to produce.
+    """
+    df = df.copy()
+    df['row_number'] = np.arange(len(df)) + first_row_number
+
+    coach_email = _text(df['coach_email']).str.lower()
+    group_name = _text(df['group_name'])
+    df['student_name'] = _text(df['student_name'])
+    df['coach_id'] = coach_email.map(lookups.coaches)
+    df['group_id'] = group_name.str.lower().map(lookups.groups).astype(float)
+
+    start = pd.to_datetime(_text(df['start_time']), format='%H:%M', errors='coerce')
+    end = pd.to_datetime(_text(df['end_time']), format='%H:%M', errors='coerce')
+    df['start_key'] = start.dt.strftime('%H:%M')
+    df['end_key'] = end.dt.strftime('%H:%M')
+    df['day_key'] = _text(df['day_of_week']).str.upper().map(DAY_NAMES)
+
+    df = df.merge(lookups.slots, how='left', on=['group_id', 'day_key', 'start_key', 'end_key'])
+
+    row = 'Row ' + df['row_number'].astype(str) + ': '
+    conditions = [
+        df['coach_id'].isna(),
+        df['group_id'].isna(),
+        start.isna().values | end.isna().values,
+        df['day_key'].isna(),
+        df['group_time_id'].isna(),
+        df['student_name'] == ''
+    ]
+    messages = [
+        row + 'Coach with email ' + coach_email.values + ' not found',
+        row + 'Group ' + group_name.values + ' not found',
+        row + 'Invalid time format. Use HH:MM',
+        row + 'Invalid day of week',
+        row + 'Group time slot not found',
+        row + 'Student name is required'
+    ]
+    df['error'] = np.select(conditions, messages, default=None)
+
+    errors = df.loc[df['error'].notna(), 'error'].tolist()
+    valid = df[df['error'].isna()].copy()
+    valid['contact_email'] = valid['contact_email'].astype(object).where(valid['contact_email'].notna(), None)
+    for column in ('coach_id', 'group_id', 'group_time_id'):
+        valid[column] = valid[column].astype(int)
+    return valid, errors
+
+
+def new_students(valid, club_id):
+    """Split out students that do not exist yet, one per name, parsing their dates of birth.
+
+    Returns the new students to insert and any per-row date errors.
+    """
+    names = valid['student_name'].unique().tolist()
+    existing = {name for (name,) in db.session.query(Student.name).filter(
+        Student.tennis_club_id == club_id,
+        Student.name.in_(names)
+    )}
+
+    candidates = valid[~valid['student_name'].isin(existing)].drop_duplicates('student_name')
+    dates, date_errors = parse_dates(candidates['date_of_birth'])
+    candidates = candidates.assign(parsed_date_of_birth=dates)
+
+    failed = date_errors.notna()
+    errors = ('Row ' + candidates.loc[failed, 'row_number'].astype(str) + ': ' + date_errors[failed]).tolist()
+    return candidates[date_errors.isna()], errors
+
+
+def insert_rows(valid, students, club_id, teaching_period_id):
+    """Bulk insert new students and a programme player per valid row.
+
+    Returns (students_created, players_created).
+    """
+    student_ids = {}
+    if len(students):
+        result = db.session.execute(
+            insert(Student).returning(Student.id, Student.name),
+            [{
+                'name': s.student_name,
+                'date_of_birth': s.parsed_date_of_birth,
+                'contact_email': s.contact_email,
+                'tennis_club_id': club_id
+            } for s in students.itertuples(index=False)]
+        )
+        student_ids.update({name: student_id for student_id, name in result})
+
+    missing = set(valid['student_name']) - set(student_ids)
+    if missing:
+        student_ids.update({name: student_id for student_id, name in
+                            db.session.query(Student.id, Student.name).filter(
+                                Student.tennis_club_id == club_id,
+                                Student.name.in_(missing)
+                            )})
+
+    # int() because psycopg2 cannot adapt numpy integers
+    players = [{
+        'student_id': student_ids[r.student_name],
+        'coach_id': int(r.coach_id),
+        'group_id': int(r.group_id),
+        'group_time_id': int(r.group_time_id),
+        'teaching_period_id': teaching_period_id,
+        'tennis_club_id': club_id
+    } for r in valid.itertuples(index=False)]
+    if players:
+        db.session.execute(insert(ProgrammePlayers), players)
+
+    return len(students), len(players)
+
+
+def file_extension(filename):
+    return filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+
+
+def _cell_text(value):
+    """Render an Excel cell the way the same value would appear in a CSV export"""
+    if value is None:
+        return None
+    if isinstance(value, date):
+        return value.strftime('%Y-%m-%d')
+    if isinstance(value, time_of_day):
+        return value.strftime('%H:%M')
+    return str(value).strip()
+
+
+def _read_csv_chunks(path, chunk_size):
+    reader = pd.read_csv(path, encoding='utf-8', dtype=str, chunksize=chunk_size)
+    for chunk in reader:
+        yield chunk.apply(lambda x: x.str.strip())
+
+
+def _read_xlsx_chunks(path, chunk_size):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [_cell_text(cell) or '' for cell in header]
+
+        batch = []
+        for row in rows:
+            if all(cell is None for cell in row):
+                continue
+            batch.append([_cell_text(cell) for cell in row])
+            if len(batch) >= chunk_size:
+                yield pd.DataFrame(batch, columns=columns)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=columns)
+    finally:
+        workbook.close()
+
+
+def iter_roster_chunks(path, chunk_size=2000):
+    """Yield the roster as DataFrames of at most chunk_size rows, never loading the whole file"""
+    if file_extension(path) == 'xlsx':
+        return _read_xlsx_chunks(path, chunk_size)
+    return _read_csv_chunks(path, chunk_size)
+
+
+def import_roster_file(path, club_id, teaching_period_id, chunk_size=2000, progress=None, mode=None):
+    """Import a roster file of any size in two streaming passes.
+
+    The first pass validates every chunk without writing anything, so a file
+    with errors leaves the database untouched, as the single-request upload
+    does. The second pass inserts chunk by chunk and commits once at the end.
+    With mode='copy' the rows go through the COPY staging path instead.
+
+    Returns a result dict with either the created counts or the row errors.
+    """
+    if mode == 'copy':
+        from app.services.roster_copy import copy_import
+        return copy_import(iter_roster_chunks(path, chunk_size), club_id, teaching_period_id, progress)
+
+    progress = progress or (lambda **kwargs: None)
+    lookups = RosterLookups(club_id)
+
+    errors = []
+    error_count = 0
+    rows_total = 0
+    seen_names = set()
+    first_row_number = 2
+
+    for chunk in iter_roster_chunks(path, chunk_size):
+        if rows_total == 0:
+            missing = missing_columns(chunk)
+            if missing:
+                return {'error': f'Missing columns: {", ".join(missing)}'}
+
+        valid, chunk_errors = validate_rows(chunk, lookups, first_row_number)
+        # Only the first row for a new student is checked for a date of birth,
+        # including when that row was in an earlier chunk
+        students, date_errors = new_students(valid[~valid['student_name'].isin(seen_names)], club_id)
+        seen_names.update(valid['student_name'])
+
+        chunk_errors.extend(date_errors)
+        error_count += len(chunk_errors)
+        errors.extend(chunk_errors[:max(MAX_REPORTED_ERRORS - len(errors), 0)])
+
+        rows_total += len(chunk)
+        first_row_number += len(chunk)
+        progress(phase='validating', rows_processed=rows_total)
+
+    if error_count:
+        if error_count > len(errors):
+            errors.append(f'... and {error_count - len(errors)} more errors')
+        return {'error': 'Upload failed', 'details': errors}
+
+    students_created = 0
+    players_created = 0
+    rows_done = 0
+    first_row_number = 2
+    try:
+        for chunk in iter_roster_chunks(path, chunk_size):
+            valid, _ = validate_rows(chunk, lookups, first_row_number)
+            students, _ = new_students(valid, club_id)
+            created, players = insert_rows(valid, students, club_id, teaching_period_id)
+            students_created += created
+            players_created += players
+
+            rows_done += len(chunk)
+            first_row_number += len(chunk)
+            progress(phase='importing', rows_processed=rows_done, rows_total=rows_total)
+
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return {
+        'message': 'Upload successful',
+        'students_created': students_created,
+        'players_created': players_created
+    }
+
+
+def start_import_job(file, club_id, teaching_period_id, user_id, mode=None):
+    """Spool an uploaded roster to disk and queue it for a worker to import.
+
+    Returns the job id to poll with get_import_job. The spool directory is
+    under the instance path, which the worker must share with the app.
+    """
+    from app.services.job_queue import enqueue
+
+    spool_dir = os.path.join(current_app.instance_path, 'imports')
+    os.makedirs(spool_dir, exist_ok=True)
+    path = os.path.join(spool_dir, f'{uuid.uuid4().hex}.{file_extension(file.filename)}')
+    file.save(path)
+
+    job = enqueue('roster_import', {
+        'path': path,
+        'club_id': club_id,
+        'teaching_period_id': teaching_period_id,
+        'mode': mode
+    }, club_id=club_id, user_id=user_id, priority=10)
+    db.session.commit()
+    return job.id
+
+
+def get_import_job(job_id):
+    """A roster_import job in the shape the import screen polls for"""
+    from app.models import BackgroundJob
+
+    job = db.session.get(BackgroundJob, job_id)
+    if job is None or job.kind != 'roster_import':
+        return None
+
+    progress = job.progress or {}
+    result = job.result
+    if job.status == 'failed' and result is None:
+        result = {'error': job.error}
+    return {
+        'id': job.id,
+        'club_id': job.tennis_club_id,
+        'user_id': job.created_by_id,
+        'status': 'completed' if job.status == 'succeeded' else job.status,
+        'phase': progress.get('phase'),
+        'rows_processed': progress.get('rows_processed', 0),
+        'rows_total': progress.get('rows_total'),
+        'result': result
+    }
@@ -0,0 +1,228 @@
+import math
+import threading
+import time
+import zlib
+from functools import wraps
+from flask import current_app, jsonify, make_response
+from flask_login import current_user
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+# Endpoint class -> (requests in flight per club, requests in flight in total)
+# across every process, unless overridden by ADMISSION_LIMITS
+DEFAULT_LIMITS = {
+    'pdf': (4, 8),       # PDFs rendered inside the request
+    'export': (2, 4),    # full-period report exports
+    'upload': (2, 4),    # roster uploads parsed or spooled inside the request
+    'download': (4, 8),  # generated zips sent from disk
+    'stream': (8, 32),   # open progress streams, which each hold a worker thread
+}
+
+
+def _lock_key(endpoint_class, club_id):
+    """Stable signed 32-bit key for a (class, club) pair; club_id None is the class total"""
+    value = zlib.crc32(f'admission:{endpoint_class}:{club_id}'.encode('utf-8'))
+    return value - 2 ** 32 if value >= 2 ** 31 else value
+
+
+class LocalSlots:
+    """Slot counts held in this process only, for databases without advisory locks"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+
+    def try_take(self, claims):
+        """Take one slot under each (key, limit) claim, all or none.
+
+        Returns a release function, or None if any key is at its limit.
+        """
+        keys = [key for key, _ in claims]
+        with self._lock:
+            if any(self._in_flight.get(key, 0) >= limit for key, limit in claims):
+                return None
+            for key in keys:
+                self._in_flight[key] = self._in_flight.get(key, 0) + 1
+
+        def release():
+            with self._lock:
+                for key in keys:
+                    self._in_flight[key] -= 1
+                    if not self._in_flight[key]:
+                        del self._in_flight[key]
+        return release
+
+
+class AdvisoryLockSlots:
+    """Slots shared by every process, as Postgres session advisory locks.
+
+    A key with a limit of n has n slots, (lock key, 0) to (lock key, n - 1);
+    taking one is a pg_try_advisory_lock on the first free slot. The locks
+    are held on a connection of a small pool of their own until release, and
+    Postgres drops them if the process dies, so a crash never leaks a slot.
+    """
+
+    def __init__(self, engine):
+        self._engine = engine
+
+    def try_take(self, claims):
+        try:
+            connection = self._engine.connect()
+        except PoolTimeoutError:
+            # Every admission connection is holding a slot: as busy as it gets
+            return None
+
+        taken = []
+        try:
+            for key, limit in claims:
+                lock_key = _lock_key(*key)
+                for slot in range(limit):
+                    if connection.execute(
+                        text('SELECT pg_try_advisory_lock(:key, :slot)'), {'key': lock_key, 'slot': slot}
+                    ).scalar():
+                        taken.append((lock_key, slot))
+                        break
+                else:
+                    self._unlock(connection, taken)
+                    return None
+            # Session locks outlive the transaction; do not sit idle in one
+            connection.commit()
+        except Exception:
+            connection.invalidate()
+            connection.close()
+            raise
+
+        def release():
+            self._unlock(connection, taken)
+        return release
+
+    @staticmethod
+    def _unlock(connection, taken):
+        try:
+            for lock_key, slot in taken:
+                connection.execute(
+                    text('SELECT pg_advisory_unlock(:key, :slot)'), {'key': lock_key, 'slot': slot}
+                )
+            connection.commit()
+        except Exception:
+            # Dropping the database session releases whatever it still holds
+            connection.invalidate()
+        finally:
+            connection.close()
+
+
+class AdmissionLimiter:
+    """Non-blocking counting semaphores per endpoint class, per club and in total.
+
+    A request that would take a class over either limit is turned away
+    rather than queued, so heavy requests can never occupy every worker
+    thread and stall the light ones. Whether the counts are shared between
+    processes depends on the slots backend.
+    """
+
+    def __init__(self, limits, slots):
+        self._limits = limits
+        self._slots = slots
+        self._lock = threading.Lock()
+        # Moving average of how long each class holds its slot, for Retry-After
+        self._avg_seconds = {}
+
+    def try_acquire(self, endpoint_class, club_id):
+        """Take a slot, returning a release function, or None if the class is full"""
+        per_club, total = self._limits[endpoint_class]
+        release_slots = self._slots.try_take([
+            ((endpoint_class, club_id), per_club),
+            ((endpoint_class, None), total),
+        ])
+        if release_slots is None:
+            return None
+
+        started = time.monotonic()
+        released = []
+
+        def release():
+            # Flask may call close more than once
+            if released:
+                return
+            released.append(True)
+            release_slots()
+            elapsed = time.monotonic() - started
+            with self._lock:
+                previous = self._avg_seconds.get(endpoint_class)
+                self._avg_seconds[endpoint_class] = (
+                    elapsed if previous is None else 0.8 * previous + 0.2 * elapsed
+                )
+
+        return release
+
+    def retry_after(self, endpoint_class, maximum):
+        """Seconds a turned-away client should wait: about one typical request"""
+        with self._lock:
+            seconds = self._avg_seconds.get(endpoint_class, 1)
+        return min(max(math.ceil(seconds), 1), maximum)
+
+
+def admission_controlled(endpoint_class):
+    """Limit how many requests of endpoint_class run at once, answering 429 when full.
+
+    The slot is held until the response has been sent, including streamed
+    responses. Must be applied below login_required so the club is known.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            limiter = current_app.extensions.get('admission')
+            if limiter is None:
+                return f(*args, **kwargs)
+
+            club_id = getattr(current_user, 'tennis_club_id', None)
+            release = limiter.try_acquire(endpoint_class, club_id)
+            if release is None:
+                retry_after = limiter.retry_after(
+                    endpoint_class, current_app.config.get('ADMISSION_MAX_RETRY_AFTER', 30)
+                )
+                current_app.logger.warning(
+                    f"Admission control: turned away {endpoint_class} request from club {club_id}"
+                )
+                response = jsonify({
+                    'error': 'The server is busy with similar requests, please try again shortly',
+                    'retry_after': retry_after
+                })
+                response.status_code = 429
+                response.headers['Retry-After'] = str(retry_after)
+                return response
+
+            try:
+                response = make_response(f(*args, **kwargs))
+            except Exception:
+                release()
+                raise
+            response.call_on_close(release)
+            return response
+        return decorated_function
+    return decorator
+
+
+def init_admission_control(app):
+    if not app.config.get('ADMISSION_CONTROL_ENABLED', True):
+        return
+    limits = dict(DEFAULT_LIMITS)
+    limits.update(app.config.get('ADMISSION_LIMITS') or {})
+
+    database_url = app.config['SQLALCHEMY_DATABASE_URI']
+    if database_url.startswith('postgresql'):
+        # A pool of its own, so held slots never starve ordinary queries; at
+        # most one connection per slot in total can be in use
+        engine = create_engine(
+            database_url,
+            pool_size=app.config.get('ADMISSION_POOL_SIZE', 2),
+            max_overflow=sum(total for _, total in limits.values()),
+            pool_timeout=1,
+            pool_pre_ping=True,
+            pool_recycle=app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}).get('pool_recycle', 1800)
+        )
+        slots = AdvisoryLockSlots(engine)
+    else:
+        app.logger.warning('Admission control limits are per process without Postgres advisory locks')
+        slots = LocalSlots()
+    app.extensions['admission'] = AdmissionLimiter(limits, slots)
@@ -2,6 +2,7 @@ from functools import wraps
 from flask import abort, current_app, request
 from flask_login import current_user
 from app.models import UserRole
+from app.utils.identity_cache import get_club_id_for_subdomain
 
 def admin_required(f):
     @wraps(f)
@@ -39,7 +40,7 @@ def club_access_required(f):
             
         # Production subdomain check
         subdomain = get_tennis_club_from_request()
-        if not subdomain or current_user.tennis_club.subdomain != subdomain:
+        if not subdomain or current_user.tennis_club_id != get_club_id_for_subdomain(subdomain):
             abort(403)
             
         return f(*args, **kwargs)
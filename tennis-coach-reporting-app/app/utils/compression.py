@@ -0,0 +1,114 @@
+import gzip
+import mimetypes
+import os
+import re
+from flask import current_app, request, send_from_directory
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip alone still works
+    brotli = None
+
+# Vite writes every bundled file to dist/assets/ under the static folder, named
+# like dashboard-3f9a1c2b.js (see client/vite.config.ts). Files copied from
+# client/public/ land in dist/ itself and keep their names.
+VITE_ASSETS_DIR = os.path.join('dist', 'assets')
+VITE_HASHED_FILENAME_RE = re.compile(r'-[A-Za-z0-9_-]{8}\.[a-z0-9]+$')
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Sibling extension per Content-Encoding, in order of preference
+PRECOMPRESSED = [('br', '.br'), ('gzip', '.gz')]
+
+
+def _accepts(encoding):
+    return request.accept_encodings[encoding] > 0
+
+
+def _vary_on_encoding(response):
+    response.vary.add('Accept-Encoding')
+
+
+def _weaken_etag(response):
+    """A compressed body is a different representation, so a strong validator must not be reused"""
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+
+def _has_sibling(directory, path, suffix):
+    candidate = safe_join(directory, path + suffix)
+    return candidate is not None and os.path.isfile(candidate)
+
+
+def _is_vite_asset(directory, path):
+    """Whether path is a content-hashed file from the Vite build"""
+    full_path = safe_join(directory, path)
+    if full_path is None or not VITE_HASHED_FILENAME_RE.search(path):
+        return False
+    assets_dir = os.path.join(os.path.abspath(current_app.static_folder), VITE_ASSETS_DIR)
+    return os.path.dirname(os.path.abspath(full_path)) == assets_dir
+
+
+def send_static_asset(directory, path):
+    """Serve a built asset, preferring a precompressed .br/.gz sibling the client accepts.
+
+    Vite's hashed output never changes content, so it is cached for a year;
+    everything else is revalidated on each use.
+    """
+    mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+    response = None
+    for encoding, suffix in PRECOMPRESSED:
+        if _accepts(encoding) and _has_sibling(directory, path, suffix):
+            response = send_from_directory(directory, path + suffix, mimetype=mimetype)
+            response.headers['Content-Encoding'] = encoding
+            break
+
+    if response is None:
+        response = send_from_directory(directory, path, mimetype=mimetype)
+
+    if any(_has_sibling(directory, path, suffix) for _, suffix in PRECOMPRESSED):
+        _vary_on_encoding(response)
+
+    if _is_vite_asset(directory, path):
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    else:
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def init_compression(app):
+    """Negotiate gzip/brotli for JSON responses and serve precompressed static files"""
+    min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+    gzip_level = app.config.get('COMPRESS_GZIP_LEVEL', 6)
+    brotli_quality = app.config.get('COMPRESS_BROTLI_QUALITY', 4)
+
+    app.view_functions['static'] = lambda filename: send_static_asset(app.static_folder, filename)
+
+    @app.after_request
+    def compress_json(response):
+        if (response.mimetype != 'application/json'
+                or response.status_code != 200
+                or response.direct_passthrough
+                or response.is_streamed
+                or 'Content-Encoding' in response.headers):
+            return response
+
+        _vary_on_encoding(response)
+        body = response.get_data()
+        if len(body) < min_size:
+            return response
+
+        if brotli is not None and _accepts('br'):
+            response.set_data(brotli.compress(body, quality=brotli_quality))
+            response.headers['Content-Encoding'] = 'br'
+        elif _accepts('gzip'):
+            response.set_data(gzip.compress(body, compresslevel=gzip_level))
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            return response
+
+        _weaken_etag(response)
+        return response
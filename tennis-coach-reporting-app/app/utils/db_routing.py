@@ -0,0 +1,75 @@
+import time
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+
+REPLICA_BIND = 'replica'
+PIN_SESSION_KEY = 'db_primary_until'
+
+
+def _is_write(clause):
+    """DML and SELECT ... FOR UPDATE must always run on the primary"""
+    if clause is None:
+        return False
+    return getattr(clause, 'is_dml', False) or getattr(clause, '_for_update_arg', None) is not None
+
+
+def _replica_allowed():
+    return has_request_context() and g.get('db_use_replica', False) and not g.get('db_wrote', False)
+
+
+class RoutingSession(Session):
+    """Session that sends reads in read-only requests to the replica bind.
+
+    Flushes and DML always go to the primary, and once a request has written
+    anything its remaining reads stay on the primary too. A GET handler that
+    writes must be marked use_primary: the reads it bases the write on would
+    otherwise come from the replica. Without a replica bind configured this
+    behaves exactly like the default session.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or _is_write(clause):
+                if has_request_context():
+                    if g.get('db_read_replica') and not g.get('db_wrote'):
+                        current_app.logger.warning(
+                            f"{request.method} {request.endpoint} wrote after reading from the replica; "
+                            f"mark the view use_primary"
+                        )
+                    g.db_wrote = True
+            elif _replica_allowed():
+                replica = self._db.engines.get(REPLICA_BIND)
+                if replica is not None:
+                    g.db_read_replica = True
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def use_primary(f):
+    """Keep a GET handler on the primary, e.g. because it writes or must see the latest data"""
+    f._db_use_primary = True
+    return f
+
+
+def init_db_routing(app):
+    """Decide per request whether reads may use the replica, and pin recent writers to the primary."""
+    if REPLICA_BIND not in app.config.get('SQLALCHEMY_BINDS', {}):
+        return
+
+    pin_seconds = app.config.get('DB_PRIMARY_PIN_SECONDS', 5)
+
+    @app.before_request
+    def route_reads():
+        view = app.view_functions.get(request.endpoint)
+        g.db_use_replica = (
+            request.method in ('GET', 'HEAD')
+            and not getattr(view, '_db_use_primary', False)
+            and session.get(PIN_SESSION_KEY, 0) < time.time()
+        )
+
+    @app.after_request
+    def pin_writer_to_primary(response):
+        # Read-your-writes: the replica may lag behind what this user just saved
+        if g.get('db_wrote'):
+            session[PIN_SESSION_KEY] = time.time() + pin_seconds
+        return response
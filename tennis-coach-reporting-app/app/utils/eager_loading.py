@@ -0,0 +1,27 @@
+from sqlalchemy.orm import configure_mappers, joinedload, selectinload
+from app.models import Report, ProgrammePlayers
+
+
+def report_batch_options():
+    """Loader options for rendering or emailing many reports at once.
+
+    Everything the PDF generators and EmailService touch on a report is loaded
+    up front, so a batch of N reports costs a fixed number of queries instead
+    of 8-10 lazy loads per report. Many-to-one relationships without eager
+    collections are joined into the main query; TennisGroup (which joins its
+    group_times) uses selectinload to avoid multiplying rows. Only the template
+    row is loaded here - its sections and fields come from the compiled
+    template cache.
+    """
+    # recommended_group is a backref, only present once mappers are configured
+    configure_mappers()
+    return (
+        joinedload(Report.student),
+        joinedload(Report.coach),
+        joinedload(Report.teaching_period),
+        joinedload(Report.programme_player).joinedload(ProgrammePlayers.tennis_club),
+        joinedload(Report.programme_player).joinedload(ProgrammePlayers.group_time),
+        selectinload(Report.tennis_group),
+        selectinload(Report.recommended_group),
+        selectinload(Report.template),
+    )
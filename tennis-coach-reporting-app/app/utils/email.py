@@ -1,10 +1,11 @@
 # In app/utils/email.py
 
-import boto3
 from botocore.exceptions import ClientError
 from flask import current_app, url_for
 
 def get_ses_client():
+    import boto3
+
     return boto3.client('ses',
         region_name=current_app.config['AWS_SES_REGION'],
         aws_access_key_id=current_app.config['AWS_SES_ACCESS_KEY'],
@@ -0,0 +1,104 @@
+import hashlib
+from functools import wraps
+from flask import make_response, request
+from flask_login import current_user
+from sqlalchemy import event, inspect
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.extensions import db
+from app.models import (
+    ResourceVersion, TennisClub, TennisGroup, TennisGroupTimes, User, TeachingPeriod,
+    ReportTemplate, TemplateSection, TemplateField, GroupTemplate
+)
+
+ALL_CLUBS = 0
+
+# Which cached resources a write to each model invalidates. Template payloads
+# include their assigned groups' names, so groups feed into templates too.
+# 'identity' versions the logged-in user cache (app/utils/identity_cache.py).
+RESOURCES_BY_MODEL = {
+    TennisGroup: ('groups', 'templates'),
+    TennisGroupTimes: ('groups',),
+    User: ('coaches', 'identity'),
+    TennisClub: ('identity',),
+    TeachingPeriod: ('teaching_periods',),
+    ReportTemplate: ('templates',),
+    TemplateSection: ('templates',),
+    TemplateField: ('templates',),
+    GroupTemplate: ('templates', 'groups'),
+}
+
+
+def bump_resource_versions(connection, keys):
+    """Increment the (club_id, resource) counters inside the current transaction"""
+    if not keys:
+        return
+    # Sorted so concurrent writers take the row locks in the same order
+    rows = [{'club_id': club_id, 'resource': resource, 'version': 1} for club_id, resource in sorted(keys)]
+    statement = insert(ResourceVersion.__table__).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=['club_id', 'resource'],
+        set_={'version': ResourceVersion.__table__.c.version + 1}
+    )
+    connection.execute(statement)
+
+
+@event.listens_for(Session, 'after_flush')
+def _bump_on_flush(session, flush_context):
+    keys = set()
+    changed = [i for i in session.dirty if session.is_modified(i, include_collections=False)]
+    for instance in (*session.new, *changed, *session.deleted):
+        resources = RESOURCES_BY_MODEL.get(type(instance))
+        if not resources:
+            continue
+        # Sections, fields, group assignments and clubs themselves carry no
+        # club id of their own
+        club_ids = {getattr(instance, 'tennis_club_id', None) or ALL_CLUBS}
+        # Moving a row to another club changes what the old club sees too
+        if hasattr(instance, 'tennis_club_id'):
+            club_ids.update(inspect(instance).attrs.tennis_club_id.history.deleted)
+        keys.update((club_id or ALL_CLUBS, resource) for club_id in club_ids for resource in resources)
+    bump_resource_versions(session.connection(), keys)
+
+
+def resource_etag(club_id, resources):
+    """Strong ETag for the current URL, derived from the club's resource versions"""
+    rows = db.session.query(
+        ResourceVersion.club_id, ResourceVersion.resource, ResourceVersion.version
+    ).filter(
+        ResourceVersion.resource.in_(resources),
+        ResourceVersion.club_id.in_([club_id, ALL_CLUBS])
+    ).all()
+    versions = sorted(f'{row.club_id}:{row.resource}:{row.version}' for row in rows)
+
+    key = '|'.join([str(club_id), str(current_user.id), request.full_path, *versions])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def conditional_get(*resources):
+    """Answer GETs with 304 when the client's If-None-Match is still current.
+
+    Only the version counters are read to decide, so an unchanged resource
+    never runs the view's own queries. Must be applied below the login and
+    club access decorators.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if request.method != 'GET':
+                return f(*args, **kwargs)
+
+            etag = resource_etag(current_user.tennis_club_id, resources)
+            # Weak comparison: compression marks the ETag of a gzipped body weak
+            if request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            # Cache privately but revalidate on every use
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return decorated_function
+    return decorator
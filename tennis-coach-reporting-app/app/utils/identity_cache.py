@@ -0,0 +1,192 @@
+import threading
+from cachetools import TTLCache
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from app.extensions import db
+from app.models import ResourceVersion, User, TennisClub
+from app.utils.etags import ALL_CLUBS, bump_resource_versions
+
+# Column snapshots rather than ORM instances: a cached instance would be
+# expired by the next commit in whichever request loaded it. Snapshots are
+# rebuilt as clean, detached instances and merged into the current session
+# without touching the database.
+_users = TTLCache(maxsize=2048, ttl=60)        # user_id -> (user columns, club columns, identity version)
+_versions = TTLCache(maxsize=256, ttl=5)       # club_id -> identity version
+_club_ids = TTLCache(maxsize=256, ttl=5)       # subdomain -> club_id
+_default_subdomain = TTLCache(maxsize=1, ttl=5)
+_lock = threading.Lock()
+
+# resource_version counter bumped by every change to a user (per club) or a
+# club (under ALL_CLUBS), see RESOURCES_BY_MODEL in app/utils/etags.py
+IDENTITY_RESOURCE = 'identity'
+
+_USER_COLUMNS = [attr.key for attr in User.__mapper__.column_attrs]
+_CLUB_COLUMNS = [attr.key for attr in TennisClub.__mapper__.column_attrs]
+
+
+def init_identity_cache(app):
+    """Size the caches from config.
+
+    Cached users are checked against their club's identity version, which is
+    itself cached for IDENTITY_VERSION_TTL seconds: a hit within that window
+    costs no query, and a role or club change made by another process is seen
+    once it runs out. The subdomain lookups are only held for
+    IDENTITY_SUBDOMAIN_CACHE_TTL seconds.
+    """
+    global _users, _versions, _club_ids, _default_subdomain
+    ttl = app.config.get('IDENTITY_CACHE_TTL', 60)
+    version_ttl = app.config.get('IDENTITY_VERSION_TTL', 5)
+    subdomain_ttl = app.config.get('IDENTITY_SUBDOMAIN_CACHE_TTL', 5)
+    with _lock:
+        _users = TTLCache(maxsize=2048, ttl=ttl)
+        _versions = TTLCache(maxsize=256, ttl=version_ttl)
+        _club_ids = TTLCache(maxsize=256, ttl=subdomain_ttl)
+        _default_subdomain = TTLCache(maxsize=1, ttl=subdomain_ttl)
+
+
+def identity_version(club_id):
+    """A number that grows whenever a user of the club, or any club, changes.
+
+    Read from the primary: a replica lagging behind a demotion must not let
+    the old role through.
+    """
+    return db.session.execute(
+        select(func.coalesce(func.sum(ResourceVersion.version), 0)).where(
+            ResourceVersion.resource == IDENTITY_RESOURCE,
+            ResourceVersion.club_id.in_([club_id, ALL_CLUBS])
+        ),
+        bind_arguments={'bind': db.engine}
+    ).scalar()
+
+
+def _cached_identity_version(club_id):
+    with _lock:
+        if club_id in _versions:
+            return _versions[club_id]
+    version = identity_version(club_id)
+    with _lock:
+        _versions[club_id] = version
+    return version
+
+
+def _snapshot(instance, columns):
+    return {key: getattr(instance, key) for key in columns}
+
+
+def _attach(model, values):
+    """Turn a column snapshot into a persistent instance in the current session without a query"""
+    instance = model(**values)
+    make_transient_to_detached(instance)
+    return db.session.merge(instance, load=False)
+
+
+def load_user(user_id):
+    """Flask-Login user loader backed by the identity cache.
+
+    A hit costs no query unless the club's cached identity version has run
+    out, and then one primary-key read. The user's club is merged into the
+    session too and set on the user, so current_user.tennis_club needs no
+    query either.
+    """
+    with _lock:
+        cached = _users.get(user_id)
+
+    if cached is not None:
+        user_values, club_values, version = cached
+        if _cached_identity_version(user_values['tennis_club_id']) != version:
+            cached = None
+
+    if cached is None:
+        # Everything from the primary, and the version before the snapshot,
+        # so a change committed in between makes the entry stale, not hidden
+        primary = {'bind': db.engine}
+        club_id = db.session.execute(
+            select(User.tennis_club_id).where(User.id == user_id), bind_arguments=primary
+        ).scalar()
+        if club_id is None:
+            return None
+        version = identity_version(club_id)
+        with _lock:
+            _versions[club_id] = version
+        user = db.session.get(User, user_id, bind_arguments=primary)
+        if user is None:
+            return None
+        club = db.session.get(TennisClub, user.tennis_club_id, bind_arguments=primary)
+        if user.tennis_club_id == club_id:
+            with _lock:
+                _users[user_id] = (
+                    _snapshot(user, _USER_COLUMNS), _snapshot(club, _CLUB_COLUMNS) if club else None, version
+                )
+        return user
+
+    user = _attach(User, user_values)
+    if club_values:
+        # The session only holds weak references, so the club is set on the
+        # user as loaded state rather than left for the identity map to find
+        set_committed_value(user, 'tennis_club', _attach(TennisClub, club_values))
+    return user
+
+
+def get_club_id_for_subdomain(subdomain):
+    """Resolve a subdomain to its club id, or None if no club uses it"""
+    with _lock:
+        if subdomain in _club_ids:
+            return _club_ids[subdomain]
+
+    club_id = db.session.query(TennisClub.id).filter_by(subdomain=subdomain).scalar()
+    with _lock:
+        _club_ids[subdomain] = club_id
+    return club_id
+
+
+def get_default_club_subdomain():
+    """Subdomain used for local development, where there is no subdomain in the host"""
+    with _lock:
+        if 'default' in _default_subdomain:
+            return _default_subdomain['default']
+
+    subdomain = db.session.query(TennisClub.subdomain).order_by(TennisClub.id).limit(1).scalar()
+    with _lock:
+        _default_subdomain['default'] = subdomain
+    return subdomain
+
+
+# Set on a session that changed users or clubs, so that this process drops
+# its cached versions as soon as the change commits
+_CHANGED_KEY = 'identity_changed'
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _bulk_identity_change(orm_execute_state):
+    """query.update() and query.delete() skip the flush that bumps versions;
+    any bulk change to users or clubs invalidates every cached identity"""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.class_ not in (User, TennisClub):
+        return
+    connection = orm_execute_state.session.connection(
+        bind_arguments={'clause': orm_execute_state.statement}
+    )
+    bump_resource_versions(connection, {(ALL_CLUBS, IDENTITY_RESOURCE)})
+    orm_execute_state.session.info[_CHANGED_KEY] = True
+
+
+@event.listens_for(Session, 'after_flush')
+def _flushed_identity_change(session, flush_context):
+    if any(isinstance(instance, (User, TennisClub))
+           for instance in (*session.new, *session.dirty, *session.deleted)):
+        session.info[_CHANGED_KEY] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _drop_cached_versions(session):
+    if session.info.pop(_CHANGED_KEY, False):
+        with _lock:
+            _versions.clear()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_identity_change(session):
+    session.info.pop(_CHANGED_KEY, None)
@@ -0,0 +1,116 @@
+from flask import current_app
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session, object_session
+
+# Tables LIST partitioned by teaching_period_id (migration cedfa12105df), in
+# dependency order: report references programme_players
+PARTITIONED_TABLES = ('programme_players', 'report')
+
+# Where a session keeps the periods it deleted until it commits
+DELETED_PERIODS_KEY = 'deleted_teaching_period_ids'
+
+
+def partition_name(table, period_id):
+    return f'{table}_period_{int(period_id)}'
+
+
+def partitioned_tables(connection):
+    """Names of the PARTITIONED_TABLES that are partitioned in this database"""
+    rows = connection.execute(text("""
+        SELECT c.relname
+        FROM pg_partitioned_table p
+        JOIN pg_class c ON c.oid = p.partrelid
+        WHERE c.relnamespace = 'public'::regnamespace
+    """)).scalars()
+    return [name for name in rows if name in PARTITIONED_TABLES]
+
+
+def create_period_partitions(connection, period_id, tables=None):
+    """Create the partitions holding one teaching period's rows"""
+    for table in tables if tables is not None else partitioned_tables(connection):
+        connection.execute(text(
+            f'CREATE TABLE IF NOT EXISTS {partition_name(table, period_id)} '
+            f'PARTITION OF {table} FOR VALUES IN ({int(period_id)})'
+        ))
+
+
+def drop_period_partitions(connection, period_id, tables=None):
+    """Drop a deleted teaching period's partitions.
+
+    They are necessarily empty: the period could not have been deleted while
+    rows still referenced it.
+    """
+    for table in reversed(tables if tables is not None else partitioned_tables(connection)):
+        name = partition_name(table, period_id)
+        if connection.execute(text('SELECT to_regclass(:name)'), {'name': name}).scalar() is None:
+            continue
+        # A partition referenced by a foreign key has to be detached, which
+        # checks nothing still refers to it, before it can be dropped
+        connection.execute(text(f'ALTER TABLE {table} DETACH PARTITION {name}'))
+        connection.execute(text(f'DROP TABLE {name}'))
+
+
+def orphaned_period_partitions(connection):
+    """Ids of deleted teaching periods whose partitions are still there"""
+    return connection.execute(text("""
+        SELECT DISTINCT p.period_id
+        FROM (
+            SELECT substring(c.relname FROM '_period_([0-9]+)$')::integer AS period_id
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_class parent ON parent.oid = i.inhparent
+            WHERE parent.relname = ANY(:tables) AND c.relname ~ '_period_[0-9]+$'
+        ) p
+        WHERE NOT EXISTS (SELECT 1 FROM teaching_period t WHERE t.id = p.period_id)
+        ORDER BY p.period_id
+    """), {'tables': list(PARTITIONED_TABLES)}).scalars().all()
+
+
+def _after_period_insert(mapper, connection, target):
+    create_period_partitions(connection, target.id)
+
+
+def _after_period_delete(mapper, connection, target):
+    # Dropping partitions is DDL that locks the whole table, so it waits
+    # until the delete has committed rather than running inside the flush
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(DELETED_PERIODS_KEY, set()).add(target.id)
+
+
+def _drop_deleted_period_partitions(session):
+    period_ids = session.info.pop(DELETED_PERIODS_KEY, None)
+    if not period_ids:
+        return
+    from app.extensions import db
+
+    try:
+        with db.engine.begin() as connection:
+            for period_id in sorted(period_ids):
+                drop_period_partitions(connection, period_id)
+    except Exception as e:
+        # Harmless until cleaned up: the partitions are empty
+        current_app.logger.error(
+            f"Could not drop partitions of deleted teaching periods {sorted(period_ids)}: {str(e)}; "
+            f"run flask drop-orphaned-partitions"
+        )
+
+
+def _forget_deleted_periods(session):
+    session.info.pop(DELETED_PERIODS_KEY, None)
+
+
+def init_partitioning(app):
+    """Keep period partitions in step with the teaching_period table.
+
+    A new period's partitions are created in the same transaction, so its
+    rows always have somewhere to go; a deleted period's are dropped after
+    the delete commits. A no-op for tables that are not partitioned.
+    """
+    from app.models import TeachingPeriod
+
+    if not event.contains(TeachingPeriod, 'after_insert', _after_period_insert):
+        event.listen(TeachingPeriod, 'after_insert', _after_period_insert)
+        event.listen(TeachingPeriod, 'after_delete', _after_period_delete)
+        event.listen(Session, 'after_commit', _drop_deleted_period_partitions)
+        event.listen(Session, 'after_rollback', _forget_deleted_periods)
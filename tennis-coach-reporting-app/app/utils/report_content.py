@@ -0,0 +1,173 @@
+import json
+from functools import lru_cache
+from flask import current_app
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects.postgresql import insert
+from app.extensions import db
+from app.models import TemplateVersion
+from app.utils.template_cache import get_compiled_template
+
+# Compact Report.content: {"_v": template version, "_f": {field id: answer}}.
+# Answers whose section and field are not in the template are kept by name
+# under "_x", so compacting never loses data.
+VERSION_KEY = '_v'
+FIELDS_KEY = '_f'
+EXTRA_KEY = '_x'
+
+
+def is_compact(content):
+    return isinstance(content, dict) and FIELDS_KEY in content
+
+
+def unwrap(content):
+    """Name-keyed content, without the {"content": ...} wrapper older clients sent"""
+    if isinstance(content, dict) and 'content' in content and isinstance(content['content'], dict):
+        return content['content']
+    return content
+
+
+def snapshot_fields(compiled):
+    """{field id: [section name, field name, field type, section order, field order]}
+    for a compiled template.
+
+    The type and order let analytics place answers to fields that have since
+    been renamed or removed. Snapshots written before they were recorded hold
+    only the two names.
+    """
+    return {
+        str(field['id']): [
+            section['name'], field['name'],
+            field['fieldType'].upper() if field['fieldType'] else None,
+            section['order'], field['order']
+        ]
+        for section in compiled['sections']
+        for field in section['fields']
+    }
+
+
+def save_snapshot(compiled):
+    """Record the field names of this template version, if not already recorded.
+
+    Template edits recreate sections and fields with new ids, so compact
+    content is always expanded with the names of the version it was written
+    against.
+    """
+    db.session.execute(
+        insert(TemplateVersion)
+        .values(template_id=compiled['id'], version=compiled['version'], fields=snapshot_fields(compiled))
+        .on_conflict_do_nothing(index_elements=['template_id', 'version'])
+    )
+
+
+@lru_cache(maxsize=512)
+def _snapshot(template_id, version):
+    # Snapshots never change once written, so they can be cached for good
+    fields = db.session.query(TemplateVersion.fields).filter_by(
+        template_id=template_id, version=version
+    ).scalar()
+    if fields is None:
+        raise LookupError(f'No snapshot of template {template_id} version {version}')
+    return fields
+
+
+def compact(content, compiled):
+    """Convert name-keyed content to the compact form for a compiled template"""
+    content = unwrap(content) or {}
+    ids = {tuple(entry[:2]): field_id for field_id, entry in snapshot_fields(compiled).items()}
+
+    fields = {}
+    extra = {}
+    for section_name, answers in content.items():
+        if not isinstance(answers, dict):
+            extra[section_name] = answers
+            continue
+        for field_name, value in answers.items():
+            field_id = ids.get((section_name, field_name))
+            if field_id is None:
+                extra.setdefault(section_name, {})[field_name] = value
+            else:
+                fields[field_id] = value
+
+    result = {VERSION_KEY: compiled['version'], FIELDS_KEY: fields}
+    if extra:
+        result[EXTRA_KEY] = extra
+    return result
+
+
+def expand(content, template_id):
+    """Name-keyed content for either storage format"""
+    if not is_compact(content):
+        return unwrap(content)
+
+    names = _snapshot(template_id, content[VERSION_KEY])
+    expanded = {}
+    for field_id, value in content[FIELDS_KEY].items():
+        section_name, field_name = names[field_id][:2]
+        expanded.setdefault(section_name, {})[field_name] = value
+    for section_name, answers in content.get(EXTRA_KEY, {}).items():
+        if isinstance(answers, dict):
+            expanded.setdefault(section_name, {}).update(answers)
+        else:
+            expanded[section_name] = answers
+    return expanded
+
+
+def content_for_storage(content, compiled):
+    """The value to store in Report.content, compact when REPORT_CONTENT_COMPACT is on"""
+    if not current_app.config.get('REPORT_CONTENT_COMPACT'):
+        return content
+    save_snapshot(compiled)
+    return compact(content, compiled)
+
+
+def convert_batch(after_id, batch_size, to_compact=True):
+    """Rewrite the content of the next batch of reports after after_id.
+
+    Reports already in the target format are left alone, so the migration
+    can be stopped and rerun. Compacting uses each template's current
+    version. The caller commits. Returns (last id seen, reports rewritten,
+    bytes before, bytes after), where sizes are pg_column_size of the
+    rewritten rows, i.e. after TOAST compression.
+    """
+    rows = db.session.execute(text("""
+        SELECT id, template_id, content, pg_column_size(content) AS size
+        FROM report
+        WHERE id > :after_id
+        ORDER BY id
+        LIMIT :batch_size
+    """), {'after_id': after_id, 'batch_size': batch_size}).all()
+    if not rows:
+        return None, 0, 0, 0
+
+    updates = []
+    size_before = 0
+    saved_snapshots = set()
+    for row in rows:
+        if is_compact(row.content) == to_compact:
+            continue
+        if to_compact:
+            compiled = get_compiled_template(row.template_id)
+            if compiled is None:
+                continue
+            if compiled['id'] not in saved_snapshots:
+                save_snapshot(compiled)
+                saved_snapshots.add(compiled['id'])
+            content = compact(row.content, compiled)
+        else:
+            content = expand(row.content, row.template_id)
+        updates.append({'id': row.id, 'content': json.dumps(content)})
+        size_before += row.size
+
+    size_after = 0
+    if updates:
+        db.session.execute(
+            text('UPDATE report SET content = CAST(:content AS jsonb) WHERE id = :id'),
+            updates
+        )
+        size_after = db.session.execute(
+            text('SELECT COALESCE(sum(pg_column_size(content)), 0) FROM report WHERE id IN :ids')
+            .bindparams(bindparam('ids', expanding=True)),
+            {'ids': [update['id'] for update in updates]}
+        ).scalar()
+
+    return rows[-1].id, len(updates), size_before, size_after
@@ -7,6 +7,7 @@ from datetime import datetime
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import Paragraph, Image
 from reportlab.lib.colors import HexColor, white, black, Color
+from app.utils.template_cache import get_compiled_template
 
 def draw_rounded_rect(c, x, y, width, height, radius, fill_color=None, stroke_color=None):
     """Draw a rounded rectangle"""
@@ -32,7 +33,7 @@ def draw_rounded_rect(c, x, y, width, height, radius, fill_color=None, stroke_co
 
 def draw_rating_value(c, x, y, value, field_type, options=None):
     """Draw different types of field values"""
-    if field_type == 'RATING':
+    if field_type == 'RATING' and str(value).isdigit():
         max_rating = options.get('max', 5) if options else 5
         draw_rating_stars(c, x, y, int(value), max_rating=max_rating)
     else:
@@ -97,29 +98,33 @@ def create_single_report_pdf(report, output_buffer):
     
     # Dynamic content sections
     current_y = info_y - 40
+    template = get_compiled_template(report.template_id, report.template.version)
+    content = report.expanded_content
     
-    for section in report.template.sections:
+    for section in template['sections']:
+        fields = section['fields']
         current_y -= 40
         
         # Section header
-        draw_rounded_rect(c, 30, current_y, width - 60, len(section.fields) * 40 + 60,
+        draw_rounded_rect(c, 30, current_y, width - 60, len(fields) * 40 + 60,
                          radius=10, fill_color=HexColor('#FFFFFF'))
         
         c.setFillColor(HexColor('#1e3a8a'))
         c.setFont("Helvetica-Bold", 14)
-        c.drawString(50, current_y + len(section.fields) * 40 + 30, section.name)
+        c.drawString(50, current_y + len(fields) * 40 + 30, section['name'])
         
         # Fields
-        field_y = current_y + len(section.fields) * 40
-        for field in section.fields:
-            value = report.content[section.name][field.name]
+        field_y = current_y + len(fields) * 40
+        for field in fields:
+            value = content.get(section['name'], {}).get(field['name'], '')
+            field_type = field['fieldType'].upper()
             
             c.setFillColor(HexColor('#64748b'))
             c.setFont("Helvetica", 12)
-            c.drawString(50, field_y, f"{field.name}:")
+            c.drawString(50, field_y, f"{field['name']}:")
             
             # Draw field value based on type
-            if field.field_type == 'TEXTAREA':
+            if field_type == 'TEXTAREA':
                 # Create a paragraph object for wrapped text
                 style = ParagraphStyle(
                     'Field',
@@ -134,14 +139,72 @@ def create_single_report_pdf(report, output_buffer):
                 p.drawOn(c, 160, field_y - 20)
                 field_y -= 60
             else:
-                draw_rating_value(c, 160, field_y, value, field.field_type, field.options)
+                draw_rating_value(c, 160, field_y, value, field_type, field['options'])
                 field_y -= 30
         
-        current_y -= len(section.fields) * 40
+        current_y -= len(fields) * 40
     
     # Footer
     c.setFillColor(HexColor('#64748b'))
     c.setFont("Helvetica", 10)
     current_date = datetime.now().strftime('%B %d, %Y')
     c.drawString(50, 30, f"Report generated on {current_date}")
-    c.drawString(width - 200, 30, tennis_club_name)
\ No newline at end of file
+    c.drawString(width - 200, 30, tennis_club_name)
+    c.save()
+
+
+def batch_generate_reports(period_id, output_dir=None, progress=None):
+    """Generate a PDF for every report in a teaching period.
+
+    PDFs are written to one directory per group under output_dir (by default
+    instance/reports/reports-<period>). progress, if given, is called after
+    each report with rendered, failed and total counts.
+    """
+    import os
+    from app.models import Report
+    from app.utils.eager_loading import report_batch_options
+
+    reports = (Report.query
+        .filter_by(teaching_period_id=period_id)
+        .join(Report.programme_player)
+        .options(*report_batch_options())
+        .all())
+
+    if not reports:
+        return {
+            'success': 0,
+            'errors': 0,
+            'error_details': ['No reports found for this period'],
+            'output_directory': None
+        }
+
+    term_name = reports[0].teaching_period.name.replace(' ', '_').lower()
+    if output_dir is None:
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        output_dir = os.path.join(base_dir, 'instance', 'reports', f'reports-{term_name}')
+
+    generated = 0
+    errors = []
+    for report in reports:
+        try:
+            group_name = report.tennis_group.name.replace(' ', '_').lower()
+            group_dir = os.path.join(output_dir, f"{group_name}_reports")
+            os.makedirs(group_dir, exist_ok=True)
+
+            student_name = report.student.name.replace(' ', '_').lower()
+            filename = f"{student_name}_{group_name}_{term_name}_report.pdf"
+            with open(os.path.join(group_dir, filename), 'wb') as f:
+                create_single_report_pdf(report, f)
+            generated += 1
+        except Exception as e:
+            errors.append(f"Error generating report for {report.student.name}: {str(e)}")
+
+        if progress:
+            progress(rendered=generated, failed=len(errors), total=len(reports))
+
+    return {
+        'success': generated,
+        'errors': len(errors),
+        'error_details': errors,
+        'output_directory': output_dir
+    }
@@ -0,0 +1,110 @@
+from operator import attrgetter
+
+
+def hh_mm(value):
+    return value.strftime('%H:%M') if value else None
+
+
+def ymd(value):
+    return value.strftime('%Y-%m-%d') if value else None
+
+
+def enum_value(value):
+    return value.value if value else None
+
+
+def row_serializer(**fields):
+    """Compile a serializer for one row shape.
+
+    Each keyword maps an output key to an attribute path such as
+    'student.name', or to a (path, converter) pair. All attributes are read
+    with a single attrgetter call and zipped into a dict, so serializing a
+    row costs one C-level lookup plus any converters, instead of a Python
+    expression per field. Dates, times and enums can be left as they are;
+    the JSON provider encodes them.
+    """
+    keys = tuple(fields)
+    paths = tuple(spec[0] if isinstance(spec, tuple) else spec for spec in fields.values())
+    converters = tuple(
+        (key, spec[1]) for key, spec in fields.items() if isinstance(spec, tuple)
+    )
+    getter = attrgetter(*paths)
+
+    if len(paths) == 1:
+        def serialize(row):
+            return {keys[0]: getter(row)}
+    else:
+        def serialize(row):
+            return dict(zip(keys, getter(row)))
+
+    if not converters:
+        return serialize
+
+    def serialize_with_converters(row):
+        data = serialize(row)
+        for key, convert in converters:
+            data[key] = convert(data[key])
+        return data
+    return serialize_with_converters
+
+
+# Rows from the programme players listing query (see routes.programme_players)
+programme_player_row = row_serializer(
+    id='id',
+    student_name='student_name',
+    group_name='group_name',
+    group_id='group_id',
+    group_time_id='group_time_id',
+    report_id='report_id',
+)
+
+time_slot_row = row_serializer(
+    day_of_week='day_of_week',
+    start_time=('start_time', hh_mm),
+    end_time=('end_time', hh_mm),
+)
+
+report_row = row_serializer(
+    id='id',
+    studentName='student.name',
+    groupName='tennis_group.name',
+    recommendedGroupId='recommended_group_id',
+    submissionDate='date',
+)
+
+group_row = row_serializer(
+    id='id',
+    name='name',
+    description='description',
+)
+
+teaching_period_row = row_serializer(
+    id='id',
+    name='name',
+    start_date=('start_date', ymd),
+    end_date=('end_date', ymd),
+)
+
+coach_row = row_serializer(
+    id='id',
+    name='name',
+    email='email',
+)
+
+# The compiled template cache keeps fieldType as a plain string, because
+# validation and PDF generation compare it directly
+template_field_row = row_serializer(
+    id='id',
+    name='name',
+    description='description',
+    fieldType=('field_type', enum_value),
+    isRequired='is_required',
+    order='order',
+    options='options',
+)
+
+template_section_row = row_serializer(
+    id='id',
+    name='name',
+    order='order',
+)
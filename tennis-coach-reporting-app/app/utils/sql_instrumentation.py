@@ -0,0 +1,104 @@
+import re
+import threading
+import time
+from collections import Counter, deque
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Summaries of the most recent requests, newest last, for the debug endpoint
+_recent_requests = deque(maxlen=200)
+_lock = threading.Lock()
+
+_PARAM_RE = re.compile(r"%\(\w+\)s|\?|:\w+")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_NUMBER_RE = re.compile(r"\b\d+\b")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def statement_shape(statement):
+    """Normalise a SQL statement so the same query with different parameters compares equal"""
+    shape = _PARAM_RE.sub('?', statement)
+    shape = _NUMBER_RE.sub('?', shape)
+    shape = _IN_LIST_RE.sub('(?)', shape)
+    return _WHITESPACE_RE.sub(' ', shape).strip()
+
+
+# The start time lives on the execution context, which is discarded with the
+# statement, so a statement that fails leaves nothing behind on the connection
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and has_request_context():
+        context._sql_instrumentation_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_sql_instrumentation_start', None)
+    if started is None or not has_request_context():
+        return
+    elapsed = time.perf_counter() - started
+
+    stats = g.get('sql_stats')
+    if stats is None:
+        stats = g.sql_stats = {'count': 0, 'duration': 0.0, 'shapes': Counter()}
+    stats['count'] += 1
+    stats['duration'] += elapsed
+    stats['shapes'][statement_shape(statement)] += 1
+
+
+def init_sql_instrumentation(app):
+    """Record query count, DB time and repeated statements for every request.
+
+    Results go out as a Server-Timing header, are kept for /debug/sql, and a
+    warning is logged when one statement shape runs more than
+    SQL_N_PLUS_ONE_THRESHOLD times in a single request. Off by default: the
+    header exposes timings to every client, so enable it only while profiling.
+    """
+    if not app.config.get('SQL_INSTRUMENTATION', False):
+        return
+
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    threshold = app.config.get('SQL_N_PLUS_ONE_THRESHOLD', 10)
+
+    @app.after_request
+    def report_sql_stats(response):
+        stats = g.pop('sql_stats', None)
+        if stats is None:
+            return response
+
+        duration_ms = stats['duration'] * 1000
+        response.headers.add('Server-Timing', f'db;dur={duration_ms:.1f};desc="{stats["count"]} queries"')
+
+        repeated = [
+            {'statement': shape, 'count': count}
+            for shape, count in stats['shapes'].most_common()
+            if count > threshold
+        ]
+        for entry in repeated:
+            current_app.logger.warning(
+                f"Possible N+1 in {request.endpoint}: statement ran {entry['count']} times: {entry['statement']}"
+            )
+
+        with _lock:
+            _recent_requests.append({
+                'method': request.method,
+                'path': request.path,
+                'endpoint': request.endpoint,
+                'status': response.status_code,
+                'query_count': stats['count'],
+                'db_time_ms': round(duration_ms, 1),
+                'repeated_statements': repeated,
+                'top_statements': [
+                    {'statement': shape, 'count': count}
+                    for shape, count in stats['shapes'].most_common(5)
+                ]
+            })
+        return response
+
+
+def recent_request_stats(limit=50):
+    """Most recent request summaries, newest first"""
+    with _lock:
+        return list(reversed(_recent_requests))[:limit]
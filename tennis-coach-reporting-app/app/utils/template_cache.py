@@ -0,0 +1,120 @@
+import threading
+from sqlalchemy.orm import selectinload
+from app.extensions import db
+from app.models import ReportTemplate, TemplateSection, GroupTemplate
+from app.utils.etags import bump_resource_versions
+from app.utils.serializers import template_field_row, template_section_row
+
+# Compiled templates keyed by (template_id, version). Entries never go stale:
+# any change to a template bumps its version, so the old key simply stops
+# being asked for and is dropped the next time the template is compiled.
+_compiled_templates = {}
+_lock = threading.Lock()
+
+
+def serialize_template(template):
+    """Build the nested API representation of a template with sections and fields in order"""
+    return {
+        'id': template.id,
+        'name': template.name,
+        'description': template.description,
+        'version': template.version,
+        'assignedGroups': [{
+            'id': assoc.group.id,
+            'name': assoc.group.name
+        } for assoc in template.group_associations if assoc.is_active],
+        'sections': [
+            dict(template_section_row(s), fields=[
+                template_field_row(f) for f in sorted(s.fields, key=lambda x: x.order)
+            ])
+            for s in sorted(template.sections, key=lambda x: x.order)
+        ]
+    }
+
+
+def get_compiled_template(template_id, version=None):
+    """Return the serialized template, compiling it from the database on a cache miss.
+
+    Pass the version when the template row is already loaded; otherwise only
+    the version column is read. Returns None if the template does not exist.
+    The returned dict is shared between requests and must not be modified.
+    """
+    if version is None:
+        version = db.session.query(ReportTemplate.version).filter_by(id=template_id).scalar()
+        if version is None:
+            return None
+
+    compiled = _compiled_templates.get((template_id, version))
+    if compiled is not None:
+        return compiled
+
+    template = (ReportTemplate.query
+        .options(
+            selectinload(ReportTemplate.sections).selectinload(TemplateSection.fields),
+            selectinload(ReportTemplate.group_associations).joinedload(GroupTemplate.group)
+        )
+        .filter_by(id=template_id)
+        .first())
+    if not template:
+        return None
+
+    compiled = serialize_template(template)
+    with _lock:
+        for key in [k for k in _compiled_templates if k[0] == template.id and k[1] != template.version]:
+            del _compiled_templates[key]
+        _compiled_templates[(template.id, template.version)] = compiled
+    return compiled
+
+
+def template_payload(compiled):
+    """The template shape used by the report endpoints (no group assignments)"""
+    return {
+        'id': compiled['id'],
+        'name': compiled['name'],
+        'description': compiled['description'],
+        'sections': compiled['sections']
+    }
+
+
+def bump_template_versions(template_ids):
+    """Invalidate compiled copies of the given templates in every process.
+
+    Runs inside the caller's transaction, so the new version only becomes
+    visible once the change that caused it is committed.
+    """
+    template_ids = [t for t in set(template_ids) if t is not None]
+    if not template_ids:
+        return
+    ReportTemplate.query.filter(ReportTemplate.id.in_(template_ids)).update(
+        {ReportTemplate.version: ReportTemplate.version + 1},
+        synchronize_session='fetch'
+    )
+
+    # Bulk updates skip the flush hooks that keep template ETags current
+    club_ids = db.session.query(ReportTemplate.tennis_club_id).filter(
+        ReportTemplate.id.in_(template_ids)
+    ).distinct()
+    bump_resource_versions(db.session.connection(), {(club_id, 'templates') for (club_id,) in club_ids})
+
+
+def validate_report_content(compiled, content):
+    """Check submitted report content against the template's required fields.
+
+    Returns a list of error messages, empty if the content is valid.
+    """
+    if not isinstance(content, dict):
+        return ['Report content must be an object keyed by section name']
+
+    errors = []
+    for section in compiled['sections']:
+        section_content = content.get(section['name']) or {}
+        if not isinstance(section_content, dict):
+            errors.append(f"{section['name']} must be an object keyed by field name")
+            continue
+        for field in section['fields']:
+            if not field['isRequired']:
+                continue
+            value = section_content.get(field['name'])
+            if value is None or str(value).strip() == '':
+                errors.append(f"{field['name']} is required")
+    return errors
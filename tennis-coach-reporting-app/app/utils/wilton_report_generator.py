@@ -1,6 +1,7 @@
 from flask import current_app
 from app import create_app, db
 from app.models import Report, TeachingPeriod
+from app.utils.eager_loading import report_batch_options
 from PyPDF2 import PdfReader, PdfWriter
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4
@@ -205,8 +206,13 @@ class EnhancedWiltonReportGenerator:
             output.write(output_file)
 
     @classmethod
-    def batch_generate_reports(cls, period_id, config_path=None):
-        """Generate reports for all completed reports in a teaching period."""
+    def batch_generate_reports(cls, period_id, config_path=None, progress=None, output_dir=None):
+        """Generate reports for all completed reports in a teaching period.
+
+        PDFs go under output_dir, by default instance/reports/reports-<period>.
+        progress, if given, is called after each report with rendered, failed
+        and total counts.
+        """
         if config_path is None:
             base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
             config_path = os.path.join(base_dir, 'utils', 'wilton_group_config.json')
@@ -216,6 +222,7 @@ class EnhancedWiltonReportGenerator:
         # Get all completed reports for the period with related data
         reports = Report.query.filter_by(teaching_period_id=period_id)\
             .join(Report.programme_player)\
+            .options(*report_batch_options())\
             .all()
         
         if not reports:
@@ -230,9 +237,9 @@ class EnhancedWiltonReportGenerator:
         period_name = reports[0].teaching_period.name.replace(' ', '_').lower()
         
         # Set up base output directory
-        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        reports_dir = os.path.join(base_dir, 'instance', 'reports')
-        period_dir = os.path.join(reports_dir, f'reports-{period_name}')
+        if output_dir is None:
+            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            output_dir = os.path.join(base_dir, 'instance', 'reports', f'reports-{period_name}')
         
         generated_reports = []
         errors = []
@@ -258,7 +265,7 @@ class EnhancedWiltonReportGenerator:
                 else:
                     group_dir = f"{group_name}_reports"
                 
-                full_group_dir = os.path.join(period_dir, group_dir)
+                full_group_dir = os.path.join(output_dir, group_dir)
                 os.makedirs(full_group_dir, exist_ok=True)
                 
                 # Prepare output path with standardized naming
@@ -273,7 +280,7 @@ class EnhancedWiltonReportGenerator:
                     'coach_name': report.coach.name,
                     'term': report.teaching_period.name,
                     'group': report.tennis_group.name,
-                    'content': report.content,
+                    'content': report.expanded_content,
                     'group_recommendation': 'Red' if 'Red' in report.recommended_group.name else 'Orange'
                 }
                 
@@ -283,12 +290,15 @@ class EnhancedWiltonReportGenerator:
                 
             except Exception as e:
                 errors.append(f"Error generating report for {report.student.name}: {str(e)}")
+
+            if progress:
+                progress(rendered=len(generated_reports), failed=len(errors), total=len(reports))
                 
         return {
             'success': len(generated_reports),
             'errors': len(errors),
             'error_details': errors,
-            'output_directory': period_dir
+            'output_directory': output_dir
         }
 
     @classmethod
@@ -329,7 +339,7 @@ class EnhancedWiltonReportGenerator:
             'coach_name': report.coach.name,
             'term': report.teaching_period.name,
             'group': report.tennis_group.name,
-            'content': report.content,
+            'content': report.expanded_content,
             'group_recommendation': 'Red' if 'Red' in report.recommended_group.name else 'Orange'
         }
         
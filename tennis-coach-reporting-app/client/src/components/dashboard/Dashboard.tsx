@@ -2,6 +2,8 @@ import { useState, useEffect } from 'react';
 import { Download, Send } from 'lucide-react';
 import { DashboardStats } from './DashboardStats';
 import { BulkEmailSender } from '../email/BulkEmailSender';
+import { formatEta, waitForJob } from '../../lib/jobs';
+import { JobEvent } from '../../types/jobs';
 import { 
   TeachingPeriod, 
   DashboardMetrics, 
@@ -33,6 +35,7 @@ const Dashboard: React.FC<DashboardProps> = () => {
   const [error, setError] = useState<string | null>(null);
   const [showBulkEmail, setShowBulkEmail] = useState(false);
   const [downloading, setDownloading] = useState(false);
+  const [downloadProgress, setDownloadProgress] = useState<JobEvent | null>(null);
 
   useEffect(() => {
     const fetchData = async () => {
@@ -95,49 +98,43 @@ const Dashboard: React.FC<DashboardProps> = () => {
   
     try {
       setDownloading(true);
+      // The zip is built by a background worker; wait for it, then download
       const response = await fetch(`/api/reports/download-all/${selectedPeriod}`, {
-        method: 'GET',
+        method: 'POST',
         credentials: 'include'
       });
   
       if (!response.ok) {
-        if (response.headers.get('content-type')?.includes('application/json')) {
-          const errorData = await response.json();
-          throw new Error(errorData.error || 'Failed to generate reports');
-        }
-        throw new Error('Failed to download reports');
+        const errorData = await response.json().catch(() => ({}));
+        throw new Error(errorData.error || 'Failed to generate reports');
       }
   
-      const blob = await response.blob();
-      
-      // Get filename from Content-Disposition header or use a default
-      let filename = 'reports.zip';
-      const contentDisposition = response.headers.get('Content-Disposition');
-      if (contentDisposition) {
-        const matches = /filename[^;=\n]*=((['"]).*?\2|[^;\n]*)/.exec(contentDisposition);
-        if (matches != null && matches[1]) {
-          filename = matches[1].replace(/['"]/g, '');
-        }
+      const { job_id } = await response.json();
+      const job = await waitForJob(job_id, setDownloadProgress);
+      if (job.status === 'failed') {
+        throw new Error(job.error || 'Failed to generate reports');
       }
   
-      const url = window.URL.createObjectURL(blob);
-      const a = document.createElement('a');
-      a.style.display = 'none';
-      a.href = url;
-      a.download = filename;
-      document.body.appendChild(a);
-      a.click();
-      window.URL.revokeObjectURL(url);
-      document.body.removeChild(a);
+      window.location.href = `/api/jobs/${job_id}/download`;
   
     } catch (error) {
       console.error('Error downloading reports:', error);
       alert('Error downloading reports: ' + (error instanceof Error ? error.message : 'Unknown error'));
     } finally {
       setDownloading(false);
+      setDownloadProgress(null);
     }
   };
 
+  const downloadLabel = () => {
+    const progress = downloadProgress?.progress;
+    if (!progress?.phase) return 'Preparing...';
+    if (progress.phase === 'zipping') return 'Zipping...';
+    if (progress.total == null) return 'Rendering...';
+    const failed = progress.failed ? ` (${progress.failed} failed)` : '';
+    return `Rendered ${progress.rendered || 0} of ${progress.total}${failed} ${formatEta(downloadProgress?.eta_seconds ?? null)}`;
+  };
+
   const groupPlayersByGroupAndTime = (players: ProgrammePlayer[]): GroupedPlayers => {
     return players.reduce((acc: GroupedPlayers, player) => {
       const groupName = player.group_name;
@@ -186,7 +183,7 @@ const Dashboard: React.FC<DashboardProps> = () => {
                 className="px-4 py-2 bg-blue-600 text-white rounded-md hover:bg-blue-700 flex items-center gap-2 disabled:opacity-50 disabled:cursor-not-allowed"
               >
                 <Download className="w-4 h-4" />
-                {downloading ? 'Downloading...' : 'Download All Reports'}
+                {downloading ? downloadLabel() : 'Download All Reports'}
                 {stats?.totalReports > 0 && !downloading && (
                   <span className="bg-blue-500 px-2 py-0.5 rounded-full text-sm">
                     {stats.totalReports}
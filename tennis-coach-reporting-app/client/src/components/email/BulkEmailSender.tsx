@@ -1,6 +1,7 @@
 import React, { useState } from 'react';
 import { Card, CardContent, CardHeader, CardTitle } from '../../components/ui/card';
 import { Alert, AlertTitle } from '../../components/ui/alert';
+import { formatEta, waitForJob } from '../../lib/jobs';
 
 interface BulkEmailSenderProps {
   periodId: number;
@@ -15,6 +16,7 @@ export const BulkEmailSender: React.FC<BulkEmailSenderProps> = ({ periodId, onCl
   const [emailMessage, setEmailMessage] = useState('');
   const [successCount, setSuccessCount] = useState(0);
   const [errorCount, setErrorCount] = useState(0);
+  const [progress, setProgress] = useState<{ sent: number; failed: number; total: number; eta: number | null } | null>(null);
 
   // Prevent showing the modal if no period is selected
   if (!periodId) {
@@ -55,18 +57,34 @@ export const BulkEmailSender: React.FC<BulkEmailSenderProps> = ({ periodId, onCl
         throw new Error(text);
       }
       
-      const data = await response.json();
-      console.log('Response data:', data);
-      
+      // Emails are sent by a background worker; follow its progress
+      const { job_id } = await response.json();
+      const job = await waitForJob<{ success_count: number; error_count: number }>(job_id, (update) => {
+        if (update.progress.total != null) {
+          setProgress({
+            sent: Number(update.progress.sent || 0),
+            failed: Number(update.progress.failed || 0),
+            total: Number(update.progress.total),
+            eta: update.eta_seconds
+          });
+        }
+      });
+      console.log('Job finished:', job);
+
+      if (job.status === 'failed') {
+        throw new Error(job.error || 'Error sending emails');
+      }
+
       setSuccess(true);
-      setSuccessCount(data.success_count || 0);
-      setErrorCount(data.error_count || 0);
+      setSuccessCount(job.result?.success_count || 0);
+      setErrorCount(job.result?.error_count || 0);
       
     } catch (err) {
       console.error('Error sending emails:', err);
       setError(err instanceof Error ? err.message : 'Error sending emails');
     } finally {
       setLoading(false);
+      setProgress(null);
     }
   };
 
@@ -143,7 +161,9 @@ export const BulkEmailSender: React.FC<BulkEmailSenderProps> = ({ periodId, onCl
                   disabled={loading}
                   className="px-4 py-2 border border-transparent rounded-md shadow-sm text-sm font-medium text-white bg-blue-600 hover:bg-blue-700 disabled:opacity-50"
                 >
-                  {loading ? 'Sending...' : 'Send Reports'}
+                  {loading
+                    ? progress ? `Sending ${progress.sent + progress.failed} of ${progress.total}... ${formatEta(progress.eta)}` : 'Sending...'
+                    : 'Send Reports'}
                 </button>
               </div>
             </form>
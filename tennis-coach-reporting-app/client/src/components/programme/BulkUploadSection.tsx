@@ -2,6 +2,22 @@ import React, { useState } from 'react';
 import { Alert, AlertDescription } from '../../components/ui/alert';
 import { Info } from 'lucide-react';
 
+interface ImportStatus {
+  job_id: number;
+  status: 'queued' | 'running' | 'completed' | 'failed';
+  phase: 'validating' | 'importing' | null;
+  rows_processed: number;
+  rows_total: number | null;
+  result: {
+    error?: string;
+    details?: string[];
+    students_created?: number;
+    players_created?: number;
+  } | null;
+}
+
+const POLL_INTERVAL_MS = 1000;
+
 interface BulkUploadSectionProps {
   periodId: number | null;
   onSuccess: () => void;
@@ -16,6 +32,24 @@ const BulkUploadSection: React.FC<BulkUploadSectionProps> = ({
   const [file, setFile] = useState<File | null>(null);
   const [uploading, setUploading] = useState(false);
   const [error, setError] = useState<string | null>(null);
+  const [errorDetails, setErrorDetails] = useState<string[]>([]);
+  const [progress, setProgress] = useState<ImportStatus | null>(null);
+
+  const waitForImport = async (jobId: number): Promise<ImportStatus> => {
+    while (true) {
+      await new Promise(resolve => setTimeout(resolve, POLL_INTERVAL_MS));
+      const response = await fetch(`/clubs/api/players/import/${jobId}`);
+      if (!response.ok) {
+        const errorData = await response.json();
+        throw new Error(errorData.error || 'Failed to check upload progress');
+      }
+      const status: ImportStatus = await response.json();
+      setProgress(status);
+      if (status.status === 'completed' || status.status === 'failed') {
+        return status;
+      }
+    }
+  };
 
   const handleSubmit = async (e: React.FormEvent) => {
     e.preventDefault();
@@ -23,13 +57,16 @@ const BulkUploadSection: React.FC<BulkUploadSectionProps> = ({
 
     setUploading(true);
     setError(null);
+    setErrorDetails([]);
+    setProgress(null);
 
     const formData = new FormData();
     formData.append('file', file);
     formData.append('teaching_period_id', periodId.toString());
 
     try {
-      const response = await fetch('/clubs/api/players/bulk-upload', {
+      // Large rosters are validated and imported in the background
+      const response = await fetch('/clubs/api/players/import', {
         method: 'POST',
         body: formData,
       });
@@ -39,17 +76,33 @@ const BulkUploadSection: React.FC<BulkUploadSectionProps> = ({
         throw new Error(errorData.error || 'Upload failed');
       }
 
-      const result = await response.json();
-      console.log('Upload success:', result);
+      const { job_id } = await response.json();
+      const status = await waitForImport(job_id);
+
+      if (status.status === 'failed') {
+        setErrorDetails(status.result?.details || []);
+        throw new Error(status.result?.error || 'Upload failed');
+      }
+
+      console.log('Upload success:', status.result);
       onSuccess();
     } catch (err) {
       console.error('Upload error:', err);
       setError(err instanceof Error ? err.message : 'Failed to upload file');
     } finally {
       setUploading(false);
+      setProgress(null);
     }
   };
 
+  const progressLabel = () => {
+    if (!progress || !progress.phase) return 'Uploading...';
+    if (progress.phase === 'validating') {
+      return `Checking rows (${progress.rows_processed})...`;
+    }
+    return `Importing ${progress.rows_processed} of ${progress.rows_total ?? '?'} rows...`;
+  };
+
   return (
     <div className="mb-8 p-6 bg-gray-50 rounded-lg border border-gray-200">
       <h3 className="text-lg font-medium text-gray-900 mb-4">Bulk Upload Players</h3>
@@ -57,11 +110,11 @@ const BulkUploadSection: React.FC<BulkUploadSectionProps> = ({
       <form onSubmit={handleSubmit} className="space-y-4">
         <div>
           <label className="block text-sm font-medium text-gray-700 mb-2">
-            Upload CSV File
+            Upload CSV or Excel File
           </label>
           <input
             type="file"
-            accept=".csv"
+            accept=".csv,.xlsx"
             onChange={(e) => setFile(e.target.files?.[0] || null)}
             required
             className="block w-full text-sm text-gray-500 file:mr-4 file:py-2 file:px-4 
@@ -72,7 +125,16 @@ const BulkUploadSection: React.FC<BulkUploadSectionProps> = ({
 
         {error && (
           <Alert variant="destructive">
-            <AlertDescription>{error}</AlertDescription>
+            <AlertDescription>
+              {error}
+              {errorDetails.length > 0 && (
+                <ul className="list-disc pl-5 mt-2 max-h-48 overflow-y-auto">
+                  {errorDetails.map((detail, index) => (
+                    <li key={index}>{detail}</li>
+                  ))}
+                </ul>
+              )}
+            </AlertDescription>
           </Alert>
         )}
 
@@ -123,7 +185,7 @@ const BulkUploadSection: React.FC<BulkUploadSectionProps> = ({
                     d="M4 12a8 8 0 018-8V0C5.373 0 0 5.373 0 12h4zm2 5.291A7.962 7.962 0 014 12H0c0 3.042 1.135 5.824 3 7.938l3-2.647z"
                   />
                 </svg>
-                Uploading...
+                {progressLabel()}
               </>
             ) : (
               'Upload Players'
@@ -0,0 +1,61 @@
+import { JobEvent } from '../types/jobs';
+
+const POLL_INTERVAL_MS = 2000;
+
+// Poll the job's status until it succeeds or fails, for when the server
+// refuses the progress stream (e.g. 429 while it is busy)
+async function pollJob<Result>(
+  baseUrl: string,
+  jobId: number,
+  onUpdate?: (event: JobEvent<Result>) => void
+): Promise<JobEvent<Result>> {
+  for (;;) {
+    const response = await fetch(`${baseUrl}/api/jobs/${jobId}`, { credentials: 'include' });
+    if (!response.ok && response.status !== 429) {
+      throw new Error('Lost contact with the server while waiting for the job');
+    }
+    if (response.ok) {
+      const event: JobEvent<Result> = await response.json();
+      onUpdate?.(event);
+      if (event.status === 'succeeded' || event.status === 'failed') return event;
+    }
+    await new Promise((wait) => setTimeout(wait, POLL_INTERVAL_MS));
+  }
+}
+
+// Follow a background job's progress stream until it succeeds or fails,
+// passing each update to onUpdate. The server ends each stream after a short
+// while; EventSource reconnects with the id of the last event it saw, so
+// updates it already has are not sent again.
+export function waitForJob<Result = Record<string, unknown>>(
+  jobId: number,
+  onUpdate?: (event: JobEvent<Result>) => void
+): Promise<JobEvent<Result>> {
+  const baseUrl = import.meta.env.VITE_API_URL || '';
+  return new Promise((resolve, reject) => {
+    const source = new EventSource(`${baseUrl}/api/jobs/${jobId}/events`, { withCredentials: true });
+
+    source.addEventListener('progress', (e) => {
+      onUpdate?.(JSON.parse((e as MessageEvent).data));
+    });
+    source.addEventListener('done', (e) => {
+      source.close();
+      const event: JobEvent<Result> = JSON.parse((e as MessageEvent).data);
+      onUpdate?.(event);
+      resolve(event);
+    });
+    // EventSource reconnects by itself after dropped connections; it only
+    // gives up (CLOSED) when the server refuses the stream
+    source.onerror = () => {
+      if (source.readyState === EventSource.CLOSED) {
+        pollJob(baseUrl, jobId, onUpdate).then(resolve, reject);
+      }
+    };
+  });
+}
+
+export function formatEta(seconds: number | null): string {
+  if (seconds == null) return '';
+  if (seconds < 60) return `about ${seconds}s left`;
+  return `about ${Math.ceil(seconds / 60)} min left`;
+}
@@ -0,0 +1,25 @@
+// src/types/jobs.ts
+
+export type JobState = 'queued' | 'running' | 'succeeded' | 'failed';
+
+export interface JobProgress {
+  phase?: string;
+  done?: number;
+  total?: number | null;
+  rendered?: number;
+  sent?: number;
+  failed?: number;
+  [key: string]: number | string | null | undefined;
+}
+
+// The data of a progress or done event from /api/jobs/<id>/events
+export interface JobEvent<Result = Record<string, unknown>> {
+  job_id: number;
+  status: JobState;
+  progress: JobProgress;
+  attempts: number;
+  eta_seconds: number | null;
+  // Only on the final (done) event
+  result?: Result | null;
+  error?: string | null;
+}
@@ -2,9 +2,32 @@
 import { defineConfig } from 'vite'
 import react from '@vitejs/plugin-react'
 import path from 'path'
+import fs from 'fs'
+import zlib from 'zlib'
+import type { Plugin } from 'vite'
+
+// Writes .br and .gz next to each built text asset; Flask serves them to
+// clients that accept the encoding (see app/utils/compression.py)
+const precompress = (): Plugin => ({
+  name: 'precompress-assets',
+  apply: 'build',
+  writeBundle(options, bundle) {
+    const outDir = options.dir as string
+    for (const fileName of Object.keys(bundle)) {
+      if (!/\.(js|css|html|svg|json)$/.test(fileName)) continue
+      const filePath = path.join(outDir, fileName)
+      const source = fs.readFileSync(filePath)
+      if (source.length < 1024) continue
+      fs.writeFileSync(`${filePath}.gz`, zlib.gzipSync(source, { level: 9 }))
+      fs.writeFileSync(`${filePath}.br`, zlib.brotliCompressSync(source, {
+        params: { [zlib.constants.BROTLI_PARAM_QUALITY]: 11 }
+      }))
+    }
+  }
+})
 
 export default defineConfig({
-  plugins: [react()],
+  plugins: [react(), precompress()],
   server: {
     port: 5173,
     strictPort: true,
@@ -16,6 +16,26 @@ class Config:
     SQLALCHEMY_DATABASE_URI = DATABASE_URL
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Optional read replica. GET requests read from it; point it at the same
+    # database as DATABASE_URL to exercise the routing locally with one server.
+    DATABASE_REPLICA_URL = os.environ.get('DATABASE_REPLICA_URL')
+    if DATABASE_REPLICA_URL and DATABASE_REPLICA_URL.startswith('postgres://'):
+        DATABASE_REPLICA_URL = DATABASE_REPLICA_URL.replace('postgres://', 'postgresql://')
+    SQLALCHEMY_BINDS = {'replica': DATABASE_REPLICA_URL} if DATABASE_REPLICA_URL else {}
+    
+    # Seconds a user's reads stay on the primary after they write (read-your-writes)
+    DB_PRIMARY_PIN_SECONDS = int(os.environ.get('DB_PRIMARY_PIN_SECONDS', 5))
+    
+    # Per-request SQL stats (Server-Timing header, /debug/sql) and N+1 warnings.
+    # Off unless profiling: the Server-Timing header is sent to every client
+    SQL_INSTRUMENTATION = os.environ.get('SQL_INSTRUMENTATION', 'false').lower() == 'true'
+    SQL_N_PLUS_ONE_THRESHOLD = int(os.environ.get('SQL_N_PLUS_ONE_THRESHOLD', 10))
+    
+    # JSON responses smaller than this (bytes) are not worth compressing
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_GZIP_LEVEL = 6
+    COMPRESS_BROTLI_QUALITY = 4
+    
     # PostgreSQL connection pool settings
     SQLALCHEMY_ENGINE_OPTIONS = {
         'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
@@ -27,6 +47,24 @@ class Config:
     
     UPLOAD_FOLDER = 'uploads'
     
+    # Rows validated and inserted per batch by the background roster importer
+    ROSTER_IMPORT_CHUNK_SIZE = int(os.environ.get('ROSTER_IMPORT_CHUNK_SIZE', 2000))
+    
+    # Store new and edited report content keyed by template field id (see app/utils/report_content.py)
+    REPORT_CONTENT_COMPACT = os.environ.get('REPORT_CONTENT_COMPACT', 'false').lower() == 'true'
+    
+    # Teaching periods that ended more than this many days ago are moved to the archive
+    ARCHIVE_PERIODS_OLDER_THAN_DAYS = int(os.environ.get('ARCHIVE_PERIODS_OLDER_THAN_DAYS', 730))
+    
+    # Seconds a logged-in user and their club stay in the per-process identity cache
+    IDENTITY_CACHE_TTL = int(os.environ.get('IDENTITY_CACHE_TTL', 60))
+    # Seconds a process trusts its cached users before rereading the shared identity
+    # version: the longest a role or club change made by another process goes unseen.
+    # Changes made by this process apply at once.
+    IDENTITY_VERSION_TTL = int(os.environ.get('IDENTITY_VERSION_TTL', 5))
+    # Seconds subdomain -> club lookups are cached; these are not version checked
+    IDENTITY_SUBDOMAIN_CACHE_TTL = int(os.environ.get('IDENTITY_SUBDOMAIN_CACHE_TTL', 5))
+    
     # AWS Cognito Config
     AWS_ACCESS_KEY_ID = os.environ.get('AWS_ACCESS_KEY_ID')
     AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY')
@@ -36,6 +74,9 @@ class Config:
     AWS_COGNITO_CLIENT_SECRET = os.environ.get('AWS_COGNITO_CLIENT_SECRET')
     COGNITO_DOMAIN = os.environ.get('COGNITO_DOMAIN')
     
+    # Seconds before cached Cognito OpenID metadata and JWKS are refreshed in the background
+    OIDC_METADATA_TTL = int(os.environ.get('OIDC_METADATA_TTL', 86400))
+    
     # OAuth endpoints
     OAUTH_AUTHORIZE_URL = f"https://{COGNITO_DOMAIN}/oauth2/authorize"
     OAUTH_TOKEN_URL = f"https://{COGNITO_DOMAIN}/oauth2/token"
@@ -76,6 +117,40 @@ class Config:
     
     # Club invitation configuration
     INVITATION_EXPIRY_HOURS = 48 
+    
+    # Seconds between accreditation reminder runs inside `flask worker`; 0 (the
+    # default) leaves it to cron running `flask send-accreditation-reminders`
+    ACCREDITATION_REMINDER_INTERVAL = int(os.environ.get('ACCREDITATION_REMINDER_INTERVAL', 0))
+    ACCREDITATION_REMINDER_START_DELAY = 60
+    # Reminder emails sent concurrently per run
+    ACCREDITATION_REMINDER_CONCURRENCY = int(os.environ.get('ACCREDITATION_REMINDER_CONCURRENCY', 4))
+    
+    # Background job worker (flask worker, see app/services/job_queue.py)
+    JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', 2))
+    # A running job not updated for this long is assumed to have lost its worker and is requeued
+    JOB_STALE_SECONDS = int(os.environ.get('JOB_STALE_SECONDS', 900))
+    # First retry delay; doubled on each further attempt
+    JOB_RETRY_BASE_SECONDS = int(os.environ.get('JOB_RETRY_BASE_SECONDS', 30))
+    # Finished jobs, and the files they produced, are deleted after this many days
+    JOB_RETENTION_DAYS = int(os.environ.get('JOB_RETENTION_DAYS', 7))
+    # Jobs of one club run on at most this many workers at a time
+    JOB_MAX_RUNNING_PER_CLUB = int(os.environ.get('JOB_MAX_RUNNING_PER_CLUB', 2))
+    # Progress streams (/api/jobs/<id>/events): seconds between reads of the job,
+    # between keepalive comments, and before the stream ends and the browser
+    # reconnects. An open stream holds a worker thread, so keep the maximum
+    # short with sync gunicorn workers; raise it only with gthread or gevent
+    JOB_EVENTS_POLL_INTERVAL = float(os.environ.get('JOB_EVENTS_POLL_INTERVAL', 1))
+    JOB_EVENTS_KEEPALIVE_SECONDS = 15
+    JOB_EVENTS_MAX_SECONDS = int(os.environ.get('JOB_EVENTS_MAX_SECONDS', 25))
+    
+    # Admission control for heavy endpoints (see app/utils/admission.py): requests in
+    # flight per endpoint class, per club and in total, across every process (as
+    # Postgres advisory locks). Over either limit a request gets 429 with Retry-After.
+    ADMISSION_CONTROL_ENABLED = os.environ.get('ADMISSION_CONTROL_ENABLED', 'true').lower() == 'true'
+    ADMISSION_LIMITS = {}  # e.g. {'pdf': (4, 8)} to override app.utils.admission.DEFAULT_LIMITS
+    ADMISSION_MAX_RETRY_AFTER = 30
+    # Idle connections kept for holding admission locks; more open as slots are taken
+    ADMISSION_POOL_SIZE = 2
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -95,6 +170,7 @@ class ProductionConfig(Config):
 
 class TestingConfig(Config):
     TESTING = True
+    ACCREDITATION_REMINDER_INTERVAL = 0
     
     # Override the database URL validation for testing
     def __init__(self):
@@ -0,0 +1,32 @@
+"""Add per-club expiry indexes to coach_details
+
+Revision ID: 0b55bad81a2c
+Revises: b6f736f668bd
+Create Date: 2026-10-19 11:05:12.334817
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b55bad81a2c'
+down_revision = 'b6f736f668bd'
+branch_labels = None
+depends_on = None
+
+EXPIRY_COLUMNS = [
+    'accreditation_expiry', 'dbs_expiry', 'first_aid_expiry',
+    'pediatric_first_aid_expiry', 'safeguarding_expiry'
+]
+
+
+def upgrade():
+    for column in EXPIRY_COLUMNS:
+        op.create_index(f'idx_coach_details_club_{column}', 'coach_details', ['tennis_club_id', column],
+                        unique=False, if_not_exists=True)
+
+
+def downgrade():
+    for column in EXPIRY_COLUMNS:
+        op.drop_index(f'idx_coach_details_club_{column}', table_name='coach_details', if_exists=True)
@@ -0,0 +1,29 @@
+"""Add report_template.version
+
+Revision ID: 3236899795d3
+Revises: 123fd5c3b381
+Create Date: 2026-10-19 09:12:04.518224
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3236899795d3'
+down_revision = '123fd5c3b381'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # IF NOT EXISTS: databases built with db.create_all() since the column was
+    # added to the model already have it
+    op.execute(
+        'ALTER TABLE report_template ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1'
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('report_template', schema=None) as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,32 @@
+"""Add template_version table
+
+Revision ID: 32f4b7dbc773
+Revises: d92aadcd5766
+Create Date: 2026-10-19 11:52:08.447190
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '32f4b7dbc773'
+down_revision = 'd92aadcd5766'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('template_version',
+    sa.Column('template_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('version', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('fields', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+    sa.ForeignKeyConstraint(['template_id'], ['report_template.id'], ),
+    sa.PrimaryKeyConstraint('template_id', 'version'),
+    if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_table('template_version')
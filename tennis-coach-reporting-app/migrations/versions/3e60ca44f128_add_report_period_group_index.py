@@ -0,0 +1,28 @@
+"""Add the report (teaching_period_id, group_id) index
+
+Revision ID: 3e60ca44f128
+Revises: 3236899795d3
+Create Date: 2026-10-19 10:02:41.173905
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3e60ca44f128'
+down_revision = '3236899795d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('idx_report_period_group', 'report', ['teaching_period_id', 'group_id'],
+                    unique=False, if_not_exists=True)
+    # The jsonb_path_ops index briefly declared on report.content serves only
+    # @> containment, which no query uses; drop it where create_all built it
+    op.drop_index('idx_report_content_gin', table_name='report', if_exists=True)
+
+
+def downgrade():
+    op.drop_index('idx_report_period_group', table_name='report', if_exists=True)
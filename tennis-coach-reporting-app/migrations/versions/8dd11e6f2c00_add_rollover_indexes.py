@@ -0,0 +1,28 @@
+"""Add the indexes used by the period rollover
+
+Revision ID: 8dd11e6f2c00
+Revises: 3e60ca44f128
+Create Date: 2026-10-19 10:31:17.640382
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8dd11e6f2c00'
+down_revision = '3e60ca44f128'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('idx_report_programme_player', 'report', ['programme_player_id'],
+                    unique=False, if_not_exists=True)
+    op.create_index('idx_programme_players_period_student', 'programme_players',
+                    ['teaching_period_id', 'student_id'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('idx_programme_players_period_student', table_name='programme_players', if_exists=True)
+    op.drop_index('idx_report_programme_player', table_name='report', if_exists=True)
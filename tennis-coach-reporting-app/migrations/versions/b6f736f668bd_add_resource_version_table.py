@@ -0,0 +1,30 @@
+"""Add resource_version table
+
+Revision ID: b6f736f668bd
+Revises: 8dd11e6f2c00
+Create Date: 2026-10-19 10:48:55.902113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6f736f668bd'
+down_revision = '8dd11e6f2c00'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('resource_version',
+    sa.Column('club_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('resource', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.BigInteger(), server_default=sa.text('1'), nullable=False),
+    sa.PrimaryKeyConstraint('club_id', 'resource'),
+    if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_table('resource_version')
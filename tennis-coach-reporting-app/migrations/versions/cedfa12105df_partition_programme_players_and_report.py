@@ -0,0 +1,129 @@
+"""Partition programme_players and report by teaching period
+
+Revision ID: cedfa12105df
+Revises: eac456a4779b
+Create Date: 2026-10-19 14:02:17.114203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'cedfa12105df'
+down_revision = 'eac456a4779b'
+branch_labels = None
+depends_on = None
+
+# In dependency order: report references programme_players
+TABLES = ('programme_players', 'report')
+
+FOREIGN_KEYS = {
+    'programme_players': [
+        (['student_id'], 'student', ['id']),
+        (['coach_id'], 'user', ['id']),
+        (['group_id'], 'tennis_group', ['id']),
+        (['group_time_id'], 'tennis_group_times', ['id']),
+        (['teaching_period_id'], 'teaching_period', ['id']),
+        (['tennis_club_id'], 'tennis_club', ['id']),
+    ],
+    'report': [
+        (['student_id'], 'student', ['id']),
+        (['coach_id'], 'user', ['id']),
+        (['group_id'], 'tennis_group', ['id']),
+        (['recommended_group_id'], 'tennis_group', ['id']),
+        (['teaching_period_id'], 'teaching_period', ['id']),
+        (['programme_player_id'], 'programme_players', ['id']),
+        (['template_id'], 'report_template', ['id']),
+    ],
+}
+
+INDEXES = {
+    'programme_players': [('idx_programme_players_period_student', ['teaching_period_id', 'student_id'])],
+    'report': [
+        ('idx_report_period_group', ['teaching_period_id', 'group_id']),
+        ('idx_report_programme_player', ['programme_player_id']),
+    ],
+}
+
+
+def _partitioned_tables(bind):
+    return set(bind.execute(sa.text("""
+        SELECT c.relname
+        FROM pg_partitioned_table p
+        JOIN pg_class c ON c.oid = p.partrelid
+        WHERE c.relnamespace = 'public'::regnamespace
+    """)).scalars())
+
+
+def _rebuild(bind, table, partition_clause):
+    """Recreate table with the same columns and defaults, refilled from the old one.
+
+    Keys and indexes go with the old table and are added back afterwards by
+    _add_keys, which is quicker than loading into an indexed table.
+    """
+    legacy = f'{table}_rebuild'
+    op.execute(f'ALTER TABLE {table} RENAME TO {legacy}')
+    op.execute(
+        f'CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) {partition_clause}'
+    )
+    # Keep the id sequence when the old table is dropped
+    sequence = bind.execute(sa.text("SELECT pg_get_serial_sequence(:table, 'id')"), {'table': legacy}).scalar()
+    if sequence:
+        op.execute(f'ALTER SEQUENCE {sequence} OWNED BY {table}.id')
+    return legacy
+
+
+def _copy_and_drop(legacy_tables):
+    for table, legacy in legacy_tables.items():
+        op.execute(f'INSERT INTO {table} SELECT * FROM {legacy}')
+    # report's old table references programme_players' old one, so drop it first
+    for table in reversed(TABLES):
+        if table in legacy_tables:
+            op.execute(f'DROP TABLE {legacy_tables[table]}')
+
+
+def _add_keys(table, partitioned):
+    key = ['id', 'teaching_period_id'] if partitioned else ['id']
+    op.create_primary_key(f'{table}_pkey', table, key)
+    for columns, referred_table, referred_columns in FOREIGN_KEYS[table]:
+        # Foreign keys into a partitioned table must include its partition key
+        if partitioned and referred_table in TABLES:
+            columns, referred_columns = columns + ['teaching_period_id'], referred_columns + ['teaching_period_id']
+        op.create_foreign_key(f'{table}_{columns[0]}_fkey', table, referred_table, columns, referred_columns)
+    for name, columns in INDEXES[table]:
+        op.create_index(name, table, columns)
+    op.execute(f'ANALYZE {table}')
+
+
+def upgrade():
+    bind = op.get_bind()
+    # Skips tables an earlier `flask partition-tables` already converted
+    tables = [table for table in TABLES if table not in _partitioned_tables(bind)]
+    if not tables:
+        return
+
+    legacy_tables = {table: _rebuild(bind, table, 'PARTITION BY LIST (teaching_period_id)') for table in tables}
+    # One partition per existing period; new periods get theirs when created
+    for (period_id,) in bind.execute(sa.text('SELECT id FROM teaching_period ORDER BY id')):
+        for table in tables:
+            op.execute(
+                f'CREATE TABLE IF NOT EXISTS {table}_period_{int(period_id)} '
+                f'PARTITION OF {table} FOR VALUES IN ({int(period_id)})'
+            )
+    _copy_and_drop(legacy_tables)
+    for table in tables:
+        _add_keys(table, partitioned=True)
+
+
+def downgrade():
+    bind = op.get_bind()
+    tables = [table for table in TABLES if table in _partitioned_tables(bind)]
+    if not tables:
+        return
+
+    # Dropping the old partitioned tables drops their partitions with them
+    legacy_tables = {table: _rebuild(bind, table, '') for table in tables}
+    _copy_and_drop(legacy_tables)
+    for table in tables:
+        _add_keys(table, partitioned=False)
@@ -0,0 +1,42 @@
+"""Add archived_period table
+
+Revision ID: d92aadcd5766
+Revises: ebde3d7864f7
+Create Date: 2026-10-19 11:34:50.281907
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'd92aadcd5766'
+down_revision = 'ebde3d7864f7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('archived_period',
+    sa.Column('teaching_period_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('tennis_club_id', sa.Integer(), nullable=False),
+    sa.Column('report_ids', postgresql.ARRAY(sa.Integer()), nullable=False),
+    sa.Column('programme_player_count', sa.Integer(), nullable=False),
+    sa.Column('report_count', sa.Integer(), nullable=False),
+    sa.Column('payload', sa.LargeBinary(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+    sa.ForeignKeyConstraint(['teaching_period_id'], ['teaching_period.id'], ),
+    sa.ForeignKeyConstraint(['tennis_club_id'], ['tennis_club.id'], ),
+    sa.PrimaryKeyConstraint('teaching_period_id'),
+    if_not_exists=True
+    )
+    op.create_index('ix_archived_period_tennis_club_id', 'archived_period', ['tennis_club_id'],
+                    unique=False, if_not_exists=True)
+    op.create_index('idx_archived_period_report_ids', 'archived_period', ['report_ids'],
+                    unique=False, postgresql_using='gin', if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('idx_archived_period_report_ids', table_name='archived_period', postgresql_using='gin')
+    op.drop_index('ix_archived_period_tennis_club_id', table_name='archived_period')
+    op.drop_table('archived_period')
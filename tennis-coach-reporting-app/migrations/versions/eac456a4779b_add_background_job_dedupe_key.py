@@ -0,0 +1,32 @@
+"""Add background_job.dedupe_key
+
+Revision ID: eac456a4779b
+Revises: 78da43ff0911
+Create Date: 2026-10-19 12:31:44.508162
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'eac456a4779b'
+down_revision = '78da43ff0911'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # IF NOT EXISTS: databases built with db.create_all() since the column was
+    # added to the model already have it
+    op.execute('ALTER TABLE background_job ADD COLUMN IF NOT EXISTS dedupe_key VARCHAR(200)')
+    # At most one queued or running job per key
+    op.create_index('uq_background_job_active_dedupe', 'background_job', ['dedupe_key'], unique=True,
+                    postgresql_where=sa.text("status IN ('queued', 'running')"), if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('uq_background_job_active_dedupe', table_name='background_job',
+                  postgresql_where=sa.text("status IN ('queued', 'running')"))
+    with op.batch_alter_table('background_job', schema=None) as batch_op:
+        batch_op.drop_column('dedupe_key')
@@ -0,0 +1,41 @@
+"""Add accreditation_reminder table
+
+Revision ID: ebde3d7864f7
+Revises: 0b55bad81a2c
+Create Date: 2026-10-19 11:20:36.118254
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ebde3d7864f7'
+down_revision = '0b55bad81a2c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('accreditation_reminder',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('coach_details_id', sa.Integer(), nullable=False),
+    sa.Column('tennis_club_id', sa.Integer(), nullable=False),
+    sa.Column('accreditation_type', sa.String(length=30), nullable=False),
+    sa.Column('expiry_date', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('threshold_days', sa.Integer(), nullable=False),
+    sa.Column('sent_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+    sa.ForeignKeyConstraint(['coach_details_id'], ['coach_details.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['tennis_club_id'], ['tennis_club.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('coach_details_id', 'accreditation_type', 'expiry_date', 'threshold_days',
+                        name='uq_accreditation_reminder'),
+    if_not_exists=True
+    )
+    op.create_index('ix_accreditation_reminder_tennis_club_id', 'accreditation_reminder', ['tennis_club_id'],
+                    unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_accreditation_reminder_tennis_club_id', table_name='accreditation_reminder')
+    op.drop_table('accreditation_reminder')
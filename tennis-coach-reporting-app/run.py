@@ -1,5 +1,7 @@
-from flask import Flask, send_from_directory
+from flask import Flask
 from app import create_app
+from app.utils.compression import send_static_asset
+from werkzeug.exceptions import NotFound
 import os
 
 app = create_app()
@@ -10,10 +12,11 @@ app = create_app()
 def serve(path):
     if path.startswith('api'):
         return app.view_functions[path]()
+    dist = os.path.join(app.static_folder, 'dist')
     try:
-        return send_from_directory('app/static/dist', path)
-    except:
-        return send_from_directory('app/static/dist', 'index.html')
+        return send_static_asset(dist, path)
+    except NotFound:
+        return send_static_asset(dist, 'index.html')
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,121 @@
+import os
+import sys
+
+import pytest
+
+# config.py refuses to load without a database URL; the tests run on SQLite
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+from sqlalchemy.dialects.postgresql import JSONB  # noqa: E402
+from sqlalchemy.ext.compiler import compiles  # noqa: E402
+from sqlalchemy.schema import PrimaryKeyConstraint  # noqa: E402
+
+from config import Config  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app import models  # noqa: E402
+
+
+@compiles(JSONB, 'sqlite')
+def _jsonb_on_sqlite(type_, compiler, **kw):
+    return 'JSON'
+
+
+# Tables partitioned by teaching period have an (id, teaching_period_id)
+# primary key on Postgres, with ids from a sequence. SQLite has no sequences,
+# so key them on id alone, which makes id the auto-assigned rowid.
+@compiles(PrimaryKeyConstraint, 'sqlite')
+def _partition_key_on_sqlite(constraint, compiler, **kw):
+    if constraint.table.name in ('programme_players', 'report'):
+        return 'PRIMARY KEY (id)'
+    return compiler.visit_primary_key_constraint(constraint, **kw)
+
+
+# Tables SQLite can hold: archived_period needs Postgres arrays
+SQLITE_TABLES = [t for t in db.metadata.sorted_tables if t.name != 'archived_period']
+
+
+class TestConfig(Config):
+    __test__ = False
+
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    SQLALCHEMY_BINDS = {}
+    SQL_INSTRUMENTATION = False
+    ACCREDITATION_REMINDER_INTERVAL = 0
+
+
+@pytest.fixture
+def app():
+    """A bare app with the database extension, without the blueprints and
+    their deployment-specific club configuration"""
+    app = Flask('app', instance_path=os.path.join(os.path.dirname(__file__), 'instance'))
+    app.config.from_object(TestConfig)
+    db.init_app(app)
+    with app.app_context():
+        db.metadata.create_all(db.engine, tables=SQLITE_TABLES)
+        yield app
+        db.session.remove()
+        db.metadata.drop_all(db.engine, tables=SQLITE_TABLES)
+
+
+@pytest.fixture(autouse=True)
+def clear_process_caches():
+    # Ids restart in every test database, so per-process caches must not
+    # carry entries from one test into the next
+    from app.utils import identity_cache, report_content, template_cache
+
+    def clear():
+        template_cache._compiled_templates.clear()
+        report_content._snapshot.cache_clear()
+        identity_cache._users.clear()
+        identity_cache._versions.clear()
+        identity_cache._club_ids.clear()
+        identity_cache._default_subdomain.clear()
+
+    clear()
+    yield
+    clear()
+
+
+@pytest.fixture
+def club(app):
+    club = models.TennisClub(name='Test Club', subdomain='test')
+    db.session.add(club)
+    db.session.flush()
+    admin = models.User(
+        email='admin@example.com', username='admin', name='Admin',
+        role=models.UserRole.ADMIN, tennis_club_id=club.id
+    )
+    db.session.add(admin)
+    db.session.commit()
+    return club
+
+
+@pytest.fixture
+def roster_club(club):
+    """A club with a coach, a group with one Monday slot and a teaching period,
+    enough for roster rows to validate against"""
+    from datetime import datetime, time
+
+    coach = models.User(
+        email='coach@example.com', username='coach', name='Coach',
+        role=models.UserRole.COACH, tennis_club_id=club.id
+    )
+    group = models.TennisGroup(name='Red 1', tennis_club_id=club.id)
+    period = models.TeachingPeriod(
+        name='Autumn 2026', start_date=datetime(2026, 9, 1), end_date=datetime(2026, 12, 20),
+        tennis_club_id=club.id
+    )
+    db.session.add_all([coach, group, period])
+    db.session.flush()
+    slot = models.TennisGroupTimes(
+        group_id=group.id, day_of_week=models.DayOfWeek.MONDAY,
+        start_time=time(16, 0), end_time=time(17, 0), tennis_club_id=club.id
+    )
+    db.session.add(slot)
+    db.session.commit()
+    return {'club_id': club.id, 'coach_id': coach.id, 'group_id': group.id,
+            'slot_id': slot.id, 'period_id': period.id}
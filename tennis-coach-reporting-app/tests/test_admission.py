@@ -0,0 +1,147 @@
+import threading
+
+import pytest
+from flask import Flask
+
+from app.utils.admission import (
+    AdmissionLimiter, AdvisoryLockSlots, LocalSlots, admission_controlled
+)
+
+
+class FakeLockServer:
+    """Postgres advisory locks as seen by several processes: a lock is held by
+    one connection at a time, and dropped when its connection is lost"""
+
+    def __init__(self):
+        self.holders = {}
+        self.lock = threading.Lock()
+
+    def engine(self):
+        server = self
+
+        class Engine:
+            def connect(self):
+                return FakeConnection(server)
+        return Engine()
+
+
+class FakeConnection:
+    def __init__(self, server):
+        self.server = server
+        self.closed = False
+
+    def execute(self, statement, params):
+        key = (params['key'], params['slot'])
+        with self.server.lock:
+            if 'pg_try_advisory_lock' in str(statement):
+                holder = self.server.holders.setdefault(key, self)
+                return Scalar(holder is self)
+            if self.server.holders.get(key) is self:
+                del self.server.holders[key]
+            return Scalar(True)
+
+    def commit(self):
+        pass
+
+    def invalidate(self):
+        with self.server.lock:
+            for key in [k for k, holder in self.server.holders.items() if holder is self]:
+                del self.server.holders[key]
+
+    def close(self):
+        self.closed = True
+
+
+class Scalar:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar(self):
+        return self.value
+
+
+LIMITS = {'pdf': (1, 2)}
+
+
+@pytest.fixture
+def server():
+    return FakeLockServer()
+
+
+def process(server):
+    """A limiter as one gunicorn worker would have it"""
+    return AdmissionLimiter(LIMITS, AdvisoryLockSlots(server.engine()))
+
+
+def test_limits_hold_across_processes(server):
+    first, second = process(server), process(server)
+
+    release_club_1 = first.try_acquire('pdf', 1)
+    assert release_club_1 is not None
+    # Same club on another process: the per-club slot is taken
+    assert second.try_acquire('pdf', 1) is None
+    release_club_2 = second.try_acquire('pdf', 2)
+    assert release_club_2 is not None
+    # Total of two reached on the platform
+    assert first.try_acquire('pdf', 3) is None
+
+    release_club_1()
+    assert second.try_acquire('pdf', 3) is not None
+    assert server.holders and all(len(key) == 2 for key in server.holders)
+
+
+def test_a_refused_request_keeps_no_locks(server):
+    limiter = process(server)
+    limiter.try_acquire('pdf', 1)
+    held = dict(server.holders)
+
+    assert limiter.try_acquire('pdf', 1) is None
+    assert server.holders == held
+
+
+def test_release_is_idempotent(server):
+    limiter = process(server)
+    release = limiter.try_acquire('pdf', 1)
+    release()
+    release()
+    assert server.holders == {}
+
+
+def test_local_slots_count_within_the_process():
+    limiter = AdmissionLimiter(LIMITS, LocalSlots())
+    release = limiter.try_acquire('pdf', 1)
+    assert limiter.try_acquire('pdf', 1) is None
+    release()
+    assert limiter.try_acquire('pdf', 1) is not None
+
+
+@pytest.fixture
+def busy_app(server):
+    app = Flask('app')
+    app.config['ADMISSION_MAX_RETRY_AFTER'] = 30
+    app.extensions['admission'] = process(server)
+
+    @app.route('/report.pdf')
+    @admission_controlled('pdf')
+    def report_pdf():
+        return 'pdf'
+
+    return app
+
+
+def test_saturated_class_answers_429_with_retry_after(busy_app, server):
+    # Another process already fills the platform-wide total
+    other = process(server)
+    assert other.try_acquire('pdf', 7) and other.try_acquire('pdf', 8)
+
+    response = busy_app.test_client().get('/report.pdf')
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '1'
+    assert response.json['retry_after'] == 1
+
+
+def test_slot_is_released_once_the_response_is_closed(busy_app, server):
+    response = busy_app.test_client().get('/report.pdf')
+    assert response.status_code == 200
+    response.close()
+    assert server.holders == {}
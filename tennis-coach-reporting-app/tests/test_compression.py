@@ -0,0 +1,47 @@
+import gzip
+
+import pytest
+from flask import Flask
+
+from app.utils.compression import IMMUTABLE_CACHE_CONTROL, init_compression
+
+
+@pytest.fixture
+def static_client(tmp_path):
+    files = {
+        'dist/assets/dashboard-3f9a1c2b.js': 'console.log("dashboard")',
+        'dist/assets/not-hashed.js': 'console.log("copied by hand")',
+        'dist/tennis-ball-icon.svg': '<svg/>',
+        'img/club-banner-2024.png': 'png',
+    }
+    for name, content in files.items():
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    (tmp_path / 'dist/assets/dashboard-3f9a1c2b.js.gz').write_bytes(gzip.compress(b'console.log("dashboard")'))
+
+    app = Flask('app', static_folder=str(tmp_path), static_url_path='/static')
+    init_compression(app)
+    return app.test_client()
+
+
+def test_vite_output_is_cached_as_immutable(static_client):
+    response = static_client.get('/static/dist/assets/dashboard-3f9a1c2b.js')
+    assert response.headers['Cache-Control'] == IMMUTABLE_CACHE_CONTROL
+
+
+@pytest.mark.parametrize('path', [
+    'dist/assets/not-hashed.js',
+    'dist/tennis-ball-icon.svg',
+    'img/club-banner-2024.png',
+])
+def test_other_static_files_are_revalidated(static_client, path):
+    assert static_client.get(f'/static/{path}').headers['Cache-Control'] == 'no-cache'
+
+
+def test_precompressed_sibling_is_served_to_clients_that_accept_it(static_client):
+    response = static_client.get('/static/dist/assets/dashboard-3f9a1c2b.js',
+                                 headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert gzip.decompress(response.data) == b'console.log("dashboard")'
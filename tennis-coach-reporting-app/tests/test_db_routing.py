@@ -0,0 +1,84 @@
+import logging
+import os
+
+import pytest
+from flask import Flask, jsonify
+
+from app.extensions import db
+from app.models import TennisClub
+from app.utils.db_routing import init_db_routing, use_primary
+from conftest import SQLITE_TABLES, TestConfig
+
+
+class ReplicaConfig(TestConfig):
+    SECRET_KEY = 'test'
+    SQLALCHEMY_BINDS = {'replica': 'sqlite://'}
+
+
+@pytest.fixture
+def routed_app():
+    """Primary and replica as two separate databases, so a read shows where it went"""
+    app = Flask('app', instance_path=os.path.join(os.path.dirname(__file__), 'instance'))
+    app.config.from_object(ReplicaConfig)
+    db.init_app(app)
+    init_db_routing(app)
+
+    def club_names():
+        return jsonify(sorted(name for (name,) in db.session.query(TennisClub.name)))
+
+    app.add_url_rule('/clubs', 'list_clubs', club_names)
+
+    @app.route('/clubs/primary', endpoint='list_clubs_primary')
+    @use_primary
+    def club_names_from_primary():
+        return club_names()
+
+    @app.route('/clubs', methods=['POST'], endpoint='add_club')
+    def add_club():
+        db.session.add(TennisClub(name='Added', subdomain='added'))
+        db.session.commit()
+        return club_names()
+
+    @app.route('/clubs/unmarked-writer', endpoint='unmarked_writer')
+    def unmarked_writer():
+        db.session.query(TennisClub.name).all()
+        db.session.add(TennisClub(name='Late', subdomain='late'))
+        db.session.commit()
+        return jsonify({})
+
+    @app.teardown_request
+    def remove_session(exc):
+        db.session.remove()
+
+    with app.app_context():
+        for engine in (db.engines[None], db.engines['replica']):
+            db.metadata.create_all(engine, tables=SQLITE_TABLES)
+        with db.engines[None].begin() as conn:
+            conn.execute(TennisClub.__table__.insert(), {'name': 'On primary', 'subdomain': 'p'})
+        with db.engines['replica'].begin() as conn:
+            conn.execute(TennisClub.__table__.insert(), {'name': 'On replica', 'subdomain': 'r'})
+    # Each request then gets an app context, and so a g, of its own
+    return app
+
+
+def test_get_reads_from_the_replica(routed_app):
+    assert routed_app.test_client().get('/clubs').json == ['On replica']
+
+
+def test_use_primary_views_read_from_the_primary(routed_app):
+    assert routed_app.test_client().get('/clubs/primary').json == ['On primary']
+
+
+def test_writes_and_the_reads_around_them_use_the_primary(routed_app):
+    client = routed_app.test_client()
+    assert client.post('/clubs').json == ['Added', 'On primary']
+    # Read-your-writes: the writer is pinned to the primary for a while
+    assert client.get('/clubs').json == ['Added', 'On primary']
+    # Other users still read from the replica
+    assert routed_app.test_client().get('/clubs').json == ['On replica']
+
+
+def test_get_writing_after_replica_reads_is_logged(routed_app, caplog):
+    with caplog.at_level(logging.WARNING):
+        routed_app.test_client().get('/clubs/unmarked-writer')
+    assert 'unmarked_writer wrote after reading from the replica' in caplog.text
@@ -0,0 +1,87 @@
+import pytest
+from flask_login import login_user
+
+from app.extensions import db, login_manager
+from app.models import ResourceVersion, TennisGroup, User
+from app.utils.etags import ALL_CLUBS, conditional_get
+
+
+def versions():
+    return {(row.club_id, row.resource): row.version for row in ResourceVersion.query}
+
+
+def test_flush_bumps_the_resources_of_the_changed_club(club):
+    before = versions()
+    group = TennisGroup(name='Red 1', tennis_club_id=club.id)
+    db.session.add(group)
+    db.session.commit()
+
+    after = versions()
+    assert after[(club.id, 'groups')] == before.get((club.id, 'groups'), 0) + 1
+    assert after[(club.id, 'templates')] == before.get((club.id, 'templates'), 0) + 1
+
+    group.name = 'Red 2'
+    db.session.commit()
+    assert versions()[(club.id, 'groups')] == after[(club.id, 'groups')] + 1
+
+
+def test_club_changes_are_versioned_for_all_clubs(club):
+    before = versions().get((ALL_CLUBS, 'identity'), 0)
+    club.name = 'Renamed'
+    db.session.commit()
+    assert versions()[(ALL_CLUBS, 'identity')] == before + 1
+
+
+def test_moving_a_user_bumps_both_clubs(club):
+    from app.models import TennisClub
+    other = TennisClub(name='Other Club', subdomain='other')
+    db.session.add(other)
+    db.session.commit()
+    before = versions()
+
+    user = User.query.filter_by(tennis_club_id=club.id).one()
+    user.tennis_club_id = other.id
+    db.session.commit()
+
+    after = versions()
+    assert after[(club.id, 'coaches')] == before[(club.id, 'coaches')] + 1
+    assert after[(other.id, 'coaches')] == before.get((other.id, 'coaches'), 0) + 1
+
+
+@pytest.fixture
+def groups_view(app, club):
+    login_manager.init_app(app)
+    calls = []
+
+    @conditional_get('groups')
+    def list_groups():
+        calls.append(True)
+        return {'groups': [g.name for g in TennisGroup.query]}
+
+    def get(etag=None):
+        headers = {'If-None-Match': etag} if etag else {}
+        with app.test_request_context('/api/groups', headers=headers):
+            login_user(User.query.filter_by(tennis_club_id=club.id).one())
+            return list_groups()
+
+    get.calls = calls
+    return get
+
+
+def test_unchanged_resources_answer_304_without_running_the_view(groups_view):
+    first = groups_view()
+    assert first.status_code == 200 and first.headers['Cache-Control'] == 'private, no-cache'
+
+    second = groups_view(first.headers['ETag'])
+    assert second.status_code == 304
+    assert len(groups_view.calls) == 1
+
+
+def test_a_write_changes_the_etag(groups_view, club):
+    etag = groups_view().headers['ETag']
+    db.session.add(TennisGroup(name='Red 1', tennis_club_id=club.id))
+    db.session.commit()
+
+    response = groups_view(etag)
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
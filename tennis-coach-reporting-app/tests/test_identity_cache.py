@@ -0,0 +1,108 @@
+from cachetools import TTLCache
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models import TennisClub, User, UserRole
+from app.utils import identity_cache
+from app.utils.etags import bump_resource_versions
+from app.utils.identity_cache import IDENTITY_RESOURCE, load_user
+
+
+def admin_of(club):
+    return User.query.filter_by(tennis_club_id=club.id).one()
+
+
+def new_request():
+    db.session.remove()
+
+
+def test_second_load_is_served_from_the_cache(club):
+    user_id = admin_of(club).id
+    new_request()
+
+    first = load_user(user_id)
+    new_request()
+    second = load_user(user_id)
+
+    assert user_id in identity_cache._users
+    assert second.role == first.role == UserRole.ADMIN
+    assert second.tennis_club.name == 'Test Club'
+
+
+def test_a_hit_runs_no_queries(club):
+    user_id = admin_of(club).id
+    new_request()
+    load_user(user_id)
+    new_request()
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        user = load_user(user_id)
+        assert user.tennis_club.name == 'Test Club'
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    assert statements == []
+
+
+def test_role_change_in_another_process_is_seen_once_the_version_ttl_runs_out(club, monkeypatch):
+    now = [0]
+    monkeypatch.setattr(identity_cache, '_versions', TTLCache(maxsize=256, ttl=5, timer=lambda: now[0]))
+    user_id = admin_of(club).id
+    new_request()
+    load_user(user_id)
+
+    # Another worker demotes the admin; none of this process's session hooks run
+    with db.engine.begin() as connection:
+        connection.execute(update(User).where(User.id == user_id).values(role=UserRole.COACH))
+        bump_resource_versions(connection, {(club.id, IDENTITY_RESOURCE)})
+
+    new_request()
+    assert load_user(user_id).role == UserRole.ADMIN
+
+    now[0] = 6
+    new_request()
+    assert load_user(user_id).role == UserRole.COACH
+
+
+def test_role_change_in_this_process_is_seen_on_the_next_request(club):
+    user_id = admin_of(club).id
+    new_request()
+    load_user(user_id)
+
+    with Session(db.engine) as other:
+        other.get(User, user_id).role = UserRole.COACH
+        other.commit()
+
+    new_request()
+    assert load_user(user_id).role == UserRole.COACH
+
+
+def test_bulk_update_invalidates_cached_users(club):
+    user_id = admin_of(club).id
+    new_request()
+    load_user(user_id)
+
+    User.query.filter_by(id=user_id).update({'role': UserRole.COACH})
+    db.session.commit()
+
+    new_request()
+    assert load_user(user_id).role == UserRole.COACH
+
+
+def test_club_rename_is_seen_by_cached_users(club):
+    user_id = admin_of(club).id
+    new_request()
+    load_user(user_id)
+
+    db.session.get(TennisClub, club.id).name = 'Renamed Club'
+    db.session.commit()
+
+    new_request()
+    assert load_user(user_id).tennis_club.name == 'Renamed Club'
+
+
+def test_unknown_user_loads_as_none(app):
+    assert load_user(999) is None
@@ -0,0 +1,209 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.extensions import db
+from app.models import BackgroundJob
+from app.services import job_queue
+from app.services.job_queue import (
+    FAILED, QUEUED, SUCCEEDED, PermanentJobError, claim_job, enqueue, job_eta_seconds,
+    job_events, job_status, run_job
+)
+
+
+@pytest.fixture
+def handlers(monkeypatch):
+    """Register test handlers for the duration of a test"""
+    registered = {}
+    monkeypatch.setattr(job_queue, 'JOB_HANDLERS', registered)
+    return registered
+
+
+def claimed(kind, attempts=1, max_attempts=3, payload=None):
+    """Enqueue a job and mark it running, as claim_job would"""
+    job = enqueue(kind, payload or {}, max_attempts=max_attempts)
+    job.status, job.attempts = 'running', attempts
+    db.session.commit()
+    return {'id': job.id, 'kind': kind, 'payload': job.payload, 'attempts': attempts,
+            'max_attempts': max_attempts}
+
+
+def test_successful_job_stores_its_result(app, handlers):
+    handlers['echo'] = lambda ctx, payload: {'echo': payload['value'], 'attempt': ctx.attempt}
+    job = claimed('echo', payload={'value': 42})
+
+    assert run_job(job) == SUCCEEDED
+    stored = db.session.get(BackgroundJob, job['id'])
+    assert (stored.status, stored.result, stored.error) == (SUCCEEDED, {'echo': 42, 'attempt': 1}, None)
+    assert stored.finished_at is not None
+
+
+def test_failing_job_is_retried_with_backoff(app, handlers):
+    def flaky(ctx, payload):
+        raise ConnectionError('SES unavailable')
+    handlers['flaky'] = flaky
+    job = claimed('flaky', attempts=2)
+
+    before = datetime.now(timezone.utc)
+    assert run_job(job, retry_base_seconds=30) == QUEUED
+
+    stored = db.session.get(BackgroundJob, job['id'])
+    assert (stored.status, stored.error, stored.locked_by) == (QUEUED, 'SES unavailable', None)
+    # 30s doubled for the second attempt
+    run_after = stored.run_after.replace(tzinfo=timezone.utc)
+    assert before + timedelta(seconds=59) < run_after < before + timedelta(seconds=62)
+
+
+def test_last_attempt_fails_the_job(app, handlers):
+    def broken(ctx, payload):
+        assert ctx.is_last_attempt
+        raise ValueError('still broken')
+    handlers['broken'] = broken
+    job = claimed('broken', attempts=3, max_attempts=3)
+
+    assert run_job(job) == FAILED
+    assert db.session.get(BackgroundJob, job['id']).error == 'still broken'
+
+
+def test_permanent_error_fails_at_once_and_keeps_its_result(app, handlers):
+    def invalid(ctx, payload):
+        raise PermanentJobError('Upload failed', {'details': ['Row 2: Group Red not found']})
+    handlers['invalid'] = invalid
+    job = claimed('invalid', attempts=1)
+
+    assert run_job(job) == FAILED
+    stored = db.session.get(BackgroundJob, job['id'])
+    assert (stored.status, stored.error, stored.result) == (
+        FAILED, 'Upload failed', {'details': ['Row 2: Group Red not found']}
+    )
+
+
+def test_unknown_kind_fails(app, handlers):
+    job = claimed('nobody-handles-this')
+    assert run_job(job) == FAILED
+    assert 'No handler' in db.session.get(BackgroundJob, job['id']).error
+
+
+def test_claim_binds_kinds_and_club_limit(app, monkeypatch):
+    captured = {}
+
+    class Result:
+        def mappings(self):
+            return self
+
+        def first(self):
+            return None
+
+    def execute(statement, params):
+        captured['sql'] = str(statement.compile())
+        captured['params'] = params
+        return Result()
+
+    monkeypatch.setattr(db.session, 'execute', execute)
+    assert claim_job('host:1', kinds=('report_pdfs', 'send_reports'), club_limit=3) is None
+    assert captured['params'] == {
+        'worker_id': 'host:1', 'any_kind': False, 'club_limit': 3, 'kinds': ['report_pdfs', 'send_reports']
+    }
+    assert 'FOR UPDATE SKIP LOCKED' in captured['sql']
+
+    claim_job('host:1')
+    assert captured['params']['any_kind'] is True
+
+
+def test_status_reports_eta_from_progress(app):
+    job = enqueue('report_pdfs', club_id=None)
+    db.session.commit()
+    assert job_status(job)['eta_seconds'] is None
+
+    started = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+    assert job_eta_seconds({'done': 10, 'total': 40}, started, now=started + timedelta(seconds=20)) == 60
+    assert job_eta_seconds({'done': 0, 'total': 40}, started) is None
+
+
+def parse_events(chunks):
+    return [dict(line.split(': ', 1) for line in chunk.strip().split('\n'))
+            for chunk in chunks if chunk.startswith('id:')]
+
+
+def test_events_carry_ids_and_skip_what_the_client_has_seen(app):
+    job = enqueue('report_pdfs')
+    db.session.commit()
+
+    first = parse_events(job_events(job.id, str, poll_interval=0, max_seconds=0.05))
+    assert len(first) == 1 and first[0]['event'] == 'progress'
+
+    # A reconnect with Last-Event-ID waits for the next change
+    resumed = parse_events(job_events(job.id, str, poll_interval=0, max_seconds=0.05,
+                                      last_event_id=first[0]['id']))
+    assert resumed == []
+
+
+def test_events_end_with_done_once_the_job_finishes(app):
+    job = enqueue('report_pdfs')
+    job.status = SUCCEEDED
+    db.session.commit()
+
+    chunks = list(job_events(job.id, str, poll_interval=0, max_seconds=5))
+    assert chunks[0] == 'retry: 3000\n\n'
+    assert [event['event'] for event in parse_events(chunks)] == ['done']
+
+
+def test_callers_with_the_same_dedupe_key_share_one_active_job(app):
+    first = enqueue('report_pdfs', {'period_id': 1}, dedupe_key='report_pdfs:1:1')
+    db.session.commit()
+    second = enqueue('report_pdfs', {'period_id': 1}, dedupe_key='report_pdfs:1:1')
+    other = enqueue('report_pdfs', {'period_id': 2}, dedupe_key='report_pdfs:1:2')
+    db.session.commit()
+
+    assert second.id == first.id
+    assert other.id != first.id
+    assert BackgroundJob.query.count() == 2
+
+
+def test_send_reports_skips_reports_already_emailed_on_every_attempt(roster_club, monkeypatch):
+    from app.models import ProgrammePlayers, Report, ReportTemplate, Student
+    from app.services import email_service
+    from types import SimpleNamespace
+    from app.services.job_handlers import send_reports_job
+
+    club_id = roster_club['club_id']
+    template = ReportTemplate(name='Report', tennis_club_id=club_id, created_by_id=roster_club['coach_id'])
+    db.session.add(template)
+    db.session.flush()
+    report_ids = []
+    for name, sent in (('Alex', True), ('Sam', False)):
+        student = Student(name=name, contact_email='parent@example.com', tennis_club_id=club_id)
+        db.session.add(student)
+        db.session.flush()
+        player = ProgrammePlayers(
+            student_id=student.id, coach_id=roster_club['coach_id'], group_id=roster_club['group_id'],
+            teaching_period_id=roster_club['period_id'], tennis_club_id=club_id
+        )
+        db.session.add(player)
+        db.session.flush()
+        report = Report(
+            student_id=student.id, coach_id=roster_club['coach_id'], group_id=roster_club['group_id'],
+            teaching_period_id=roster_club['period_id'], programme_player_id=player.id,
+            template_id=template.id, content={}, email_sent=sent
+        )
+        db.session.add(report)
+        db.session.flush()
+        report_ids.append(report.id)
+    db.session.commit()
+
+    emailed = []
+
+    class FakeEmailService:
+        def send_reports_batch(self, reports, subject=None, message=None, progress=None):
+            emailed.extend(report.id for report in reports)
+            return len(reports), 0, []
+
+    monkeypatch.setattr(email_service, 'EmailService', FakeEmailService)
+    # A first attempt, with progress writes (Postgres SQL) left out
+    ctx = SimpleNamespace(job_id=1, attempt=1, progress=lambda force=False, **fields: None)
+    result = send_reports_job(ctx, {
+        'period_id': roster_club['period_id'], 'club_id': club_id, 'subject': 'Reports', 'message': 'Hello'
+    })
+
+    assert emailed == [report_ids[1]]
+    assert result['success_count'] == 1
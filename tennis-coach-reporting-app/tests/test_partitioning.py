@@ -0,0 +1,62 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.extensions import db
+from app.models import TeachingPeriod
+from app.utils import partitioning
+
+
+@pytest.fixture
+def dropped(club, monkeypatch):
+    """The delete hooks of init_partitioning, recording the periods whose partitions are dropped"""
+    dropped = []
+    monkeypatch.setattr(partitioning, 'drop_period_partitions',
+                        lambda connection, period_id: dropped.append(period_id))
+    hooks = [
+        (TeachingPeriod, 'after_delete', partitioning._after_period_delete),
+        (Session, 'after_commit', partitioning._drop_deleted_period_partitions),
+        (Session, 'after_rollback', partitioning._forget_deleted_periods),
+    ]
+    for target, name, fn in hooks:
+        event.listen(target, name, fn)
+    yield dropped
+    for target, name, fn in hooks:
+        event.remove(target, name, fn)
+
+
+def add_period(club):
+    period = TeachingPeriod(name='Autumn 2026', start_date=datetime(2026, 9, 1),
+                            end_date=datetime(2026, 12, 20), tennis_club_id=club.id)
+    db.session.add(period)
+    db.session.commit()
+    # archived_period is not in the SQLite database; deleting must not load it
+    set_committed_value(period, 'archive', None)
+    return period
+
+
+def test_partitions_are_dropped_only_after_the_delete_commits(club, dropped):
+    period = add_period(club)
+    period_id = period.id
+
+    db.session.delete(period)
+    db.session.flush()
+    assert dropped == []
+
+    db.session.commit()
+    assert dropped == [period_id]
+
+
+def test_a_rolled_back_delete_keeps_its_partitions(club, dropped):
+    period = add_period(club)
+
+    db.session.delete(period)
+    db.session.flush()
+    db.session.rollback()
+    db.session.commit()
+
+    assert dropped == []
+    assert db.session.get(TeachingPeriod, period.id) is not None
@@ -0,0 +1,70 @@
+from datetime import datetime
+
+import pytest
+
+from app.extensions import db
+from app.models import ProgrammePlayers, Report, ReportTemplate, Student, TeachingPeriod, TennisGroup
+from app.services.period_rollover import rollover_period
+
+
+@pytest.fixture
+def rollover(roster_club):
+    """Two players in the autumn period, one recommended to move up a group"""
+    club_id = roster_club['club_id']
+    spring = TeachingPeriod(name='Spring 2027', start_date=datetime(2027, 1, 5),
+                            end_date=datetime(2027, 4, 1), tennis_club_id=club_id)
+    orange = TennisGroup(name='Orange 1', tennis_club_id=club_id)
+    template = ReportTemplate(name='Report', tennis_club_id=club_id, created_by_id=roster_club['coach_id'])
+    alex = Student(name='Alex', tennis_club_id=club_id)
+    sam = Student(name='Sam', tennis_club_id=club_id)
+    db.session.add_all([spring, orange, template, alex, sam])
+    db.session.flush()
+
+    players = {}
+    for student in (alex, sam):
+        players[student.name] = ProgrammePlayers(
+            student_id=student.id, coach_id=roster_club['coach_id'], group_id=roster_club['group_id'],
+            group_time_id=roster_club['slot_id'], teaching_period_id=roster_club['period_id'],
+            tennis_club_id=club_id
+        )
+    db.session.add_all(players.values())
+    db.session.flush()
+
+    # Only Alex's latest report counts: it recommends Orange
+    for day, recommended in ((1, roster_club['group_id']), (10, orange.id)):
+        db.session.add(Report(
+            student_id=alex.id, coach_id=roster_club['coach_id'], group_id=roster_club['group_id'],
+            recommended_group_id=recommended, teaching_period_id=roster_club['period_id'],
+            programme_player_id=players['Alex'].id, template_id=template.id, content={},
+            date=datetime(2026, 12, day)
+        ))
+    db.session.commit()
+    return dict(roster_club, spring_id=spring.id, orange_id=orange.id)
+
+
+def run(rollover, **options):
+    return rollover_period(rollover['club_id'], rollover['period_id'], rollover['spring_id'],
+                           default_coach_id=rollover['coach_id'], **options)
+
+
+def test_dry_run_plans_moves_from_the_latest_report_without_writing(rollover):
+    result = run(rollover, dry_run=True)
+
+    assert result['players_to_create'] == 2 and result['groups_changed'] == 1
+    moves = {p['student_name']: p for p in result['players']}
+    assert moves['Alex']['to_group']['id'] == rollover['orange_id']
+    # The slot belongs to the old group, so it is not carried into the new one
+    assert moves['Alex']['group_time_id'] is None
+    assert moves['Sam']['group_time_id'] == rollover['slot_id']
+    assert ProgrammePlayers.query.filter_by(teaching_period_id=rollover['spring_id']).count() == 0
+
+
+def test_rollover_enrols_each_student_once(rollover):
+    # players_created is not asserted: SQLite reports no rowcount for WITH ... INSERT
+    assert run(rollover)['players_skipped'] == 0
+    assert run(rollover)['players_skipped'] == 2
+    assert ProgrammePlayers.query.filter_by(teaching_period_id=rollover['spring_id']).count() == 2
+
+    groups = {p.student.name: p.group_id for p in
+              ProgrammePlayers.query.filter_by(teaching_period_id=rollover['spring_id'])}
+    assert groups == {'Alex': rollover['orange_id'], 'Sam': rollover['group_id']}
@@ -0,0 +1,89 @@
+from datetime import datetime
+
+import pytest
+
+from app.extensions import db
+from app.models import (
+    FieldType, ProgrammePlayers, Report, ReportTemplate, Student, TemplateField, TemplateSection,
+    TemplateVersion
+)
+from app.services.report_export import BASE_COLUMNS, export_columns, iter_report_rows
+from app.utils.report_content import EXTRA_KEY, FIELDS_KEY, content_for_storage, expand
+from app.utils.template_cache import bump_template_versions, get_compiled_template
+
+CONTENT = {
+    'Forehand': {'Grip': 'Eastern', 'Follow through': 'Good'},
+    'Serve': {'Toss': 'Too low'},
+    'Notes': 'Free text outside any section',
+}
+
+
+@pytest.fixture
+def template(roster_club, app):
+    app.config['REPORT_CONTENT_COMPACT'] = True
+    template = ReportTemplate(name='Red', tennis_club_id=roster_club['club_id'],
+                              created_by_id=roster_club['coach_id'])
+    section = TemplateSection(name='Forehand', order=1)
+    section.fields.append(TemplateField(name='Grip', field_type=FieldType.SELECT, order=1))
+    section.fields.append(TemplateField(name='Follow through', field_type=FieldType.PROGRESS, order=2))
+    template.sections.append(section)
+    db.session.add(template)
+    db.session.commit()
+    return template
+
+
+def test_compact_content_expands_back_to_what_was_saved(template):
+    stored = content_for_storage(CONTENT, get_compiled_template(template.id))
+
+    assert set(stored[FIELDS_KEY].values()) == {'Eastern', 'Good'}
+    # Answers the template has no field for are kept by name
+    assert stored[EXTRA_KEY] == {'Serve': {'Toss': 'Too low'}, 'Notes': 'Free text outside any section'}
+    assert expand(stored, template.id) == CONTENT
+
+
+def test_snapshot_records_field_type_and_order(template):
+    compiled = get_compiled_template(template.id)
+    content_for_storage(CONTENT, compiled)
+
+    fields = db.session.get(TemplateVersion, (template.id, 1)).fields
+    assert sorted(fields.values()) == [
+        ['Forehand', 'Follow through', 'PROGRESS', 1, 2],
+        ['Forehand', 'Grip', 'SELECT', 1, 1],
+    ]
+
+
+def test_content_keeps_the_names_it_was_written_with(template):
+    stored = content_for_storage(CONTENT, get_compiled_template(template.id))
+    template.sections[0].fields[0].name = 'Grip style'
+    bump_template_versions([template.id])
+    db.session.commit()
+
+    assert expand(stored, template.id)['Forehand']['Grip'] == 'Eastern'
+
+
+def test_export_has_columns_for_extra_answers_and_renamed_fields(template, roster_club):
+    student = Student(name='Alex', tennis_club_id=roster_club['club_id'])
+    db.session.add(student)
+    db.session.flush()
+    player = ProgrammePlayers(
+        student_id=student.id, coach_id=roster_club['coach_id'], group_id=roster_club['group_id'],
+        teaching_period_id=roster_club['period_id'], tennis_club_id=roster_club['club_id']
+    )
+    db.session.add(player)
+    db.session.flush()
+    content = content_for_storage(CONTENT, get_compiled_template(template.id))
+    db.session.add(Report(
+        student_id=student.id, coach_id=roster_club['coach_id'], group_id=roster_club['group_id'],
+        teaching_period_id=roster_club['period_id'], programme_player_id=player.id,
+        template_id=template.id, content=content, date=datetime(2026, 12, 1)
+    ))
+    template.sections[0].fields[0].name = 'Grip style'
+    bump_template_versions([template.id])
+    db.session.commit()
+
+    columns = export_columns(roster_club['club_id'], roster_club['period_id'])
+    assert columns[len(BASE_COLUMNS):] == [
+        'Forehand: Grip style', 'Forehand: Follow through', 'Forehand: Grip', 'Serve: Toss'
+    ]
+    row = next(iter_report_rows(roster_club['club_id'], roster_club['period_id']))
+    assert {row[column] for column in columns[len(BASE_COLUMNS) + 1:]} == {'Good', 'Eastern', 'Too low'}
@@ -0,0 +1,74 @@
+import pandas as pd
+
+from sqlalchemy import text
+
+from app.extensions import db
+from app.models import ProgrammePlayers, Student
+from app.services.roster_copy import (
+    CREATE_STAGING_SQL, DUPLICATE_SQL, REJECTS_SQL, STAGING_COLUMNS, _staging_frame
+)
+from app.services.roster_import import MAX_REPORTED_ERRORS
+from test_roster_import import roster, roster_row
+
+
+def test_staging_frame_normalises_rows_for_copy():
+    frame = _staging_frame(roster(
+        roster_row(coach_email=' Coach@Example.COM ', day_of_week='monday', start_time='9:05'),
+        roster_row(date_of_birth='bad', day_of_week='Someday', end_time='5pm'),
+    ), first_row_number=12)
+
+    assert list(frame.columns) == STAGING_COLUMNS
+    first, second = frame.to_dict('records')
+    assert first['row_number'] == 12 and second['row_number'] == 13
+    assert (first['coach_email'], first['day_of_week'], first['start_time']) == ('coach@example.com', 'MONDAY', '09:05')
+    assert first['date_of_birth'] == '2015-04-01' and pd.isna(first['dob_error'])
+    # Unparseable values are copied in as NULL, with the date error kept for later
+    assert pd.isna(second['date_of_birth']) and second['dob_error'].startswith("Invalid date format for 'bad'")
+    assert pd.isna(second['day_of_week']) and pd.isna(second['end_time'])
+
+
+def test_staging_frame_copies_blank_names_as_empty_not_nan():
+    frame = _staging_frame(roster(roster_row(student_name=None)), first_row_number=2)
+    assert frame.loc[0, 'student_name'] == ''
+
+
+def stage(rows):
+    """Load resolved staging rows into a SQLite copy of the staging table"""
+    connection = db.session.connection()
+    connection.execute(text(CREATE_STAGING_SQL.replace('ON COMMIT DROP', '')))
+    connection.execute(text(
+        "INSERT INTO roster_staging (row_number, student_name, student_id, group_time_id, error) "
+        "VALUES (:row_number, :student_name, :student_id, :group_time_id, :error)"
+    ), rows)
+    return connection
+
+
+def test_copy_path_rejects_repeated_and_already_enrolled_rows(roster_club):
+    club_id, period_id, slot_id = roster_club['club_id'], roster_club['period_id'], roster_club['slot_id']
+    enrolled = Student(name='Sam Jones', tennis_club_id=club_id)
+    db.session.add(enrolled)
+    db.session.flush()
+    db.session.add(ProgrammePlayers(
+        student_id=enrolled.id, coach_id=roster_club['coach_id'], group_id=roster_club['group_id'],
+        group_time_id=slot_id, teaching_period_id=period_id, tennis_club_id=club_id
+    ))
+    db.session.flush()
+
+    connection = stage([
+        {'row_number': 2, 'student_name': 'Alex Smith', 'student_id': None, 'group_time_id': slot_id, 'error': None},
+        {'row_number': 3, 'student_name': 'Alex Smith', 'student_id': None, 'group_time_id': slot_id, 'error': None},
+        {'row_number': 4, 'student_name': 'Sam Jones', 'student_id': enrolled.id, 'group_time_id': slot_id,
+         'error': None},
+        # Already rejected for another reason, so not reported again as a duplicate
+        {'row_number': 5, 'student_name': 'Alex Smith', 'student_id': None, 'group_time_id': slot_id,
+         'error': 'Group time slot not found'},
+    ])
+    for statement in DUPLICATE_SQL:
+        connection.execute(text(statement), {'club_id': club_id, 'teaching_period_id': period_id})
+
+    rejects = connection.execute(text(REJECTS_SQL), {'limit': MAX_REPORTED_ERRORS}).all()
+    assert [row.message for row in rejects] == [
+        'Row 3: Duplicate of row 2',
+        'Row 4: Student Sam Jones is already in this group time slot for the teaching period',
+        'Row 5: Group time slot not found',
+    ]
@@ -0,0 +1,165 @@
+import pandas as pd
+
+from app.extensions import db
+from app.models import ProgrammePlayers, Student
+from app.services.roster_import import (
+    RosterLookups, import_roster_file, insert_rows, iter_roster_chunks, missing_columns, new_students,
+    parse_dates, validate_rows
+)
+
+
+def roster_row(**overrides):
+    row = {
+        'student_name': 'Alex Smith', 'date_of_birth': '2015-04-01', 'contact_email': 'parent@example.com',
+        'coach_email': 'Coach@Example.com', 'group_name': 'red 1', 'day_of_week': 'Monday',
+        'start_time': '16:00', 'end_time': '17:00'
+    }
+    row.update(overrides)
+    return row
+
+
+def roster(*rows):
+    return pd.DataFrame(list(rows), dtype=str)
+
+
+def test_missing_columns_lists_required_columns_in_order():
+    df = roster(roster_row()).drop(columns=['group_name', 'coach_email'])
+    assert missing_columns(df) == ['coach_email', 'group_name']
+
+
+def test_parse_dates_accepts_both_formats_and_explains_the_rest():
+    dates, errors = parse_dates(pd.Series(['2015-04-01', '01-apr-2015', '1/4/2015', '']))
+    assert dates[0] == dates[1] == pd.Timestamp('2015-04-01').date()
+    assert errors[:2].isna().all()
+    assert errors[2].startswith("Invalid date format for '1/4/2015'")
+    assert errors[3] == 'Invalid date input: '
+
+
+def test_validate_rows_resolves_ids_and_reports_errors_in_precedence_order(roster_club):
+    df = roster(
+        roster_row(),
+        roster_row(coach_email='nobody@example.com', group_name='Nowhere'),
+        roster_row(group_name='Nowhere'),
+        roster_row(start_time='4pm'),
+        roster_row(day_of_week='Someday'),
+        roster_row(day_of_week='Tuesday'),
+    )
+    valid, errors = validate_rows(df, RosterLookups(roster_club['club_id']))
+
+    assert errors == [
+        'Row 3: Coach with email nobody@example.com not found',
+        'Row 4: Group Nowhere not found',
+        'Row 5: Invalid time format. Use HH:MM',
+        'Row 6: Invalid day of week',
+        'Row 7: Group time slot not found',
+    ]
+    assert valid[['row_number', 'coach_id', 'group_id', 'group_time_id']].values.tolist() == [
+        [2, roster_club['coach_id'], roster_club['group_id'], roster_club['slot_id']]
+    ]
+
+
+def test_validate_rows_requires_a_student_name(roster_club):
+    df = roster(roster_row(student_name=None), roster_row(student_name='  '), roster_row())
+    valid, errors = validate_rows(df, RosterLookups(roster_club['club_id']))
+
+    assert errors == ['Row 2: Student name is required', 'Row 3: Student name is required']
+    assert valid['student_name'].tolist() == ['Alex Smith']
+
+
+def test_new_students_checks_dates_only_for_students_that_do_not_exist(roster_club):
+    db.session.add(Student(name='Existing', tennis_club_id=roster_club['club_id']))
+    db.session.commit()
+    df = roster(
+        roster_row(student_name='Existing', date_of_birth='not a date'),
+        roster_row(student_name='New', date_of_birth='not a date'),
+        roster_row(student_name='Fine'),
+        roster_row(student_name='Fine', date_of_birth='also not a date'),
+    )
+    valid, errors = validate_rows(df, RosterLookups(roster_club['club_id']))
+    students, date_errors = new_students(valid, roster_club['club_id'])
+
+    assert errors == []
+    assert students['student_name'].tolist() == ['Fine']
+    assert len(date_errors) == 1 and date_errors[0].startswith("Row 3: Invalid date format for 'not a date'")
+
+
+def test_insert_rows_creates_each_student_once_and_a_player_per_row(roster_club):
+    club_id, period_id = roster_club['club_id'], roster_club['period_id']
+    df = roster(roster_row(), roster_row(student_name='Sam Jones'), roster_row())
+    valid, _ = validate_rows(df, RosterLookups(club_id))
+    students, _ = new_students(valid, club_id)
+
+    assert insert_rows(valid, students, club_id, period_id) == (2, 3)
+    db.session.commit()
+    assert sorted(name for (name,) in db.session.query(Student.name)) == ['Alex Smith', 'Sam Jones']
+    assert ProgrammePlayers.query.filter_by(
+        teaching_period_id=period_id, group_time_id=roster_club['slot_id']
+    ).count() == 3
+
+
+def write_csv(path, rows):
+    roster(*rows).to_csv(path, index=False)
+    return str(path)
+
+
+def test_csv_is_read_in_trimmed_chunks(tmp_path):
+    path = write_csv(tmp_path / 'roster.csv', [roster_row(student_name=f' Player {i} ') for i in range(5)])
+    chunks = list(iter_roster_chunks(path, chunk_size=2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert chunks[2]['student_name'].tolist() == ['Player 4']
+
+
+def test_xlsx_cells_are_read_as_csv_text(tmp_path):
+    from datetime import date, time
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(list(roster_row()))
+    sheet.append(['Alex Smith', date(2015, 4, 1), 'parent@example.com', 'coach@example.com',
+                  'Red 1', 'Monday', time(16, 0), time(17, 0)])
+    sheet.append([None] * 8)
+    sheet.append(['Sam Jones', '2016-05-02', None, 'coach@example.com', 'Red 1', 'Monday', '16:00', '17:00'])
+    path = str(tmp_path / 'roster.xlsx')
+    workbook.save(path)
+
+    chunks = list(iter_roster_chunks(path, chunk_size=1))
+    assert [len(chunk) for chunk in chunks] == [1, 1]
+    first = chunks[0].iloc[0]
+    assert (first['date_of_birth'], first['start_time'], first['end_time']) == ('2015-04-01', '16:00', '17:00')
+    assert chunks[1].iloc[0]['contact_email'] is None
+
+
+def test_import_validates_every_chunk_before_writing(roster_club, tmp_path):
+    rows = [roster_row(student_name=f'Player {i}') for i in range(5)]
+    rows.append(roster_row(group_name='Nowhere'))
+    path = write_csv(tmp_path / 'roster.csv', rows)
+
+    result = import_roster_file(path, roster_club['club_id'], roster_club['period_id'], chunk_size=2)
+
+    assert result == {'error': 'Upload failed', 'details': ['Row 7: Group Nowhere not found']}
+    assert Student.query.count() == 0
+
+
+def test_import_creates_a_student_once_across_chunks(roster_club, tmp_path):
+    # The second row for Alex only needs a valid date if it creates the student
+    rows = [roster_row(), roster_row(student_name='Sam Jones'), roster_row(date_of_birth='')]
+    path = write_csv(tmp_path / 'roster.csv', rows)
+    progress = []
+
+    result = import_roster_file(path, roster_club['club_id'], roster_club['period_id'], chunk_size=2,
+                                progress=lambda **fields: progress.append(fields))
+
+    assert result == {'message': 'Upload successful', 'students_created': 2, 'players_created': 3}
+    assert Student.query.count() == 2
+    assert progress[-1] == {'phase': 'importing', 'rows_processed': 3, 'rows_total': 3}
+
+
+def test_import_reports_missing_columns(roster_club, tmp_path):
+    path = str(tmp_path / 'roster.csv')
+    roster(roster_row()).drop(columns=['end_time']).to_csv(path, index=False)
+
+    assert import_roster_file(path, roster_club['club_id'], roster_club['period_id']) == {
+        'error': 'Missing columns: end_time'
+    }
@@ -0,0 +1,28 @@
+import pytest
+from flask import g
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.extensions import db
+from app.utils.sql_instrumentation import init_sql_instrumentation, statement_shape
+
+
+def test_statement_shape_ignores_parameters():
+    assert statement_shape('SELECT * FROM report WHERE id = 12') == statement_shape(
+        'SELECT *  FROM report\n WHERE id = :id_1'
+    )
+    assert statement_shape('SELECT 1 WHERE id IN (?, ?, ?)') == 'SELECT ? WHERE id IN (?)'
+
+
+def test_failed_statements_are_not_counted(app):
+    app.config['SQL_INSTRUMENTATION'] = True
+    init_sql_instrumentation(app)
+
+    with app.test_request_context('/'):
+        with pytest.raises(OperationalError):
+            db.session.execute(text('SELECT * FROM no_such_table'))
+        db.session.rollback()
+        db.session.execute(text('SELECT 1'))
+
+        assert g.sql_stats['count'] == 1
+        assert list(g.sql_stats['shapes']) == ['SELECT ?']
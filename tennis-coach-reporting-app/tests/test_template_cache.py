@@ -0,0 +1,45 @@
+from app.extensions import db
+from app.models import FieldType, ReportTemplate, TemplateField, TemplateSection, User
+from app.utils import template_cache
+from app.utils.template_cache import bump_template_versions, get_compiled_template
+
+
+def make_template(club):
+    admin = User.query.filter_by(tennis_club_id=club.id).first()
+    template = ReportTemplate(name='Red', tennis_club_id=club.id, created_by_id=admin.id)
+    section = TemplateSection(name='Forehand', order=1)
+    section.fields.append(TemplateField(
+        name='Grip', field_type=FieldType.TEXT, is_required=True, order=1
+    ))
+    template.sections.append(section)
+    db.session.add(template)
+    db.session.commit()
+    return template
+
+
+def test_compiled_template_is_cached_per_version(club):
+    template = make_template(club)
+
+    compiled = get_compiled_template(template.id)
+
+    assert compiled['version'] == 1
+    assert compiled['sections'][0]['fields'][0]['name'] == 'Grip'
+    assert get_compiled_template(template.id) is compiled
+
+
+def test_bumping_the_version_recompiles_and_drops_the_old_entry(club):
+    template = make_template(club)
+    get_compiled_template(template.id)
+
+    template.sections[0].fields[0].name = 'Grip and stance'
+    bump_template_versions([template.id])
+    db.session.commit()
+
+    compiled = get_compiled_template(template.id)
+    assert compiled['version'] == 2
+    assert compiled['sections'][0]['fields'][0]['name'] == 'Grip and stance'
+    assert (template.id, 1) not in template_cache._compiled_templates
+
+
+def test_missing_template_compiles_to_none(app):
+    assert get_compiled_template(12345) is None